@@ -0,0 +1,89 @@
+"""
+Measures how long `Message` objects take to build and how much memory they hold.
+
+The payloads are gateway dispatches (one JSON frame per line), they are replayed until
+`--count` messages are built, once with only the scalar fields and once with every embed,
+component and author built. The bundled payloads are synthetic, written to look like Dank Memer
+replies: timestamps, IDs and emojis aren't real, pass captured frames with `--payloads` for real numbers.
+
+Both the `Message` of the current tree and the one of `--baseline` (the commit before `__slots__` and
+lazy fields, read with `git show`) are measured, `--baseline ""` skips it.
+
+    python benchmarks/bench_objects.py --count 20000
+"""
+import argparse, gc, os, subprocess, sys, time, tracemalloc, types
+import orjson
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from DankCord.Objects import Message
+
+PAYLOADS = os.path.join(os.path.dirname(__file__), "payloads", "synthetic_messages.ndjson")
+# The last commit whose `Message` built everything eagerly, without `__slots__`.
+BASELINE = "914ebe4"
+
+
+def load_payloads(path: str) -> list:
+    with open(path, "rb") as f:
+        frames = [orjson.loads(line) for line in f if line.strip()]
+    return [frame["d"] for frame in frames if frame.get("t") in ("MESSAGE_CREATE", "MESSAGE_UPDATE")]
+
+
+def load_baseline(revision: str):
+    """Returns the `Message` class of `revision`, its `Objects.py` doesn't import anything from the package."""
+    source = subprocess.run(
+        ["git", "show", f"{revision}:src/DankCord/Objects.py"], cwd=ROOT, capture_output=True, check=True
+    ).stdout
+    module = types.ModuleType(f"baseline_{revision}")
+    exec(compile(source, f"{revision}:src/DankCord/Objects.py", "exec"), module.__dict__)
+    return module.Message
+
+
+def build(message_class, payloads: list, count: int, full: bool) -> list:
+    messages = []
+    for i in range(count):
+        message = message_class(payloads[i % len(payloads)])
+        if full:
+            message.author, message.embeds, message.buttons, message.dropdowns
+        messages.append(message)
+    return messages
+
+
+def measure(message_class, payloads: list, count: int, full: bool):
+    gc.collect()
+    start = time.perf_counter()
+    build(message_class, payloads, count, full)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    messages = build(message_class, payloads, count, full)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del messages
+    return elapsed / count * 1e6, size / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=20000, help="The number of messages to build.")
+    parser.add_argument("--payloads", default=PAYLOADS, help="A file of gateway frames, one per line.")
+    parser.add_argument("--baseline", default=BASELINE, help="The git revision to compare against, empty to skip it.")
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.payloads)
+    print(f"{len(payloads)} payloads, {args.count} messages per run")
+    trees = [("current", Message)]
+    if args.baseline:
+        trees.insert(0, (args.baseline, load_baseline(args.baseline)))
+    for tree, message_class in trees:
+        for label, full in (("scalars", False), ("full", True)):
+            micros, size = measure(message_class, payloads, args.count, full)
+            print(f"{tree:<8} {label:<8} {micros:8.2f} us/message {size:10.0f} bytes/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Measures how fast each `Parser` method is on a corpus of embed descriptions.
+
+The corpus is extracted from NDJSON transcripts by `extract_descriptions.py`. Every line names a parser,
+where the description came from, the description and the expected result: whether it succeeded,
+the coins and `[amount, name]` items gained, or the timestamp of a cooldown.
+Each parser is run over its descriptions until `--count` parses are done.
+
+The shipped corpus is synthetic: a handful of hand-written descriptions in Dank Memer's format, about one
+per parser. Checking them against their labels only catches a parser that stopped handling that one
+shape, it says nothing about how accurate the parsers are on real replies. Descriptions that aren't
+labelled yet (`"expected": null`) are only timed.
+
+    python benchmarks/bench_parser.py --count 50000
+"""
+import argparse, os, sys, time
+import orjson
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from DankCord.Objects import CommandResult, Parser
+
+CORPUS = os.path.join(os.path.dirname(__file__), "payloads", "synthetic_descriptions.ndjson")
+
+
+def load_corpus(path: str) -> dict:
+    corpus = {}
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                entry = orjson.loads(line)
+                corpus.setdefault(entry["parser"], []).append((entry["description"], entry["expected"]))
+    return corpus
+
+
+def matches(result: CommandResult, expected: dict) -> bool:
+    if "timestamp" in expected:
+        return result.cooldown is not None and abs(time.time() + result.cooldown - expected["timestamp"]) < 2
+    items = [[amount, name] for item in result.gain.get("items", []) for amount, name in item.items()]
+    return (
+        result.success == expected["success"]
+        and result.gain.get("coins") == expected.get("coins")
+        and items == expected.get("items", [])
+    )
+
+
+def measure(parser, entries: list, count: int):
+    descriptions = [description for description, _ in entries]
+    start = time.perf_counter()
+    for i in range(count):
+        parser(descriptions[i % len(descriptions)])
+    elapsed = time.perf_counter() - start
+    labelled = [(description, expected) for description, expected in entries if expected is not None]
+    correct = sum(matches(parser(description), expected) for description, expected in labelled)
+    return count / elapsed, correct, len(labelled)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=50000, help="The number of parses per parser.")
+    parser.add_argument("--corpus", default=CORPUS, help="A file of descriptions and their expected results.")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    print(f"{sum(len(entries) for entries in corpus.values())} descriptions, {args.count} parses per parser")
+    for name, entries in corpus.items():
+        rate, correct, labelled = measure(getattr(Parser, name), entries, args.count)
+        print(f"{name:<10} {rate:12.0f} parses/s {correct:4}/{labelled:<4} match their label")
+
+
+if __name__ == "__main__":
+    main()
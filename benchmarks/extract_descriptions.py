@@ -0,0 +1,66 @@
+"""
+Extracts the command result descriptions of gateway transcripts into a parser corpus.
+
+Each message is given to the parser `Core` would use, picked like `DankCord.batch` does, and written as a corpus line.
+Expected results are carried over from the corpus being updated; new descriptions get `"expected": null`
+and are only timed until they're labelled by hand. The shipped transcript and corpus are synthetic.
+
+    python benchmarks/extract_descriptions.py benchmarks/payloads/synthetic_messages.ndjson --corpus benchmarks/payloads/synthetic_descriptions.ndjson
+"""
+import argparse, os, sys
+import orjson
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from DankCord.batch import FOLLOW_UP, PARSERS, read_lines
+from DankCord.Objects import Parser
+
+CORPUS = os.path.join(os.path.dirname(__file__), "payloads", "synthetic_descriptions.ndjson")
+
+
+def extract(paths: list) -> list:
+    """Returns `(parser, description, source)` for every command result in the transcripts, without duplicates."""
+    entries = {}
+    for path in paths:
+        for number, line in enumerate(read_lines([path]), 1):
+            frame = orjson.loads(line)
+            event, data = (frame.get("t"), frame.get("d")) if "op" in frame else (None, frame)
+            name = ((data or {}).get("interaction") or {}).get("name")
+            if name not in PARSERS or not data.get("embeds"):
+                continue
+            description = data["embeds"][0].get("description") or ""
+            if Parser.check_cooldown(description):
+                parser = "cooldown"
+            elif event == "MESSAGE_CREATE" and name in FOLLOW_UP:
+                continue
+            else:
+                parser = PARSERS[name].__name__
+            entries.setdefault((parser, description), f"{os.path.basename(path)}:{number}")
+    return [(parser, description, source) for (parser, description), source in entries.items()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("transcripts", nargs="+", help="NDJSON transcript files, one gateway frame or message per line.")
+    parser.add_argument("--corpus", default=CORPUS, help="The corpus to update, its labels are kept.")
+    args = parser.parse_args()
+
+    labels = {}
+    if os.path.exists(args.corpus):
+        with open(args.corpus, "rb") as f:
+            for line in f:
+                if line.strip():
+                    entry = orjson.loads(line)
+                    labels[(entry["parser"], entry["description"])] = entry.get("expected")
+
+    entries = extract(args.transcripts)
+    with open(args.corpus, "wb") as f:
+        for name, description, source in entries:
+            expected = labels.get((name, description))
+            f.write(orjson.dumps({"parser": name, "source": source, "description": description, "expected": expected}) + b"\n")
+    unlabelled = sum(labels.get((name, description)) is None for name, description, _ in entries)
+    print(f"{len(entries)} descriptions, {unlabelled} to label", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
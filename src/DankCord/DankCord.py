@@ -1,18 +1,23 @@
-import datetime, json, time
-import requests
+import datetime, threading, time
+
+from concurrent.futures import ThreadPoolExecutor
 
 from rich import print
-from typing import Callable, Literal, Optional, Union
+from typing import Any, Callable, List, Literal, Optional, Tuple, Union
 from pyloggor import pyloggor
 from requests import Response
 
-from .exceptions import DataAccessFailure, MissingPermissions, NoCommands, UnknownChannel
+from .exceptions import DankCordException, DataAccessFailure, MissingPermissions, NoCommands, UnknownChannel
 from .gateway import Gateway
-from .Objects import Config, Message, User
+from .Objects import BootReport, Config, Message, User
 from .core import Core
-from .api import API
+from .api import API, create_session
+from .boot import BootCacheMixin
+from .commands import CommandIndex
+from .ratelimit import COMMANDS_ROUTE, USER_ROUTE, RateLimiter
+from .storage import BootCache, CommandStore, command_store_path
 
-class Client(API):
+class Client(BootCacheMixin, API):
     def __init__(self, config: Config, logger: pyloggor):
         __boot_start = time.perf_counter()
         logger.log(level="Info", msg="Booting up DankCord client.")
@@ -24,25 +29,100 @@ class Client(API):
 
         self.resource_intensivity = config.resource_intensivity
         self.commands_data = {}
+        self.guild_id: Optional[int] = None
         self.ws_cache = {}
+        self.session = create_session(config)
+        self.rate_limiter = RateLimiter()
+        self.boot_cache: Optional[BootCache] = BootCache(
+            config.boot_cache_dir, config.boot_cache_refresh_after, config.boot_cache_max_age
+        ) if config.boot_cache_dir else None
+
+        self.boot_report = BootReport()
+
+        # The REST calls don't depend on the websocket, they run while the gateway connects.
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="DankCord-boot") as executor:
+            cached_commands, cached_user = self._read_boot_cache()
+            commands_future = executor.submit(self._timed, "commands", self._fetch_commands) if cached_commands is None else None
+            user_future = executor.submit(self._timed, "user", self._fetch_info) if cached_user is None else None
+
+            self.gateway = Gateway(config, self.logger)
+            if not self.gateway:
+                raise ConnectionError("Failed to connect to gateway.")
+            for phase, duration in self.gateway.timings.items():
+                setattr(self.boot_report, phase, duration)
+
+            self.ws = self.gateway.ws
+            self._sync_channel_index()
+
+            if not config.dm_mode:
+                self.guild_id = self.gateway.guild_id
+            self.command_index = CommandIndex(self.guild_id, self.channel_id)
+            self.command_store: Optional[CommandStore] = CommandStore(command_store_path(self.channel_id)) if self.resource_intensivity == "DISK" else None
+
+            stale = []
+            if commands_future is not None:
+                self._save_commands(commands_future.result()[1])
+            else:
+                self.logger.log(level="Debug", msg="Loaded commands from the boot cache.")
+                self._store_commands(cached_commands[0]) # type: ignore
+                if cached_commands[1]: # type: ignore
+                    stale.append(self._get_commands)
+
+            if user_future is not None:
+                self._save_info(user_future.result())
+            else:
+                self.logger.log(level="Debug", msg="Loaded user info from the boot cache.")
+                self.user = User(cached_user[0]) # type: ignore
+                if cached_user[1]: # type: ignore
+                    stale.append(self._get_info)
+
+        self.core = self._timed(
+            "core",
+            Core,
+            config,
+            self.commands_data,
+            self.guild_id,
+            self.logger,
+            self.gateway,
+            self.session,
+            self.command_index,
+            self.command_store,
+            self.rate_limiter,
+        )
+        if stale:
+            threading.Thread(target=self._refresh_boot_cache, args=(stale,), daemon=True).start()
 
-        self.gateway = Gateway(config, self.logger)
-        if not self.gateway:
-            raise ConnectionError("Failed to connect to gateway.")
-
-        self.ws = self.gateway.ws
-        self.session_id: Optional[str] = self.gateway.session_id
-
-        if not config.dm_mode:
-            self.guild_id = self.gateway.guild_id
-
-        self._get_commands()
-        self._get_info()
-
+        self.boot_report.total = time.perf_counter() - __boot_start
         logger.log(
-            level="Info", msg=f"Fully booted up, it took total {round(time.perf_counter() - __boot_start, 3)} seconds."
+            level="Info", msg=f"Fully booted up, it took total {round(self.boot_report.total, 3)} seconds."
         )
-        self.core = Core(config, self.commands_data, self.guild_id, self.session_id, self.logger, self.gateway)
+        logger.log(level="Debug", msg=f"Boot phases: {self.boot_report!r}.")
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the gateway connection, the HTTP session and the command store."""
+        self.gateway.close()
+        self.session.close()
+        if self.command_store is not None:
+            self.command_store.close()
+
+    def _timed(self, phase: str, function: Callable[..., Any], *args) -> Any:
+        """Calls `function`, recording how long it took as `phase` of the boot report."""
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            setattr(self.boot_report, phase, time.perf_counter() - start)
+
+    @property
+    def latency(self) -> float:
+        """The gateway latency, the average heartbeat round trip of the last few heartbeats in seconds."""
+        return self.gateway.latency
 
     def _get_commands(self, channel_id: Optional[str] = None) -> Optional[Response]:
         """Gets all slash command data in a channel, dumps them into memory or a file based on user settings.
@@ -66,13 +146,17 @@ class Client(API):
         response: Optional[`Response`]
         """
         channel_id = channel_id or self.channel_id
-        response = requests.get(  # type: ignore
-                f"https://discord.com/api/v9/channels/{channel_id}/application-commands/search?type=1&application_id=270904126974590976",
-                headers={"Authorization": self.token, "Content-type": "application/json"},
-        )
+        response, commands = self._fetch_commands(channel_id)
+        self._save_commands(commands, channel_id)
+        return response
 
-        if isinstance(response, str):
-            return response
+    def _fetch_commands(self, channel_id: Optional[str] = None) -> Tuple[Response, dict]:
+        """Fetches all slash command data in a channel, keyed by command name. See `_get_commands`."""
+        channel_id = channel_id or self.channel_id
+        response = self._get(
+            COMMANDS_ROUTE,
+            f"https://discord.com/api/v9/channels/{channel_id}/application-commands/search?type=1&application_id=270904126974590976",
+        )
 
         data = response.json()
 
@@ -84,20 +168,17 @@ class Client(API):
         if "application_commands" not in data:
             raise NoCommands("No commands found.")
 
-        if self.resource_intensivity == "MEM":
-            self.commands_data = {
-                command_data["name"]: command_data for command_data in data["application_commands"]
-            }
-        else:
-            with open(f"{self.channel_id}_commands.json", "w") as f:
-                json.dump(
-                    {command_data["name"]: command_data for command_data in data["application_commands"]},
-                    f,
-                    indent=4,
-                    sort_keys=True,
-                )
+        return response, {command_data["name"]: command_data for command_data in data["application_commands"]}
 
-        return response
+    def _refresh_boot_cache(self, fetches: List[Callable[[], Any]]) -> None:
+        """Runs the fetches of stale boot cache entries, keeping the cached data if one fails."""
+        for fetch in fetches:
+            try:
+                fetch()
+            except (Exception, DankCordException) as e:
+                self.logger.log(level="Warning", msg=f"Failed to refresh the boot cache: {e!r}.")
+        self.core.commands_data = self.commands_data
+        self.logger.log(level="Debug", msg="Refreshed the boot cache.")
 
     def _get_command_info(self, name: str) -> dict:
         """Retuns information about a given command.
@@ -114,7 +195,7 @@ class Client(API):
         if self.resource_intensivity == "MEM":
             return self.commands_data.get(name, {})
         else:
-            return json.load(open(f"{self.channel_id}_commands.json", "r+")).get(name, {})
+            return self.command_store.get(name)
 
     def _get_info(self) -> None:
         """Saves information about the bot user account.
@@ -124,19 +205,21 @@ class Client(API):
         DataAccessFailure
             Failed to get user info.
         """
-        resp = requests.get(  # type: ignore
-                "https://discord.com/api/v10/users/@me",
-                headers={"Authorization": self.token, "Content-type": "application/json"},
-            )
+        self._save_info(self._fetch_info())
+
+    def _fetch_info(self) -> dict:
+        """Fetches information about the bot user account. See `_get_info`."""
+        resp = self._get(USER_ROUTE, "https://discord.com/api/v10/users/@me")
         if resp.status_code!= 200:
             raise DataAccessFailure("Failed to get user info.")
-        self.user = User(resp.json())
+        return resp.json()
 
     def wait_for(
         self,
-        event: Literal["MESSAGE_CREATE", "MESSAGE_UPDATE", "INTERACTION_CREATE", "INTERACTION_SUCCESS"],
+        event: Literal["MESSAGE_CREATE", "MESSAGE_UPDATE", "INTERACTION_CREATE", "INTERACTION_SUCCESS", "INTERACTION_FAILURE"],
         check: Optional[Callable[..., bool]] = None,
-        timeout: float = 10
+        timeout: float = 10,
+        since: Optional[float] = None,
     ) -> Optional[Union[Message, bool]]:
         """
         Waits for a WebSocket event to be dispatched.
@@ -148,7 +231,9 @@ class Client(API):
         is dispatched; if the event was not dispatched before the timeout duration is over,
         it returns `None`.
 
-        This function returns the **first event that meets the requirements**.
+        This function returns the **first event that meets the requirements** dispatched after it's called.
+        An event that may arrive before the call, like the reply to something just sent, can still be
+        matched by passing `since`.
 
         Example
         ---------
@@ -171,39 +256,13 @@ class Client(API):
             parameters of the event being waited for.
         timeout: Optional[`float`]
             The number of seconds to wait before timing out and returning `None`.
+        since: Optional[`float`]
+            A `time.monotonic()` reading taken before sending what the event answers, the last
+            cached event is returned if it arrived after it.
 
         Returns
         --------
         Optional[Union[Message, bool]]
             Returns the Message object, or a boolean.
         """
-        limit = time.time() + timeout
-        if check is None:
-            def _check(*args):
-                return True
-            check = _check
-
-        while time.time() < limit:
-            cache = self.gateway.cache    
-            try:        
-                if event == "INTERACTION_CREATE":
-                    if check(cache.interaction_create[-1]):
-                        return True
-                if event =="INTERACTION_SUCCESS":
-                    if check(cache.interaction_success[-1]):
-                        return True
-
-                if event == "MESSAGE_CREATE":
-                    value = list(cache.message_create.values())[-1]
-                    _msg = Message(value)
-                    if check(_msg) is True:
-                        return _msg
-                if event == "MESSAGE_UPDATE":
-                    while len(cache.raw_message_updates) == 0:
-                        continue
-                    _msg = Message(cache.raw_message_updates[-1])
-                    if check(_msg) is True:
-                        return _msg
-            except IndexError:
-                pass
-        return None
\ No newline at end of file
+        return self.gateway.wait_for(event, check, timeout, since)
@@ -1,7 +1,11 @@
-from typing import Literal, Optional, Union
+from typing import Any, Dict, Iterable, Iterator, Literal, MutableMapping, Optional, Union
+from collections import OrderedDict
 from rich import print
-from re import findall
-from datetime import datetime
+from re import compile as re_compile
+from datetime import datetime, timezone
+from time import monotonic
+
+from .hooks import HOOKS, MESSAGE, begin, profiled
 
 class Config:
     def __init__(
@@ -10,6 +14,16 @@ class Config:
         channel_id: Optional[int],
         dm_mode: bool = False,
         resource_intensivity: Literal["DISK", "MEM"] = "MEM",
+        pool_connections: int = 4,
+        pool_maxsize: int = 16,
+        cache_max_size: int = 1000,
+        cache_ttl: float = 600,
+        compress: bool = False,
+        events: Optional[Iterable[str]] = None,
+        session_file: Optional[str] = None,
+        boot_cache_dir: Optional[str] = None,
+        boot_cache_refresh_after: float = 600,
+        boot_cache_max_age: float = 86400,
     ) -> None:
         if not token:
             raise ValueError("No token provided.")
@@ -19,24 +33,156 @@ class Config:
         assert isinstance(token, str), "Bot token must be of type str."
         assert isinstance(channel_id, int), "Channel ID must be of type int."
         assert resource_intensivity.upper() in ("DISK", "MEM"), "Resource intensivity option must be either DISK or MEM."
+        assert pool_connections > 0 and pool_maxsize > 0, "HTTP pool sizes must be positive."
+        assert cache_max_size > 0 and cache_ttl > 0, "Cache size and TTL must be positive."
+        assert 0 <= boot_cache_refresh_after <= boot_cache_max_age, "Boot cache entries must be refreshed before they expire."
 
         self.token: str = token
         self.channel_id: int = channel_id
         self.dm_mode: bool = dm_mode
         self.resource_intensivity: str = resource_intensivity.upper()
+        self.pool_connections: int = pool_connections
+        self.pool_maxsize: int = pool_maxsize
+        self.cache_max_size: int = cache_max_size
+        self.cache_ttl: float = cache_ttl
+        self.compress: bool = compress
+        # The dispatch events the gateway decodes, `None` decodes them all. MESSAGE_CREATE and MESSAGE_UPDATE
+        # are always decoded, commands rely on them.
+        self.events: Optional[tuple] = tuple(events) if events is not None else None
+        # Where the gateway session is saved so a restarted client can resume it, `None` disables it.
+        self.session_file: Optional[str] = session_file
+        # Where the command catalog and user profile are cached between boots, `None` disables it.
+        self.boot_cache_dir: Optional[str] = boot_cache_dir
+        self.boot_cache_refresh_after: float = boot_cache_refresh_after
+        self.boot_cache_max_age: float = boot_cache_max_age
+
+
+class BoundedCache(MutableMapping):
+    """
+    A mapping that holds at most `max_size` entries, each for at most `ttl` seconds.
+
+    Entries are kept in the order they were last written; writing past `max_size`
+    evicts the least recently written one and expired entries are dropped on every write.
+    Reads check the age too, so an expired entry is never returned, even before the next write.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: float = 600) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evictions = 0
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+
+    def __getitem__(self, key: Any) -> Any:
+        written, value = self._data[key]
+        if written < monotonic() - self.ttl:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        now = monotonic()
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (now, value)
+        self.prune(now)
+
+    def __delitem__(self, key: Any) -> None:
+        del self._data[key]
+
+    def __iter__(self) -> Iterator:
+        self.prune()
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        self.prune()
+        return len(self._data)
+
+    def size(self) -> int:
+        """The number of entries held, expired ones that weren't pruned yet included.
+
+        Unlike `len`, it doesn't prune, so other threads can read it without the lock of the cache's owner.
+        """
+        return len(self._data)
+
+    def __contains__(self, key: Any) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] >= monotonic() - self.ttl
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """Evicts the entries past the size limit and the ones older than the TTL."""
+        data = self._data
+        deadline = (now or monotonic()) - self.ttl
+        while data and (len(data) > self.max_size or next(iter(data.values()))[0] < deadline):
+            try:
+                data.popitem(last=False)
+            except KeyError:
+                # Emptied by another thread reading the size meanwhile.
+                break
+            self.evictions += 1
+
+    def latest(self, since: Optional[float] = None) -> Any:
+        """Returns the most recently written value, or `None` if the cache is empty, it expired or it was written before `since`."""
+        entry = next(reversed(self._data.values()), None)
+        if entry is None or entry[0] < monotonic() - self.ttl or (since is not None and entry[0] < since):
+            return None
+        return entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
 
 
 class Cache:
-    def __init__(self) -> None:
+    STRUCTURES = (
+        "nonce_message_map", "interaction_create", "interaction_success",
+        "raw_message_updates", "message_create", "message_updates",
+    )
+    MAX_UPDATES_PER_MESSAGE = 50
+
+    def __init__(self, max_size: int = 1000, ttl: float = 600) -> None:
         """
         Holds relevant websocket message events.
+
+        Every structure holds at most `max_size` entries for at most `ttl` seconds.
         """
-        self.nonce_message_map = {}
-        self.interaction_create = []
-        self.interaction_success = []
-        self.raw_message_updates = []
-        self.message_create = {}
-        self.message_updates = {}
+        self.nonce_message_map = BoundedCache(max_size, ttl)
+        self.interaction_create = BoundedCache(max_size, ttl)
+        self.interaction_success = BoundedCache(max_size, ttl)
+        self.raw_message_updates = BoundedCache(max_size, ttl)
+        self.message_create = BoundedCache(max_size, ttl)
+        self.message_updates = BoundedCache(max_size, ttl)
+
+    @property
+    def evictions(self) -> Dict[str, int]:
+        """The number of entries evicted from each structure."""
+        return {name: getattr(self, name).evictions for name in self.STRUCTURES}
+
+    def store(self, event: str, data: dict) -> None:
+        """Caches the payload of a dispatched gateway event."""
+        if event == "INTERACTION_CREATE":
+            self.interaction_create[data["nonce"]] = data["nonce"]
+        elif event == "INTERACTION_SUCCESS":
+            self.interaction_success[data["nonce"]] = data["nonce"]
+        elif event == "MESSAGE_CREATE":
+            if "nonce" in data:
+                self.message_create[data["nonce"]] = data
+                self.nonce_message_map[data["nonce"]] = data["id"]
+        elif event == "MESSAGE_UPDATE":
+            updates = self.message_updates.get(data["id"], [])
+            updates.append(data)
+            del updates[:-self.MAX_UPDATES_PER_MESSAGE]
+            self.message_updates[data["id"]] = updates
+            self.raw_message_updates[data["id"]] = data
+
+    def latest(self, event: str, since: Optional[float] = None) -> Optional[Union[str, dict]]:
+        """Returns the nonce or the raw message of the last cached `event`, if there is one cached at or after `since`."""
+        if event == "INTERACTION_CREATE":
+            return self.interaction_create.latest(since)
+        if event == "INTERACTION_SUCCESS":
+            return self.interaction_success.latest(since)
+        if event == "MESSAGE_CREATE":
+            return self.message_create.latest(since)
+        if event == "MESSAGE_UPDATE":
+            return self.raw_message_updates.latest(since)
+        return None
 
     def clear(self, nonce):
         if nonce in self.nonce_message_map:
@@ -45,12 +191,12 @@ class Cache:
             if relevant_id in self.message_updates:
                 del self.message_updates[relevant_id]
         if nonce in self.interaction_create:
-            self.interaction_create.remove(nonce)
+            del self.interaction_create[nonce]
         if nonce in self.interaction_success:
-            self.interaction_success.remove(nonce)
+            del self.interaction_success[nonce]
         if nonce in self.message_create:
             del self.message_create[nonce]
-        self.raw_message_updates = []
+        self.raw_message_updates.clear()
 
 
 class Author:
@@ -58,6 +204,8 @@ class Author:
     A class that represents the author of some context.
     """
 
+    __slots__ = ("name", "discriminator", "icon_url", "id")
+
     def __init__(self, data: dict) -> None:
         self.name: Optional[str] = data.get("name", None)
         self.discriminator: Optional[str] = data.get("discriminator", None)
@@ -72,6 +220,8 @@ class ActionRow:
     Represents an ActionRow.
     """
 
+    __slots__ = ("components",)
+
     def __init__(self, data: dict, message_id: Union[str, int]):
         message_id = str(message_id) # type: ignore
         self.components: list[Button | Dropdown] = [
@@ -84,6 +234,8 @@ class DropdownOption:
     Represents a Dropdown Option.
     """
 
+    __slots__ = ("label", "value")
+
     def __init__(self, data: dict) -> None:
         self.label: Optional[str] = data.get("label", None)
         self.value: Optional[str] = data.get("value", None)
@@ -95,6 +247,8 @@ class Dropdown:
     Represents a Dropdown component.
     """
 
+    __slots__ = ("message_id", "type", "custom_id", "options")
+
     def __init__(self, data: dict, message_id: str) -> None:
         self.message_id: str = message_id
         self.type: int = 3
@@ -109,6 +263,8 @@ class Button:
     Represents a button from the Discord Bot UI Kit.
     """
 
+    __slots__ = ("message_id", "type", "emoji", "label", "disabled", "custom_id")
+
     def __init__(self, data: dict, message_id: str) -> None:
         self.message_id: str = message_id
         self.type: int = 2
@@ -123,6 +279,8 @@ class Emoji:
     Represents a custom emoji.
     """
 
+    __slots__ = ("name", "id")
+
     def __init__(self, data: dict) -> None:
         self.name: Optional[str] = data.get("name", None)
         self.id: Optional[int] = data.get("id", None)
@@ -133,6 +291,8 @@ class EmbedFooter:
     Represents an embed footer.
     """
 
+    __slots__ = ("text", "icon_url", "proxy_icon_url")
+
     def __init__(self, data: dict) -> None:
         self.text: Optional[str] = data.get("text", None)
         self.icon_url: Optional[str] = data.get("icon_url", None)
@@ -144,6 +304,8 @@ class Embed:
     Represents a Discord embed.
     """
 
+    __slots__ = ("title", "description", "authorName", "url", "author", "footer")
+
     def __init__(self, data: dict) -> None:
         self.title: str = data.get("title", None)
         self.description: str = data.get("description", None)
@@ -153,32 +315,78 @@ class Embed:
         self.footer: Optional[EmbedFooter] = EmbedFooter(data["footer"]) if "footer" in data else None
 
 
+_UNSET: Any = object()
+
+
 class Message:
     """
     Represents a message from Discord.
+
+    The author, embeds and components are only built from the raw data the first
+    time they are accessed, so checking a message's nonce or channel stays cheap.
     """
 
+    __slots__ = (
+        "data", "content", "nonce", "id", "timestamp", "channel_id",
+        "_author", "_embeds", "_components", "_buttons", "_dropdowns",
+    )
+
     def __init__(self, data: dict) -> None:
+        span = begin(MESSAGE) if HOOKS else None
         self.data: dict = data
-        self.author: Optional[Author] = Author(data["author"]) if "author" in data else None
         self.content: Optional[str] = data.get("content", None)
         self.nonce: Optional[str] = data.get("nonce", None)
         self.id: Optional[int] = int(data.get("id", 0))
         self.timestamp: Optional[str] = data.get("timestamp", None)
         self.channel_id: Optional[int] = int(data.get("channel_id", 0))
-        self.embeds: list[Embed] = [Embed(i) for i in data.get("embeds", [])]
-        self.components: list[ActionRow] = [ActionRow(i, self.id) for i in data.get("components", [])]
-        self.buttons: list[Button] = [
-            item for component in self.components for item in component.components if isinstance(item, Button)
-        ]
-        self.dropdowns: list[Dropdown] = [
-            item for component in self.components for item in component.components if isinstance(item, Dropdown)
-        ]
+        self._author: Optional[Author] = _UNSET
+        self._embeds: list[Embed] = _UNSET
+        self._components: list[ActionRow] = _UNSET
+        self._buttons: list[Button] = _UNSET
+        self._dropdowns: list[Dropdown] = _UNSET
+        if span is not None:
+            span.end()
+
+    @property
+    def author(self) -> Optional[Author]:
+        if self._author is _UNSET:
+            self._author = Author(self.data["author"]) if "author" in self.data else None
+        return self._author
+
+    @property
+    def embeds(self) -> "list[Embed]":
+        if self._embeds is _UNSET:
+            self._embeds = [Embed(i) for i in self.data.get("embeds", [])]
+        return self._embeds
+
+    @property
+    def components(self) -> "list[ActionRow]":
+        if self._components is _UNSET:
+            self._components = [ActionRow(i, self.id) for i in self.data.get("components", [])]
+        return self._components
+
+    @property
+    def buttons(self) -> "list[Button]":
+        if self._buttons is _UNSET:
+            self._buttons = [
+                item for component in self.components for item in component.components if isinstance(item, Button)
+            ]
+        return self._buttons
+
+    @property
+    def dropdowns(self) -> "list[Dropdown]":
+        if self._dropdowns is _UNSET:
+            self._dropdowns = [
+                item for component in self.components for item in component.components if isinstance(item, Dropdown)
+            ]
+        return self._dropdowns
 
 class Bot:
     """
     Represents the bot account.
     """
+
+    __slots__ = ("username", "id", "discriminator", "email", "bot")
     
     def __init__(self, data: dict) -> None:
         self.username: str = data["d"]["user"]["username"]
@@ -187,10 +395,35 @@ class Bot:
         self.email: str = data["d"]["user"]["email"]
         self.bot: str = f"{self.username}#{self.discriminator}"
 
+class BootReport:
+    """
+    How long each phase of booting a client took, in seconds.
+
+    The command and user fetches run while the gateway connects, so the phases overlap and
+    don't add up to `total`. A phase that didn't run, like a fetch served by the boot cache, is `None`.
+    """
+
+    PHASES = ("connect", "hello", "identify", "ready", "commands", "user", "core")
+    __slots__ = PHASES + ("total",)
+
+    def __init__(self) -> None:
+        for phase in self.__slots__:
+            setattr(self, phase, None)
+
+    def as_dict(self) -> Dict[str, Optional[float]]:
+        return {phase: getattr(self, phase) for phase in self.__slots__}
+
+    def __repr__(self) -> str:
+        phases = " ".join(f"{phase}={value:.3f}" for phase, value in self.as_dict().items() if value is not None)
+        return f"<BootReport {phases}>"
+
+
 class CommandResult:
     """
     Represents a class that has the result of running a certain command.
     """
+
+    __slots__ = ("success", "death", "gain", "loss", "cooldown")
     
     def __init__(self, success: bool, death: bool = False, gain: dict = {}, loss: dict = {}, cooldown: int = None) -> None:
         self.success: Optional[bool] = success
@@ -204,172 +437,126 @@ class CommandResult:
 class Parser:
     """
     Extracts crucial data from the result of a command, such as coins, gain, loss anad deaths.
+
+    Every pattern is compiled once, and each description is scanned in a single pass:
+    the bold parts of a description are matched by one pattern that tells coins, items and plain text apart.
     """
+
+    # A bold part of a description: `**⏣ 1,337**`, `**1x <:Padlock:id> Padlock**`, `**<:Cookie:id> Cookie**` or `**Tax Evasion**`.
+    _BOLD = re_compile(r"\*\*(?:⏣ (?P<coins>[0-9,]+)|(?:(?P<amount>[0-9]+)x )?<a?:\w+:[0-9]+> (?P<item>[^*]+)|(?P<text>[^*]+))\*\*")
+    # A line of the postmemes rewards: `- ⏣ 16,384` or `<:Reply:id> **1x** <:Laptop:id> **Laptop**`.
+    _RECEIVED = re_compile(r"⏣ (?P<coins>[0-9,]+)|(?P<amount>[0-9]+)x\**\s*<a?:\w+:[0-9]+>\s*\**(?P<item>[^*\n]+)")
+    _TIMESTAMP = re_compile(r"<t:([0-9]+)")
+
+    def _bold(description: str):
+        """Returns the coins, the items and the plain texts in the bold parts of a description."""
+        coins = None
+        items = []
+        texts = []
+        for match in Parser._BOLD.finditer(description):
+            coins_, amount, item, text = match.groups()
+            if coins_ is not None:
+                if coins is None:
+                    coins = int(coins_.replace(",", ""))
+            elif item is not None:
+                items.append({int(amount) if amount else 1: item})
+            else:
+                texts.append(text)
+        return coins, items, texts
+
+    @profiled("parser.beg")
     def beg(description: str):
         """
         Parses crucial information from the descriptions of the beg command.
         """
-        gain_regex = ["\*\*⏣ [0-9]+\*\*", "[0-9]+", "\*\*(.*?)\*\*", "<(.*?)\>"]
-        temp_desc = description.replace(",", "")
-        death = None
-        success = True
+        coins, items, _ = Parser._bold(description)
         gain = {}
-        gained_coins = None
-        gained_item = None
-        try:
-            gained_coins = int(findall(gain_regex[1], findall(gain_regex[0], temp_desc)[0])[0])
-        except:
-            pass
-        try:
-            if not gained_coins:
-                gained_item = findall(gain_regex[2], temp_desc)[0]
-                tempstring = "<" + findall(gain_regex[3], gained_item)[0] + "> "
-                item = item.replace(tempstring, "")
-            else:
-                gained_item = findall(gain_regex[2], temp_desc)[1]
-                tempstring = "<" + findall(gain_regex[3], gained_item)[0] + "> "
-                gained_item = gained_item.replace(tempstring, "")
-        except:
-            pass
-        if gained_coins:
-            gain["coins"] = gained_coins
-        if gained_item:
-            gain["items"] = [{1: gained_item}]
-        success = not gained_coins is None or not gained_item is None
-        return CommandResult(success, death, gain)
-    
+        if coins:
+            gain["coins"] = coins
+        if items:
+            gain["items"] = items[:1]
+        return CommandResult(coins is not None or bool(items), None, gain)
+
+    @profiled("parser.search")
     def search(description: str):
         """
         Parses crucial information from the descriptions of the search command.
         """
-        gain_regex = ["\*\*⏣ [0-9]+\*\*", "[0-9]+"]
+        coins, items, _ = Parser._bold(description)
         gain = {}
-        temp_desc = description.replace(",", "")
-        item_amount = None
-        item = None
-        try:
-            item_amount = int(findall("\*\*[0-9]+x", temp_desc)[0].replace("**", "").replace("x", ""))
-            item = " ".join(findall("\*\*[0-9]+x .+\*\*", temp_desc)[0].replace("**", "").split(" ")[2:])
-        except:
-            pass
-        death = None
-        success = True
-        gained_coins = None
-        try:
-            gained_coins = int(findall(gain_regex[1], findall(gain_regex[0], temp_desc)[0])[0])
-        except:
-            success = False
-        if gained_coins:
-             gain["coins"] = gained_coins
-        if item_amount:
-            gain["items"] = [{item_amount: item}]
-        return CommandResult(success, death, gain)
+        if coins:
+            gain["coins"] = coins
+        if items:
+            gain["items"] = items[:1]
+        return CommandResult(coins is not None, None, gain)
 
+    @profiled("parser.common1")
     def common1(description: str):
         """
         Parses crucial information from the descriptions of the fish, hunt and dig commands.
         """
-        temp_desc = description.replace(",", "")
-        gain_regex = ["\*\*.*\*"]
-        gained_items = None
-        success = True
-        death = None
+        _, items, texts = Parser._bold(description)
         gain = {}
-        try:
-            gained_items =  " ".join(findall(gain_regex[0], temp_desc)[0].replace("**", "").split(" ")[1:])
-        except:
-            success = False
-        if gained_items:
-            gain["items"] = [{1: gained_items}]
-        return CommandResult(success, death, gain)
-        
+        if items:
+            gain["items"] = [{1: next(iter(items[0].values()))}]
+        elif texts:
+            gain["items"] = [{1: texts[0]}]
+        return CommandResult(bool(gain), None, gain)
+
+    @profiled("parser.crime")
     def crime(description: str):
         """
         Parses crucial information from the descriptions of the crime command.
         """
-        gain_regex = ["\*\*⏣ [0-9]+\*\*", "[0-9]+", "<(.*?)\>", "\*\*(.*?)\*\*"]
+        coins, items, _ = Parser._bold(description)
         gain = {}
-        temp_desc = description.replace(",", "")
-        item = None
-        death = None
-        success = False
-        gained_coins = None
-        try:
-            gained_coins = int(findall(gain_regex[1], findall(gain_regex[0], temp_desc)[0])[0])
-        except:
-            pass
-        try:
-            if not gained_coins:
-                item = findall(gain_regex[3], temp_desc)[0]
-                tempstring = "<" + findall(gain_regex[2], item)[0] + "> "
-                item = item.replace(tempstring, "")
-            else:
-                item = findall(gain_regex[3], temp_desc)[1]
-                tempstring = "<" + findall(gain_regex[2], item)[0] + "> "
-                item = item.replace(tempstring, "")
-        except:
-            pass
-        if gained_coins:
-             gain["coins"] = gained_coins
-        if item:
-            gain["items"] = [{1: item}]
-        success = not gained_coins is None or not item is None
-        return CommandResult(success, death, gain)
-    
+        if coins:
+            gain["coins"] = coins
+        if items:
+            gain["items"] = items[:1]
+        return CommandResult(coins is not None or bool(items), None, gain)
+
+    @profiled("parser.postmemes")
     def postmemes(description: str):
         """
         Parses crucial information from the descriptions of the postmemes command.
         """
-        parsed = description.replace(",", "").split("\n")[3:]
-        try:
-            index = parsed.index("**You Received:**")
-            parsed = parsed[index:]
-        except ValueError:
-            pass
+        index = description.find("**You Received")
+        if index == -1:
+            return CommandResult(False, None, {})
         gain = {}
-        success = True
-        death = None
-        gain_regex = ["[0-9]+", "[0-9]+x"]
-        if "**You Received" in description:
-            for i in parsed:
-                if "⏣" in i:
-                    gain["coins"] = int(findall(gain_regex[0], i)[0])
-                elif "<:" in i:
-                    if not "items" in gain.keys():
-                        gain["items"] = []
-                    amount = int(findall(gain_regex[1], i)[0].replace('x', ''))
-                    item = " ".join(i.split(" ")[5:])
-                    gain["items"].append({amount: item})
-        else:
-            success = False
-        return CommandResult(success, death, gain)
-    
-    def cooldown(description: str):
+        for match in Parser._RECEIVED.finditer(description, index):
+            coins, amount, item = match.groups()
+            if coins is not None:
+                gain["coins"] = int(coins.replace(",", ""))
+            else:
+                gain.setdefault("items", []).append({int(amount): item.strip()})
+        return CommandResult(True, None, gain)
+
+    @profiled("parser.cooldown")
+    def cooldown(description: str, sent_at: Optional[datetime] = None):
         """
         Parses crucial information from the descriptions of the cooldown indicator.
+
+        The cooldown is counted from `sent_at`, the aware time the message was sent at, or from now.
         """
-        cooldown_regex = ["<(.*?)\>", "(\d+)"]
-        time = datetime.fromtimestamp(int(findall(cooldown_regex[1], findall(cooldown_regex[0], description)[0])[0]))
-        difference = (time - datetime.now()).total_seconds()
+        time = datetime.fromtimestamp(int(Parser._TIMESTAMP.search(description).group(1)), timezone.utc) # type: ignore
+        difference = (time - (sent_at or datetime.now(timezone.utc))).total_seconds()
         return CommandResult(False, None, {}, cooldown=difference)
-    
+
     def check_cooldown(description: str):
         """
         Checks if the returned embed is a cooldown message.
         """
-        try:
-            if "seconds" in description and "command" in description and "cooldown is" in description and "seconds" in description:
-                return True
-            else:
-                return False
-        except:
-            return False
-        
+        return bool(description) and "cooldown is" in description and "seconds" in description and "command" in description
+
 class User:
     """
     Represents a class that has the data of a user.
     """
 
+    __slots__ = ("id", "discriminator", "name", "bio", "phone", "email", "verified")
+
     def __init__(self, data: dict) -> None:
         self.id: Optional[int] = int(data.get("id", 0))
         self.discriminator: Optional[int] = int(data.get("discriminator", 0))
@@ -0,0 +1,4 @@
+from .api import AsyncAPI
+from .client import AsyncClient
+from .core import AsyncCore
+from .gateway import AsyncGateway
@@ -0,0 +1,279 @@
+import asyncio
+
+from typing import Any, List, Optional, Tuple, Union
+from time import perf_counter, time
+
+from ..api import API
+from ..exceptions import InvalidFormBody
+from ..hooks import HOOKS, REST, begin
+from ..Objects import Message, Button, Dropdown
+from ..metrics import COMMAND_LATENCY, REST_REQUESTS, RETRIES
+from ..ratelimit import INTERACTIONS
+
+API_URL = "https://discord.com/api/v9"
+
+
+class AsyncAPI(API):
+    """The asyncio counterpart of `API`, sharing its payload builders."""
+
+    def _get_command_info(self, name: str) -> dict:
+        """Retuns information about a given command.
+
+        Parameters
+        --------
+        name: str
+            The name of the command.
+
+        Returns
+        --------
+        information: dict
+        """
+        if self.resource_intensivity == "MEM": # type: ignore
+            return self.commands_data.get(name, {}) # type: ignore
+        return self.command_store.get(name) # type: ignore
+
+    async def _reserve(self, route: str) -> float:
+        """Sleeps until a request on `route` is reserved, returns how many seconds it waited."""
+        waited = 0.0
+        delay = self.rate_limiter.reserve(route) # type: ignore
+        while delay > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = self.rate_limiter.reserve(route) # type: ignore
+        return waited
+
+    async def _post_interaction(self, data: bytes):
+        """Posts an interaction payload once the rate limiter lets it through, see `API._post_interaction`."""
+        waited = await self._reserve(INTERACTIONS)
+        span = begin(REST, INTERACTIONS) if HOOKS else None
+        try:
+            async with self.session.post(f"{API_URL}/interactions", data=data) as response: # type: ignore
+                try:
+                    response_data = await response.json(content_type=None)
+                except ValueError:
+                    response_data = None
+        finally:
+            if span is not None:
+                span.end()
+        response_data = response_data if isinstance(response_data, dict) else {}
+        self.rate_limiter.update(INTERACTIONS, response.status, response.headers, response_data) # type: ignore
+        REST_REQUESTS.inc(INTERACTIONS, str(response.status))
+        return response.status, response_data, waited
+
+    async def _get(self, route: str, url: str, attempts: int = 3) -> Tuple[int, Any]: # type: ignore
+        """Sends a GET request once the rate limiter lets it through, see `API._get`.
+
+        Returns
+        --------
+        response: tuple[`int`, Any]
+            The status of the last response and its JSON body, `None` if it has none.
+        """
+        for i in range(attempts):
+            if i:
+                RETRIES.inc(route)
+            await self._reserve(route)
+            span = begin(REST, route) if HOOKS else None
+            try:
+                async with self.session.get(url) as response: # type: ignore
+                    try:
+                        data = await response.json(content_type=None)
+                    except ValueError:
+                        data = None
+            finally:
+                if span is not None:
+                    span.end()
+            REST_REQUESTS.inc(route, str(response.status))
+            self.rate_limiter.update(route, response.status, response.headers, data) # type: ignore
+            if response.status != 429:
+                break
+        return response.status, data
+
+    async def _invoke(self, path: Tuple[str, ...], retry_attempts: int, timeout: int, kwargs: dict) -> Optional[Message]: # type: ignore
+        """Runs a command path and waits for the message carrying its nonce, see `API._invoke`."""
+        nonce = self._create_nonce()
+        data = self._command_payload(nonce, path, kwargs)
+        retry_attempts = retry_attempts if retry_attempts > 0 else 1
+        pending = self.gateway.expect_interaction(nonce) # type: ignore
+        try:
+            start = perf_counter()
+            for i in range(retry_attempts):
+                if i:
+                    RETRIES.inc(INTERACTIONS)
+                status, response_data, _ = await self._post_interaction(data)
+                # The rate limiter holds the retry back until the bucket resets.
+                if status == 429:
+                    continue
+                _errors: dict = response_data.get("errors", {}).get("data", {}).get("values", {}).get("0", {}).get("_errors", {})
+                if _errors.get("message"):
+                    raise InvalidFormBody(_errors.get("message"))
+                try:
+                    message = await asyncio.wait_for(pending, timeout)
+                except asyncio.TimeoutError:
+                    return None
+                COMMAND_LATENCY.observe(perf_counter() - start, path[0])
+                return message
+        finally:
+            self.gateway.forget_interaction(nonce) # type: ignore
+
+        return None
+
+    async def _post_component(self, data: bytes, retry_attempts: int, timeout: int) -> bool:
+        """Posts a component interaction payload until Discord accepts it, see `API._post_component`."""
+        retry_attempts = retry_attempts if retry_attempts > 0 else 1
+        end = time() + timeout
+        for i in range(retry_attempts):
+            if time() > end:
+                return False
+            if i:
+                RETRIES.inc(INTERACTIONS)
+            status, response_data, waited = await self._post_interaction(data)
+            end += waited
+            _errors: dict = response_data.get("errors", {}).get("data", {}).get("values", {}).get("0", {}).get("_errors", {})
+            if _errors.get("message"):
+                raise InvalidFormBody(_errors.get("message"))
+            if status == 204:
+                return True
+        return False
+
+    async def send_components(self, *components: Union[Button, Tuple[Dropdown, list]], retry_attempts: int = 10, timeout: int = 10) -> List[bool]: # type: ignore
+        """Clicks buttons and selects dropdown options in order, without waiting for Dank Memer in between, see `API.send_components`."""
+        pending: List[Tuple[str, Optional[asyncio.Future]]] = []
+        try:
+            for component in components:
+                nonce = self._create_nonce()
+                if isinstance(component, Button):
+                    data = self._click_payload(nonce, component)
+                else:
+                    data = self._select_payload(nonce, *component)
+                future = self.gateway.expect_component(nonce) # type: ignore
+                pending.append((nonce, future))
+                if not await self._post_component(data, retry_attempts, timeout):
+                    pending[-1] = (nonce, None)
+                    break
+
+            end = time() + timeout
+            confirms = self.gateway.confirms_components # type: ignore
+            results = []
+            for nonce, future in pending:
+                if future is None or not confirms:
+                    results.append(future is not None)
+                    continue
+                try:
+                    results.append(await asyncio.wait_for(future, max(0.0, end - time())) is True)
+                except asyncio.TimeoutError:
+                    results.append(False)
+            return results + [False] * (len(components) - len(results))
+        finally:
+            for nonce, future in pending:
+                self.gateway.forget_component(nonce) # type: ignore
+
+    async def _update_from_components(self, check, *components: Union[Button, Tuple[Dropdown, list]], timeout: int = 10) -> Optional[Message]:
+        """Sends component interactions and returns the MESSAGE_UPDATE they lead to, see `API._update_from_components`."""
+        update = self.gateway.expect("MESSAGE_UPDATE", check) # type: ignore
+        try:
+            if not all(await self.send_components(*components, timeout=timeout)):
+                return None
+            try:
+                return await asyncio.wait_for(update, timeout)
+            except asyncio.TimeoutError:
+                return None
+        finally:
+            self.gateway.forget("MESSAGE_UPDATE", update) # type: ignore
+
+    async def run_command(self, name: str, retry_attempts: int = 3, timeout: int = 10, **kwargs) -> Optional[Message]: # type: ignore
+        """Runs a slash command.
+        Parameters
+        --------
+        name: str
+            The command name.
+        retry_attempts: int = 3
+            The amount of times to retry on failure.
+        timeout: int = 10
+            Duration before it times out.
+        kwargs: **kwargs
+        Returns
+        --------
+        message: Optional[`Message`]
+        """
+        return await self._invoke((name,), retry_attempts, timeout, kwargs)
+
+    async def run_sub_command(self, name: str, sub_name: str, retry_attempts: int = 3, timeout: int = 10, **kwargs) -> Optional[Message]: # type: ignore
+        """Runs a slash sub command.
+        Parameters
+        --------
+        name: str
+            The command name.
+        sub_name: str
+            The sub command name.
+        retry_attempts: int = 3
+            The amount of times to retry on failure.
+        timeout: int = 10
+            Duration before it times out.
+        Returns
+        --------
+        message: Optional[`Message`]
+        """
+        return await self._invoke((name, sub_name), retry_attempts, timeout, kwargs)
+
+    async def run_slash_group_command(self, name: str, sub_name: str, sub_group_name: str, retry_attempts: int = 3, timeout: int = 10, **kwargs) -> Optional[Message]: # type: ignore
+        """Runs a slash group command.
+        Parameters
+        --------
+        name: str
+            The command name.
+        sub_name: str
+            The sub command name.
+        sub_group_name: str
+            The sub group command name.
+        retry_attempts: int = 3
+            The amount of times to retry on failure.
+        timeout: int = 10
+            Duration before it times out.
+        Returns
+        --------
+        message: Optional[`Message`]
+        """
+        return await self._invoke((name, sub_name, sub_group_name), retry_attempts, timeout, kwargs)
+
+    async def click(self, button: Button, retry_attempts: int = 10, timeout: int = 10) -> bool: # type: ignore
+        """Clicks a button.
+
+        Parameters
+        --------
+        button: Button
+            The button to click.
+        retry_attempts: int = 10
+            The amount of times to retry on failure.
+        timeout: int = 10
+            Duration before it times out.
+        Returns
+        --------
+        success_state: bool
+            Whether the button was clicked successfully or not.
+        """
+        return (await self.send_components(button, retry_attempts=retry_attempts, timeout=timeout))[0]
+
+    async def select(self, dropdown: Dropdown, options: list, retry_attempts: int = 10, timeout: int = 10) -> bool: # type: ignore
+        """Selects an option from a dropdown.
+
+        Parameters
+        --------
+        dropdown: Dropdown
+            The dropdown to choose from.
+        options: list
+            A list of options to use in the API request for the dropdown to be chosen from.
+        retry_attempts: int = 10
+            The amount of times to retry on failure.
+        timeout: int = 10
+            Duration before it times out.
+
+        Returns
+        -------
+        success_state: bool
+            Whether the option was chosen successfully or not.
+        """
+        return (await self.send_components((dropdown, options), retry_attempts=retry_attempts, timeout=timeout))[0]
+
+    async def wait_for(self, event: str, check=None, timeout: float = 10, since: Optional[float] = None): # type: ignore
+        """Waits for a WebSocket event to be dispatched, see `Client.wait_for`."""
+        return await self.gateway.wait_for(event, check, timeout, since) # type: ignore
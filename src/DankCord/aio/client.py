@@ -0,0 +1,201 @@
+import asyncio, time
+import aiohttp
+
+from typing import Any, Awaitable, Callable, List, Optional
+from pyloggor import pyloggor
+
+from ..boot import BootCacheMixin
+from ..commands import CommandIndex
+from ..exceptions import DankCordException, DataAccessFailure, MissingPermissions, NoCommands, UnknownChannel
+from ..Objects import BootReport, Config, User
+from ..ratelimit import COMMANDS_ROUTE, USER_ROUTE, RateLimiter
+from ..storage import BootCache, CommandStore, command_store_path
+from .gateway import AsyncGateway
+from .core import AsyncCore
+from .api import AsyncAPI, API_URL
+
+
+class AsyncClient(BootCacheMixin, AsyncAPI):
+    """The asyncio counterpart of `Client`.
+
+    Nothing is connected until `start` is awaited, the client can also be used as an async context manager:
+
+        async with AsyncClient(Config("TOKEN", 00000000000), logger) as bot:
+            results = await asyncio.gather(bot.core.search(), bot.core.crime(), bot.core.postmemes())
+    """
+
+    def __init__(self, config: Config, logger: pyloggor):
+        self.config = config
+        self.token = config.token
+        self.logger = logger
+
+        self.channel_id: str = str(config.channel_id)
+        self.dm_mode = config.dm_mode
+
+        self.resource_intensivity = config.resource_intensivity
+        self.commands_data = {}
+        self.guild_id: Optional[int] = None
+        self.rate_limiter = RateLimiter()
+        self.boot_cache: Optional[BootCache] = BootCache(
+            config.boot_cache_dir, config.boot_cache_refresh_after, config.boot_cache_max_age
+        ) if config.boot_cache_dir else None
+
+        # Set by `start`, `close` only closes what was opened.
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.gateway: Optional[AsyncGateway] = None
+        self.command_store: Optional[CommandStore] = None
+        self._boot_tasks: List[asyncio.Task] = []
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "AsyncClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Connects to the gateway and fetches the commands and user data, the fetches run while the gateway connects.
+
+        If booting fails, whatever was opened is closed before the exception is raised.
+        """
+        try:
+            await self._start()
+        except BaseException:
+            await self.close()
+            raise
+
+    async def _start(self) -> None:
+        __boot_start = time.perf_counter()
+        self.logger.log(level="Info", msg="Booting up DankCord client.")
+        self.boot_report = BootReport()
+        self.session = aiohttp.ClientSession(
+            headers={"Authorization": self.token, "Content-type": "application/json"},
+            connector=aiohttp.TCPConnector(limit=self.config.pool_maxsize),
+        )
+
+        cached_commands, cached_user = self._read_boot_cache()
+        commands_task = asyncio.create_task(self._timed("commands", self._fetch_commands())) if cached_commands is None else None
+        user_task = asyncio.create_task(self._timed("user", self._fetch_info())) if cached_user is None else None
+        self._boot_tasks = [task for task in (commands_task, user_task) if task is not None]
+
+        self.gateway = AsyncGateway(self.config, self.logger, self.session)
+        if not await self.gateway.connect():
+            raise ConnectionError("Failed to connect to gateway.")
+        for phase, duration in self.gateway.timings.items():
+            setattr(self.boot_report, phase, duration)
+
+        self.ws = self.gateway.ws
+        self._sync_channel_index()
+
+        if not self.dm_mode:
+            self.guild_id = self.gateway.guild_id
+        self.command_index = CommandIndex(self.guild_id, self.channel_id)
+        self.command_store = CommandStore(command_store_path(self.channel_id)) if self.resource_intensivity == "DISK" else None
+
+        stale = []
+        if commands_task is not None:
+            self._save_commands(await commands_task)
+        else:
+            self.logger.log(level="Debug", msg="Loaded commands from the boot cache.")
+            self._store_commands(cached_commands[0]) # type: ignore
+            if cached_commands[1]: # type: ignore
+                stale.append(self._get_commands)
+
+        if user_task is not None:
+            self._save_info(await user_task)
+        else:
+            self.logger.log(level="Debug", msg="Loaded user info from the boot cache.")
+            self.user = User(cached_user[0]) # type: ignore
+            if cached_user[1]: # type: ignore
+                stale.append(self._get_info)
+
+        start = time.perf_counter()
+        self.core = AsyncCore(
+            self.config, self.commands_data, self.guild_id, self.logger, self.gateway, self.session,
+            self.command_index, self.command_store, self.rate_limiter,
+        )
+        self.boot_report.core = time.perf_counter() - start
+        if stale:
+            self._refresh_task = asyncio.create_task(self._refresh_boot_cache(stale))
+
+        self.boot_report.total = time.perf_counter() - __boot_start
+        self.logger.log(
+            level="Info", msg=f"Fully booted up, it took total {round(self.boot_report.total, 3)} seconds."
+        )
+        self.logger.log(level="Debug", msg=f"Boot phases: {self.boot_report!r}.")
+
+    async def _timed(self, phase: str, coroutine: Awaitable[Any]) -> Any:
+        """Awaits `coroutine`, recording how long it took as `phase` of the boot report."""
+        start = time.perf_counter()
+        try:
+            return await coroutine
+        finally:
+            setattr(self.boot_report, phase, time.perf_counter() - start)
+
+    async def close(self) -> None:
+        """Closes the gateway connection and the HTTP session."""
+        for task in self._boot_tasks + [self._refresh_task]:
+            if task is not None:
+                task.cancel()
+        self._boot_tasks, self._refresh_task = [], None
+        if self.gateway is not None:
+            await self.gateway.close()
+        if self.session is not None:
+            await self.session.close()
+        if self.command_store is not None:
+            self.command_store.close()
+
+    @property
+    def latency(self) -> float:
+        """The gateway latency, see `Client.latency`."""
+        return self.gateway.latency
+
+    async def _get_commands(self, channel_id: Optional[str] = None) -> None:
+        """Gets all slash command data in a channel, see `Client._get_commands`."""
+        self._save_commands(await self._fetch_commands(channel_id), channel_id)
+
+    async def _fetch_commands(self, channel_id: Optional[str] = None) -> dict:
+        """Fetches all slash command data in a channel, keyed by command name."""
+        channel_id = channel_id or self.channel_id
+        _, data = await self._get(
+            COMMANDS_ROUTE, f"{API_URL}/channels/{channel_id}/application-commands/search?type=1&application_id=270904126974590976"
+        )
+        data = data if isinstance(data, dict) else {}
+
+        if data.get("code") == 10003:
+            raise UnknownChannel("Bot doesn't have access to this channel.")
+        if data.get("code") == 50013:
+            raise MissingPermissions("Bot cannot view the channel or read it's content.")
+
+        if "application_commands" not in data:
+            raise NoCommands("No commands found.")
+
+        return {command_data["name"]: command_data for command_data in data["application_commands"]}
+
+    async def _refresh_boot_cache(self, fetches: List[Callable[[], Awaitable[None]]]) -> None:
+        """Runs the fetches of stale boot cache entries, keeping the cached data if one fails."""
+        for fetch in fetches:
+            try:
+                await fetch()
+            except (Exception, DankCordException) as e:
+                self.logger.log(level="Warning", msg=f"Failed to refresh the boot cache: {e!r}.")
+        self.core.commands_data = self.commands_data
+        self.logger.log(level="Debug", msg="Refreshed the boot cache.")
+
+    async def _get_info(self) -> None:
+        """Saves information about the bot user account.
+
+        Raises
+        -------
+        DataAccessFailure
+            Failed to get user info.
+        """
+        self._save_info(await self._fetch_info())
+
+    async def _fetch_info(self) -> dict:
+        """Fetches information about the bot user account."""
+        status, data = await self._get(USER_ROUTE, f"{API_URL}/users/@me")
+        if status != 200:
+            raise DataAccessFailure("Failed to get user info.")
+        return data
@@ -0,0 +1,123 @@
+import aiohttp
+
+from typing import Optional, Literal
+from pyloggor import pyloggor
+from random import randint
+
+from ..commands import CommandIndex
+from ..ratelimit import RateLimiter
+from ..storage import CommandStore
+from ..Objects import CommandResult, Config, Message, Parser
+from .gateway import AsyncGateway
+from .api import AsyncAPI
+
+
+class AsyncCore(AsyncAPI):
+    """The asyncio counterpart of `Core`, every command is a coroutine so many flows can share one event loop."""
+
+    def __init__(self,
+        /,
+        config: Config,
+        commands_data: dict,
+        guild_id : Optional[int],
+        logger: pyloggor,
+        gateway: AsyncGateway,
+        session: aiohttp.ClientSession,
+        command_index: Optional[CommandIndex] = None,
+        command_store: Optional[CommandStore] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        self.token = config.token
+        self.channel_id = config.channel_id
+        self.dm_mode = config.dm_mode
+        self.resource_intensivity = config.resource_intensivity
+        self.commands_data = commands_data
+        self.guild_id = guild_id
+        self.logger = logger
+        self.gateway = gateway
+        self.session = session
+        self.command_index = command_index if command_index is not None else CommandIndex(guild_id, self.channel_id)
+        if command_store is None and self.resource_intensivity == "DISK":
+            # The store is the client's, it's closed with the client and never opened twice.
+            raise ValueError("The DISK resource intensivity needs the command store of the client.")
+        self.command_store = command_store
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+
+    # Raw commands
+    async def fish(self, retry_attempts:int = 3, timeout:int = 10):
+        """Runs the `fish` command, see `Core.fish`."""
+        cmd : Message = await self.run_command("fish", retry_attempts, timeout)
+        if Parser.check_cooldown(cmd.embeds[0].description):
+            return Parser.cooldown(cmd.embeds[0].description)
+        return Parser.common1(cmd.embeds[0].description)
+
+    async def hunt(self, retry_attempts:int = 3, timeout:int = 10):
+        """Runs the `hunt` command, see `Core.hunt`."""
+        cmd : Message = await self.run_command("hunt", retry_attempts, timeout)
+        if Parser.check_cooldown(cmd.embeds[0].description):
+            return Parser.cooldown(cmd.embeds[0].description)
+        return Parser.common1(cmd.embeds[0].description)
+
+    async def dig(self, retry_attempts:int = 3, timeout:int = 10):
+        """Runs the `dig` command, see `Core.dig`."""
+        cmd : Message = await self.run_command("dig", retry_attempts, timeout)
+        if Parser.check_cooldown(cmd.embeds[0].description):
+            return Parser.cooldown(cmd.embeds[0].description)
+        return Parser.common1(cmd.embeds[0].description)
+
+    async def beg(self, retry_attempts:int = 3, timeout:int = 10):
+        """Runs the `beg` command, see `Core.beg`."""
+        cmd : Message = await self.run_command("beg", retry_attempts, timeout)
+        if Parser.check_cooldown(cmd.embeds[0].description):
+            return Parser.cooldown(cmd.embeds[0].description)
+        return Parser.beg(cmd.embeds[0].description)
+
+    # Button commands
+    async def search(self, retry_attempts:int = 3, timeout:int = 10, location_index:Literal[1, 2, 3, "random"] = 2):
+        """Runs the `search` command, see `Core.search`."""
+        _location = location_index if location_index in [1, 2, 3] else randint(1, 3)
+        cmd : Message = await self.run_command("search", retry_attempts, timeout)
+        if Parser.check_cooldown(cmd.embeds[0].description):
+            return Parser.cooldown(cmd.embeds[0].description)
+        def check(message):
+            return message.id == cmd.id and "searched" in message.embeds[0].authorName
+        cmd = await self._update_from_components(check, cmd.buttons[_location - 1], timeout=timeout)
+        if cmd is None:
+            return CommandResult(False)
+        return Parser.search(cmd.embeds[0].description)
+
+    async def crime(self, retry_attempts: int = 3, timeout:int = 10, location_index:Literal[1, 2, 3, "random"] = 2):
+        """Runs the `crime` command, see `Core.crime`."""
+        _location = location_index if location_index in [1, 2, 3] else randint(1, 3)
+        cmd : Message = await self.run_command("crime", retry_attempts, timeout)
+        if Parser.check_cooldown(cmd.embeds[0].description):
+            return Parser.cooldown(cmd.embeds[0].description)
+        def check(message):
+            return message.id == cmd.id and "committed" in message.embeds[0].authorName
+        cmd = await self._update_from_components(check, cmd.buttons[_location - 1], timeout=timeout)
+        if cmd is None:
+            return CommandResult(False)
+        return Parser.crime(cmd.embeds[0].description)
+
+    async def postmemes(self, retry_attempts: int = 3, timeout:int = 10, platform:Literal["discord", "reddit", "twitter", "facebook", "random"] = "random", type:Literal["fresh", "repost", "intellectual", "copypasta", "kind", "random"] = "random"):
+        """Runs the `postmemes` command, see `Core.postmemes`."""
+        platforms = ["discord", "reddit", "twitter", "facebook"]
+        types = ["fresh", "repost", "intellectual", "copypasta", "kind"]
+        _platform = platforms.index(platform.lower()) if platform.lower() in platforms else randint(0, 3)
+        _type = types.index(type.lower()) if type.lower() in types else randint(0, 4)
+        cmd : Message = await self.run_command("postmemes", retry_attempts, timeout)
+        if Parser.check_cooldown(cmd.embeds[0].description):
+            return Parser.cooldown(cmd.embeds[0].description)
+        def check(message):
+            description = message.embeds[0].description
+            return message.id == cmd.id and ("**You" in description or "No one" in description or "Do you even" in description or "your meme" in description.lower())
+        cmd = await self._update_from_components(
+            check,
+            (cmd.dropdowns[0], [cmd.dropdowns[0].options[_platform].value]),
+            (cmd.dropdowns[1], [cmd.dropdowns[1].options[_type].value]),
+            cmd.buttons[0],
+            timeout=timeout,
+        )
+        if cmd is None:
+            return CommandResult(False)
+        return Parser.postmemes(cmd.embeds[0].description)
@@ -0,0 +1,498 @@
+import asyncio, random, time, orjson
+import aiohttp
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pyloggor import pyloggor
+
+from ..exceptions import InvalidToken
+from ..hooks import DECODE, DISPATCH, HOOKS, RECEIVE, WAIT_FOR, begin
+from ..metrics import GATEWAY_EVENTS, WAIT_FOR_DURATION, track_gateway
+from ..gateway import (
+    DECODE_ERRORS, FATAL_CLOSE_CODES, GATEWAY_URL, Backoff, BaseGateway, ChannelIndex, FrameDecoder, GatewayInternal, GatewayState, SessionCheckpoint, ZlibInflator,
+    gateway_events, gateway_url,
+)
+from ..Objects import Cache, Config, Message
+
+
+class AsyncGateway(BaseGateway):
+    """The asyncio counterpart of `Gateway`, every waiter is a future on the running event loop."""
+
+    def __init__(self, config: Config, logger: pyloggor, session: aiohttp.ClientSession) -> None:
+        logger.log(level="Debug", msg="Booting up gateway instance.")
+        self.token = config.token
+        self.logger = logger
+        self.session = session
+
+        self.channel_id = config.channel_id
+        self.dm_mode = config.dm_mode
+        self.compress = config.compress
+        self.events = gateway_events(config.events, self.EVENTS)
+
+        self.session_id: Optional[str] = None
+        self.user_id: Optional[int] = None
+        self.guild_id: Optional[int] = None
+        self.channels: ChannelIndex = ChannelIndex()
+
+        self.internal: GatewayInternal = GatewayInternal()
+        self.cache: Cache = Cache(config.cache_max_size, config.cache_ttl)
+        self.inflator: Optional[ZlibInflator] = ZlibInflator() if self.compress else None
+        self.decoder: FrameDecoder = FrameDecoder(self._decoded_events())
+
+        self._waiters: Dict[str, List[Tuple[Callable[..., bool], asyncio.Future]]] = {event: [] for event in self.events}
+        self.pending_interactions: Dict[str, asyncio.Future] = {}
+        self.pending_components: Dict[str, asyncio.Future] = {}
+        track_gateway(self)
+        self._tasks: List[asyncio.Task] = []
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._ready = asyncio.Event()
+        self.state: str = GatewayState.CONNECTING
+        self.backoff: Backoff = Backoff()
+        self.timings: Dict[str, float] = {}
+        self._phase_start = 0.0
+        self.checkpoint: Optional[SessionCheckpoint] = SessionCheckpoint(config.session_file) if config.session_file else None
+        self.close_code: Optional[int] = None
+        self._resume_attempts = 0
+        self._resuming_since: Optional[float] = None
+
+    async def connect(self) -> bool:
+        """Connects to the gateway, identifies and starts the heartbeat and listener tasks.
+
+        A session saved in the checkpoint is resumed instead, if there is one.
+        """
+        start = time.perf_counter()
+        saved_session = self.checkpoint.load() if self.checkpoint is not None else None
+        if await self._resume_checkpoint(saved_session):
+            resumed = self.session_id == saved_session["session_id"] # type: ignore
+            self.logger.log(
+                level="Info",
+                msg=f"{'Resumed the saved gateway session' if resumed else 'Connected to gateway'} in {round(time.perf_counter() - start, 3)} seconds.",
+            )
+            return True
+        if not await self._handshake(GATEWAY_URL) or not await self._identify():
+            return False
+        end = time.perf_counter()
+
+        self._tasks.append(asyncio.create_task(self._events_listener()))
+        self.logger.log(level="Info", msg=f"Connected to gateway in {round(end - start, 3)} seconds.")
+        return True
+
+    async def _resume_checkpoint(self, state: Optional[dict]) -> bool:
+        """Resumes a session saved in the checkpoint, see `Gateway._resume_checkpoint`."""
+        if not state or str(state["channel_id"]) != str(self.channel_id):
+            return False
+
+        self.logger.log(level="Debug", msg="Resuming the saved gateway session.")
+        self.session_id = state["session_id"]
+        self.internal.s = state["seq"]
+        self.internal.resume_gateway_url = state["resume_gateway_url"]
+        self.user_id = state["user_id"]
+        self.guild_id = state["guild_id"]
+        try:
+            resumed = await self.reconnect_ws()
+        except Exception as e:
+            self.logger.log(level="Error", msg=f"_resume_checkpoint function in aio/gateway.py: {e}.")
+            resumed = False
+        if not resumed:
+            if hasattr(self, "ws"):
+                await self.ws.close()
+            return False
+
+        self._tasks.append(asyncio.create_task(self._events_listener()))
+        try:
+            await asyncio.wait_for(self._ready.wait(), self.HANDSHAKE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.logger.log(level="Warning", msg="The saved gateway session isn't ready yet.")
+        self._mark("ready")
+        return True
+
+    async def _handshake(self, base: str) -> bool:
+        """Connects to a gateway host, waits for its hello and starts heartbeating, see `Gateway._handshake`."""
+        self.state = GatewayState.CONNECTING
+        self.internal.ack_pending = False
+        self.logger.log(level="Debug", msg="Booting up websocket client.")
+        self._phase_start = time.perf_counter()
+        self.ws = await self._connect(base)
+        self._mark("connect")
+
+        hello = await self.recv_handler(timeout=self.HANDSHAKE_TIMEOUT)
+        if not hello:
+            self.logger.log(level="Critical", msg="Discord websocket client failed to boot.")
+            return False
+
+        self.heartbeat_interval = hello["d"]["heartbeat_interval"] / 1000
+        self.logger.log(level="Debug", msg="Received gateway hello event.")
+        self._mark("hello")
+
+        await self.ws.send_bytes(self.internal.heartbeat())
+        heartbeat_init = await self.recv_handler(timeout=self.HANDSHAKE_TIMEOUT)
+        if not heartbeat_init:
+            self.logger.log(level="Critical", msg="Discord heartbeat loop failed to boot.")
+            return False
+        if heartbeat_init["op"] == 1:
+            await self.ws.send_bytes(self.internal.heartbeat())
+            heartbeat_init = await self.recv_handler(timeout=self.HANDSHAKE_TIMEOUT)
+        if not heartbeat_init or heartbeat_init["op"] != 11:
+            self.logger.log(level="Critical", msg="Unhandled OP response while booting discord heartbeat loop.")
+            return False
+        self.internal.ack()
+
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self.heartbeat())
+            self._tasks.append(self._heartbeat_task)
+        return True
+
+    async def _identify(self) -> bool:
+        """Identifies a new session, see `Gateway._identify`."""
+        self.state = GatewayState.IDENTIFYING
+        await self.ws.send_bytes(
+            orjson.dumps(
+                {
+                    "op": 2,
+                    "d": {
+                        "token": self.token,
+                        "properties": {
+                            "$os": "windows",
+                            "$browser": "Discord",
+                            "$device": "desktop",
+                        },
+                    },
+                }
+            )
+        )
+        self._mark("identify")
+
+        identify = await self.recv_handler(timeout=self.HANDSHAKE_TIMEOUT)
+        if identify is None:
+            if self.close_code == 4004:
+                raise InvalidToken("Invalid Discord account token used.") # type: ignore
+            self.logger.log(level="Critical", msg="Lost the gateway connection while identifying.")
+            return False
+        if not identify:
+            raise InvalidToken("Invalid Discord account token used.") # type: ignore
+
+        if identify["op"] != 0:
+            self.logger.log(
+                level="UNHANDLED DEBUG",
+                msg="Unhandled case, send this to the developers.",
+                extras={"identify_response": identify},
+            )
+            return False
+
+        self._read_ready(identify)
+        self.state = GatewayState.READY
+        self.backoff.reset()
+        self._resume_attempts = 0
+        await self._save_checkpoint()
+        self._mark("ready")
+        return True
+
+    async def _save_checkpoint(self) -> None:
+        """Saves the session checkpoint on a worker thread, so writing and syncing the file doesn't block the event loop."""
+        if self.checkpoint is not None and self.session_id:
+            await asyncio.get_running_loop().run_in_executor(None, self._checkpoint, True)
+
+    async def close(self) -> None:
+        """Saves the session checkpoint, cancels the gateway tasks and closes the websocket."""
+        if self.state == GatewayState.READY:
+            await self._save_checkpoint()
+        self._closing = True
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if hasattr(self, "ws"):
+            await self.ws.close()
+
+    async def heartbeat(self):
+        self.logger.log(level="Debug", msg="Booted up discord heartbeat loop.")
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if self.ws.closed:
+                continue
+            if self._zombie():
+                self.logger.log(
+                    level="Warning",
+                    msg=f"No heartbeat ACK in {round(time.perf_counter() - self.internal.heartbeat_sent, 3)} seconds, resuming.",
+                )
+                self.internal.ack_pending = False
+                await self.ws.close()
+                continue
+            try:
+                await self.ws.send_bytes(self.internal.heartbeat())
+            except ConnectionError:
+                continue
+            await self._save_checkpoint()
+
+    async def recv_handler(self, selective: bool = False, timeout: Optional[float] = None):
+        """Receives and decodes a frame, returns `None` if the connection is lost or its stream can't be decoded and `False` for control frames."""
+        span = None
+        try:
+            payload = None
+            while payload is None:
+                message = await self.ws.receive(timeout)
+                if span is None and HOOKS:
+                    span = begin(RECEIVE)
+                if message.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    self.close_code = message.data if message.type == aiohttp.WSMsgType.CLOSE else self.ws.close_code
+                    return None
+                if message.type not in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                    return False
+                payload = message.data if self.inflator is None else self.inflator.feed(message.data)
+            if span is not None:
+                span.end()
+                span = begin(DECODE)
+            return self.decoder.decode(payload) if selective else orjson.loads(payload)
+        except (aiohttp.ClientError, ConnectionError, asyncio.TimeoutError):
+            return None
+        except DECODE_ERRORS as e:
+            self._undecodable(e)
+            return None
+        finally:
+            if span is not None:
+                span.end()
+
+    async def _connect(self, base: str) -> aiohttp.ClientWebSocketResponse:
+        """Opens a websocket connection to a gateway host, see `Gateway._connect`."""
+        self.close_code = None
+        if self.inflator is not None:
+            self.inflator.reset()
+        return await self.session.ws_connect(gateway_url(base, self.compress), max_msg_size=0)
+
+    async def reconnect_ws(self) -> bool:
+        """Connects to the resume gateway and resumes the session, see `Gateway.reconnect_ws`."""
+        self.logger.log(level="Info", msg="Reconnecting websocket client.")
+        if not await self._handshake(self.internal.resume_gateway_url):
+            return False
+        self.state = GatewayState.RESUMING
+        await self.ws.send_bytes(
+            orjson.dumps({"op": 6, "d": {"token": self.token, "session_id": self.session_id, "seq": self.internal.s}})
+        )
+        self._mark("identify")
+        return True
+
+    async def _recover(self, resume: bool = True) -> bool:
+        """Reconnects until the session is resumed, or a new one is identified, see `Gateway._recover`."""
+        self.state = GatewayState.CONNECTING
+        await self.ws.close()
+        start = time.perf_counter()
+        attempts = 0
+        while True:
+            if self.close_code in FATAL_CLOSE_CODES:
+                self.logger.log(level="Critical", msg=f"The gateway closed the connection with code {self.close_code}, giving up.")
+                self.state = GatewayState.CLOSED
+                return False
+            resume = resume and self._can_resume()
+
+            delay = self.backoff.delay()
+            if delay:
+                self.state = GatewayState.BACKOFF
+                self.logger.log(level="Info", msg=f"Reconnecting in {round(delay, 3)} seconds.")
+                await asyncio.sleep(delay)
+
+            attempts += 1
+            try:
+                if resume:
+                    self._resume_attempts += 1
+                    recovered = await self.reconnect_ws()
+                else:
+                    recovered = await self._handshake(GATEWAY_URL) and await self._identify()
+            except InvalidToken:
+                self.logger.log(level="Critical", msg="Discord rejected the token while reconnecting, giving up.")
+                self.state = GatewayState.CLOSED
+                return False
+            except Exception as e:
+                self.logger.log(level="Error", msg=f"_recover function in aio/gateway.py: {e}.")
+                recovered = False
+
+            if recovered and resume:
+                self.logger.log(level="Debug", msg=f"Sent a resume after {attempts} attempt(s).")
+                self._resuming_since = start
+                return True
+            if recovered:
+                self._resuming_since = None
+                self.logger.log(
+                    level="Info",
+                    msg=f"Re-identified after {attempts} attempt(s) in {round(time.perf_counter() - start, 3)} seconds.",
+                )
+                return True
+            if not self.ws.closed:
+                await self.ws.close()
+
+    async def wait_for(
+        self, event: str, check: Optional[Callable[..., bool]] = None, timeout: Optional[float] = 10, since: Optional[float] = None
+    ) -> Any:
+        """Waits until the events listener dispatches an `event` that passes `check`, see `Gateway.wait_for`.
+
+        Parameters
+        --------
+        event: str
+            The event name.
+        check: Optional[Callable[..., `bool`]]
+            A predicate that receives a `Message` for message events, or a nonce for interaction events.
+        timeout: Optional[`float`]
+            The number of seconds to wait before giving up.
+        since: Optional[`float`]
+            A `time.monotonic()` reading, usually taken right before sending what the event answers.
+            The last cached event is returned right away if it arrived after it, otherwise only
+            events dispatched after the call are matched.
+
+        Returns
+        --------
+        Optional[Union[`Message`, `bool`]]
+        """
+        self._check_event(event)
+        start = time.perf_counter()
+        span = begin(WAIT_FOR, event) if HOOKS else None
+        check = check or (lambda *args: True)
+        latest = self.cache.latest(event, since) if since is not None else None
+        if latest is not None:
+            result = self._offer(check, Message(latest) if isinstance(latest, dict) else latest)
+            if result is not None:
+                WAIT_FOR_DURATION.observe(time.perf_counter() - start, event)
+                if span is not None:
+                    span.end()
+                return result
+
+        future = self.expect(event, check)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.forget(event, future)
+            WAIT_FOR_DURATION.observe(time.perf_counter() - start, event)
+            if span is not None:
+                span.end()
+
+    def expect(self, event: str, check: Optional[Callable[..., bool]] = None) -> asyncio.Future:
+        """Registers a future resolved by the next `event` that passes `check`, see `Gateway.expect`."""
+        self._check_event(event)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[event].append((check or (lambda *args: True), future))
+        return future
+
+    def forget(self, event: str, future: asyncio.Future) -> None:
+        """Removes the waiter of `future`, if it is still waiting."""
+        self._waiters[event] = [waiter for waiter in self._waiters[event] if waiter[1] is not future]
+
+    def expect_interaction(self, nonce: str) -> asyncio.Future:
+        """Registers `nonce` so the MESSAGE_CREATE carrying it resolves the returned future.
+
+        This must be called before the interaction is sent, and paired with `forget_interaction`.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.pending_interactions[nonce] = future
+        return future
+
+    def forget_interaction(self, nonce: str) -> None:
+        """Removes `nonce` from the pending interactions, if it is still there."""
+        self.pending_interactions.pop(nonce, None)
+
+    def expect_component(self, nonce: str) -> asyncio.Future:
+        """Registers `nonce` so its INTERACTION_SUCCESS or INTERACTION_FAILURE resolves the returned future, see `Gateway.expect_component`."""
+        future = asyncio.get_running_loop().create_future()
+        self.pending_components[nonce] = future
+        return future
+
+    def forget_component(self, nonce: str) -> None:
+        """Removes `nonce` from the pending components, if it is still there."""
+        self.pending_components.pop(nonce, None)
+
+    @staticmethod
+    def _offer(check: Callable[..., bool], value: Any) -> Any:
+        """Runs `check` against a `Message` or a nonce, returns what the waiter resolves with or `None`."""
+        try:
+            if not check(value):
+                return None
+        except Exception:
+            return None
+        return value if isinstance(value, Message) else True
+
+    def _dispatch(self, event: str, data: Any) -> None:
+        """Resolves every waiter of `event` whose check passes."""
+        waiters = self._waiters[event]
+        if not waiters:
+            return
+        value = Message(data) if isinstance(data, dict) else data
+        remaining = []
+        for check, future in waiters:
+            result = None if future.done() else self._offer(check, value)
+            if result is None:
+                remaining.append((check, future))
+            else:
+                future.set_result(result)
+        self._waiters[event] = remaining
+
+    async def _events_listener(self):
+        self.logger.log(level="Debug", msg="Events listener is now listening.")
+        while True:
+            event = await self.recv_handler(selective=True)
+            if event is None:
+                if self._closing:
+                    return
+                self.logger.log(level="Warning", msg=f"Lost the gateway connection (close code {self.close_code}).")
+                if not await self._recover():
+                    return
+                continue
+            if not event:
+                continue
+
+            span = begin(DISPATCH, event.get("t")) if HOOKS else None
+            try:
+                if event["op"] == 0:
+                    self.internal.s = event["s"]
+                    GATEWAY_EVENTS.inc(event["t"])
+                    if event["t"] in ("READY", "RESUMED"):
+                        self.state = GatewayState.READY
+                        self.backoff.reset()
+                        self._resume_attempts = 0
+                        if event["t"] == "RESUMED":
+                            self._resumed()
+                        await self._save_checkpoint()
+
+                elif event["op"] == 7 or (event["op"] == 9 and event["d"]):
+                    if not await self._recover():
+                        return
+                    continue
+                elif event["op"] == 1:
+                    await self.ws.send_bytes(self.internal.heartbeat())
+                    continue
+                elif event["op"] == 11:
+                    self.internal.ack()
+                    continue
+                elif event["op"] == 10:
+                    self.heartbeat_interval = event["d"]["heartbeat_interval"] / 1000
+                    continue
+                elif event["op"] == 9 and not event["d"]:
+                    # The session can't be resumed, Discord asks for a 1 to 5 seconds wait before identifying again.
+                    self.state = GatewayState.BACKOFF
+                    await asyncio.sleep(random.uniform(1, 5))
+                    if not await self._recover(resume=False):
+                        return
+                    continue
+
+                if not event["d"]:
+                    continue
+                if event["t"] == "GUILD_CREATE" and not self.dm_mode:
+                    self._guild_created(event["d"])
+                if event["t"] not in self.events:
+                    continue
+
+                self.cache.store(event["t"], event["d"])
+                if event["t"] == "MESSAGE_CREATE":
+                    pending = self.pending_interactions.pop(event["d"].get("nonce"), None)
+                    if pending and not pending.done():
+                        pending.set_result(Message(event["d"]))
+                elif event["t"] in ("INTERACTION_SUCCESS", "INTERACTION_FAILURE"):
+                    pending = self.pending_components.pop(event["d"].get("nonce"), None)
+                    if pending and not pending.done():
+                        pending.set_result(event["t"] == "INTERACTION_SUCCESS")
+                if event["t"].startswith("INTERACTION_"):
+                    self._dispatch(event["t"], event["d"]["nonce"])
+                else:
+                    self._dispatch(event["t"], event["d"])
+            except Exception as e:
+                self.logger.log(level="Error", msg=f"_events_listener function in aio/gateway.py: {e}.")
+            finally:
+                if span is not None:
+                    span.end()
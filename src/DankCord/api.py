@@ -1,71 +1,345 @@
-from typing import Optional, Union
-from time import time, sleep
+from typing import List, Optional, Tuple, Union
+from time import perf_counter, time
 from datetime import datetime, timezone
+from itertools import count
 
-from requests import post
+import orjson
+
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
 from requests.exceptions import JSONDecodeError as RequestsJSONDecodeError
 
-from .exceptions import InvalidFormBody
-from .Objects import Message, Button, Dropdown
+from .commands import CommandIndex, CommandPath, CommandTemplate
+from .exceptions import InvalidFormBody, UnknownCommand
+from .gateway import EventWaiter
+from .hooks import HOOKS, REST, begin
+from .metrics import COMMAND_LATENCY, REST_REQUESTS, RETRIES
+from .Objects import Config, Message, Button, Dropdown
+from .ratelimit import INTERACTIONS
+
+# Fills the increment bits of the nonce, so interactions created in the same millisecond never share one.
+_nonce_increment = count()
+
+def create_session(config: Config) -> Session:
+    """Creates the keep-alive HTTP session shared by every REST call of a client.
+
+    The authorization headers are set once on the session, and connections to
+    Discord are pooled according to `Config.pool_connections` and `Config.pool_maxsize`.
+
+    Parameters
+    --------
+    config: Config
+        The client configuration.
+
+    Returns
+    --------
+    session: `Session`
+    """
+    session = Session()
+    session.headers.update({"Authorization": config.token, "Content-type": "application/json"})
+    adapter = HTTPAdapter(pool_connections=config.pool_connections, pool_maxsize=config.pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 class API:
     """A class that has some useful commands related to communicating with the Discord API."""
     def __init__(self) -> None:
         pass
 
+    @property
+    def session_id(self) -> Optional[str]:
+        """The gateway's session ID, read whenever a payload is built since re-identifying replaces it."""
+        return self.gateway.session_id # type: ignore
+
     def _create_nonce(self) -> str:
         """Creates a nonce using Discord's algorithm.
         
         Returns
         --------
         nonce: str"""
-        return str(int(datetime.now(timezone.utc).timestamp() * 1000 - 1420070400000) << 22)
+        timestamp = int(datetime.now(timezone.utc).timestamp() * 1000 - 1420070400000)
+        return str(timestamp << 22 | next(_nonce_increment) & 0x3FFFFF)
+
+    def _get_command_path(self, path: Tuple[str, ...]) -> Tuple[CommandTemplate, CommandPath]:
+        """Returns the compiled template and path node of a command path.
+
+        In MEM mode this is a single lookup in the index compiled when the commands were fetched,
+        in DISK mode the command is compiled from its stored data when needed.
 
-    def _OptionsBuilder(self, name, type_, **kwargs):
-        """Builds the data used in slash command API requests.
-        
         Parameters
         --------
-        name: Any
-        type_: Any
-        kwargs: **kwargs
+        path: tuple[`str`, ...]
+            The command name, optionally followed by the sub command group and/or sub command names.
+
+        Raises
+        --------
+        UnknownCommand
+            The command path doesn't exist in the channel.
+
         Returns
         --------
-        options: list[`dict`[`str`, `Any`]]
+        compiled: tuple[`CommandTemplate`, `CommandPath`]
         """
-        options = [{"type": type_, "name": name, "options": []}]
+        compiled = self.command_index.get(path) # type: ignore
+        if compiled is not None:
+            return compiled
+        command_info = self._get_command_info(path[0]) if self.resource_intensivity == "DISK" else None # type: ignore
+        if not command_info:
+            raise UnknownCommand(f"Unknown command: {' '.join(path)}.")
+        return CommandIndex.resolve(self.command_index.compile(command_info), path) # type: ignore
 
-        type_types = {str: 3, bool: 5, list: 2, int: 10}
+    def _command_payload(self, nonce: str, path: Tuple[str, ...], kwargs: dict) -> bytes:
+        """Builds the interaction payload of a slash command path.
 
-        option_type = 3
-        for key, value in kwargs.items():
-            option_type = type_types[type(value)]
-            new_piece_of_data = {"type": option_type, "name": key, "value": value}
-            options[0]["options"].append(new_piece_of_data)
+        Returns
+        --------
+        data: bytes
+        """
+        template, node = self._get_command_path(path)
+        return template.render(nonce, self.session_id, node.encode(kwargs)) # type: ignore
 
-        return options
+    def _click_payload(self, nonce: str, button: Button) -> bytes:
+        """Builds the interaction payload of a button click.
+
+        Returns
+        --------
+        data: bytes
+        """
+        return orjson.dumps({
+            "type": 3,
+            "nonce": nonce,
+            "guild_id": str(self.guild_id), # type: ignore
+            "channel_id": self.channel_id, # type: ignore
+            "message_flags": 0,
+            "message_id": button.message_id,
+            "application_id": "270904126974590976",
+            "session_id": self.session_id, # type: ignore
+            "data": {"component_type": 2, "custom_id": button.custom_id},
+        })
+
+    def _select_payload(self, nonce: str, dropdown: Dropdown, options: list) -> bytes:
+        """Builds the interaction payload of a dropdown selection.
+
+        Returns
+        --------
+        data: bytes
+        """
+        return orjson.dumps({
+            "type": 3,
+            "nonce": nonce,
+            "guild_id": str(self.guild_id), # type: ignore
+            "channel_id": self.channel_id, # type: ignore
+            "message_flags": 0,
+            "message_id": dropdown.message_id,
+            "application_id": "270904126974590976",
+            "session_id": self.session_id, # type: ignore
+            "data": {
+                "component_type": 3,
+                "custom_id": dropdown.custom_id,
+                "type": 3,
+                "values": options,
+            },
+        })
+
+    def _post_interaction(self, data: bytes) -> Tuple[int, dict, float]:
+        """Posts an interaction payload once the rate limiter lets it through.
+
+        The response headers update the rate limiter, so a request that would hit a 429 waits
+        before it's sent instead of after.
+
+        Returns
+        --------
+        response: tuple[`int`, `dict`, `float`]
+            The response status, its JSON body if it has one, and the seconds spent waiting on the rate limiter.
+        """
+        waited = self.rate_limiter.wait(INTERACTIONS) # type: ignore
+        span = begin(REST, INTERACTIONS) if HOOKS else None
+        try:
+            response = self.session.post("https://discord.com/api/v9/interactions", data=data) # type: ignore
+            try:
+                response_data = response.json()
+            except RequestsJSONDecodeError:
+                response_data = None
+        finally:
+            if span is not None:
+                span.end()
+        response_data = response_data if isinstance(response_data, dict) else {}
+        self.rate_limiter.update(INTERACTIONS, response.status_code, response.headers, response_data) # type: ignore
+        REST_REQUESTS.inc(INTERACTIONS, str(response.status_code))
+        return response.status_code, response_data, waited
+
+    def _get(self, route: str, url: str, attempts: int = 3) -> Response:
+        """Sends a GET request once the rate limiter lets it through, and again if it's rate limited.
 
-    def _RawOptionsBuilder(self, **kwargs):
-        """Builds the raw data used in slash command API requests.
-        
         Parameters
         --------
-        kwargs: **kwargs
+        route: str
+            The rate limit route of the request, like `USER_ROUTE`.
+        url: str
+            The URL to request.
+        attempts: int = 3
+            The amount of times to send it while it's answered with a 429.
+
         Returns
         --------
-        options: list
+        response: `Response`
+            The last response.
+        """
+        for i in range(attempts):
+            if i:
+                RETRIES.inc(route)
+            self.rate_limiter.wait(route) # type: ignore
+            span = begin(REST, route) if HOOKS else None
+            try:
+                response = self.session.get(url) # type: ignore
+            finally:
+                if span is not None:
+                    span.end()
+            REST_REQUESTS.inc(route, str(response.status_code))
+            body = None
+            if response.status_code == 429:
+                try:
+                    body = response.json()
+                except RequestsJSONDecodeError:
+                    pass
+            self.rate_limiter.update(route, response.status_code, response.headers, body) # type: ignore
+            if response.status_code != 429:
+                break
+        return response
+
+    def _invoke(self, path: Tuple[str, ...], retry_attempts: int, timeout: int, kwargs: dict) -> Optional[Message]:
+        """Runs a command path and waits for the message carrying its nonce.
+
+        Parameters
+        --------
+        path: tuple[`str`, ...]
+            The command name, optionally followed by the sub command group and/or sub command names.
+        retry_attempts: int
+            The amount of times to retry on failure.
+        timeout: int
+            Duration before it times out.
+        kwargs: dict
+            The command options.
+        Returns
+        --------
+        message: Optional[`Message`]
+        """
+        nonce = self._create_nonce()
+        retry_attempts = retry_attempts if retry_attempts > 0 else 1
+        data = self._command_payload(nonce, path, kwargs)
+
+        pending = self.gateway.expect_interaction(nonce) # type: ignore
+        try:
+            start = perf_counter()
+            for i in range(retry_attempts):
+                if i:
+                    RETRIES.inc(INTERACTIONS)
+                status, response_data, _ = self._post_interaction(data)
+                # The rate limiter holds the retry back until the bucket resets.
+                if status == 429:
+                    continue
+                _errors: dict = response_data.get("errors", {}).get("data", {}).get("values", {}).get("0", {}).get("_errors", {})
+                if _errors.get("message"):
+                    raise InvalidFormBody(_errors.get("message"))
+                message = pending.wait(timeout)
+                if message is not None:
+                    COMMAND_LATENCY.observe(perf_counter() - start, path[0])
+                return message
+        finally:
+            self.gateway.forget_interaction(nonce) # type: ignore
+
+        return None
+
+    def _post_component(self, data: bytes, retry_attempts: int, timeout: int) -> bool:
+        """Posts a component interaction payload until Discord accepts it, returns whether it did.
+
+        Time spent waiting on the rate limiter doesn't count towards `timeout`.
         """
-        options = []
+        retry_attempts = retry_attempts if retry_attempts > 0 else 1
+        end = time() + timeout
+        for i in range(retry_attempts):
+            if time() > end:
+                return False
+            if i:
+                RETRIES.inc(INTERACTIONS)
+            status, response_data, waited = self._post_interaction(data)
+            end += waited
+            _errors: dict = response_data.get("errors", {}).get("data", {}).get("values", {}).get("0", {}).get("_errors", {})
+            if _errors.get("message"):
+                raise InvalidFormBody(_errors.get("message"))
+            if status == 204:
+                return True
+        return False
+
+    def send_components(self, *components: Union[Button, Tuple[Dropdown, list]], retry_attempts: int = 10, timeout: int = 10) -> List[bool]:
+        """Clicks buttons and selects dropdown options in order, without waiting for Dank Memer in between.
 
-        type_types = {str: 3, bool: 5, list: 2, int: 10}
+        Each component interaction is sent as soon as Discord accepted the previous one, and none are sent
+        after one Discord didn't accept, as they usually depend on it. The ones sent are then confirmed at once by the INTERACTION_SUCCESS or INTERACTION_FAILURE event carrying their nonce.
+        If the gateway doesn't listen to INTERACTION_SUCCESS, Discord accepting an interaction is taken as its success.
 
-        option_type = 3
-        for key, value in kwargs.items():
-            option_type = type_types[type(value)]
-            new_piece_of_data = {"type": option_type, "name": key, "value": value}
-            options.append(new_piece_of_data)
+        Example
+        ---------
 
-        return options
+            platform, kind, post = bot.send_components(
+                (message.dropdowns[0], [message.dropdowns[0].options[1].value]),
+                (message.dropdowns[1], [message.dropdowns[1].options[0].value]),
+                message.buttons[0],
+            )
+
+        Parameters
+        --------
+        components: Union[`Button`, Tuple[`Dropdown`, `list`]]
+            The buttons to click, and the dropdowns to select options from with the options to select.
+        retry_attempts: int = 10
+            The amount of times to retry sending each interaction on failure.
+        timeout: int = 10
+            Duration before it times out.
+
+        Returns
+        --------
+        success_states: List[`bool`]
+            Whether each interaction succeeded, in the order they were given. Those never sent are `False`.
+        """
+        pending: List[Tuple[str, Optional[EventWaiter]]] = []
+        try:
+            for component in components:
+                nonce = self._create_nonce()
+                if isinstance(component, Button):
+                    data = self._click_payload(nonce, component)
+                else:
+                    data = self._select_payload(nonce, *component)
+                waiter = self.gateway.expect_component(nonce) # type: ignore
+                pending.append((nonce, waiter))
+                if not self._post_component(data, retry_attempts, timeout):
+                    pending[-1] = (nonce, None)
+                    break
+
+            end = time() + timeout
+            confirms = self.gateway.confirms_components # type: ignore
+            results = [
+                waiter is not None and (not confirms or waiter.wait(max(0.0, end - time())) is True)
+                for nonce, waiter in pending
+            ]
+            return results + [False] * (len(components) - len(results))
+        finally:
+            for nonce, waiter in pending:
+                self.gateway.forget_component(nonce) # type: ignore
+
+    def _update_from_components(self, check, *components: Union[Button, Tuple[Dropdown, list]], timeout: int = 10) -> Optional[Message]:
+        """Sends component interactions with `send_components` and returns the MESSAGE_UPDATE passing `check` they lead to.
+
+        The update is waited for from before the first interaction is sent, so it can't be missed while they're confirmed.
+        Returns `None` if an interaction failed or the update didn't come in time.
+        """
+        update = self.gateway.expect("MESSAGE_UPDATE", check) # type: ignore
+        try:
+            if not all(self.send_components(*components, timeout=timeout)):
+                return None
+            return update.wait(timeout)
+        finally:
+            self.gateway.forget("MESSAGE_UPDATE", update) # type: ignore
 
     def run_command(self, name: str, retry_attempts: int = 3, timeout: int = 10, **kwargs) -> Optional[Message]:
         """Runs a slash command.
@@ -82,75 +356,7 @@ class API:
         --------
         message: Optional[`Message`]
         """
-        nonce = self._create_nonce()
-        command_info = self._get_command_info(name) # type: ignore
-
-        retry_attempts = retry_attempts if retry_attempts > 0 else 1
-        type_ = 1
-        options = []
-
-        if command_info.get("options"):
-            for item in command_info["options"]:
-                if item["name"] == name:
-                    type_ = item["type"]
-                    break
-            options = self._OptionsBuilder(name, type_, **kwargs)
-
-        data = {
-            "type": 2,
-            "application_id": "270904126974590976",
-            "guild_id": str(self.guild_id), # type: ignore
-            "channel_id": self.channel_id, # type: ignore
-            "session_id": self.session_id, # type: ignore
-            "data": {
-                "version": command_info["version"],
-                "id": command_info["id"],
-                "name": name,
-                "type": 1,
-                "options": options,
-                "application_command": {
-                    "id": command_info["id"],
-                    "application_id": "270904126974590976",
-                    "version": command_info["version"],
-                    "default_permission": command_info["default_permission"],
-                    "default_member_permissions": command_info["default_member_permissions"],
-                    "type": 1,
-                    "name": name,
-                    "nsfw": command_info["nsfw"],
-                    "description": command_info["description"],
-                    "dm_permission": command_info["dm_permission"],
-                },
-                "attachments": [],
-            },
-            "nonce": nonce,
-        }
-        def check(message: Message):
-            return message.nonce == nonce
-
-        for i in range(retry_attempts):
-            response = post(  # type: ignore
-                    "https://discord.com/api/v9/interactions",
-                    json=data,
-                    headers={"Authorization": self.token, "Content-type": "application/json"} # type: ignore
-                )
-            try:
-                response_data = response.json()
-                _errors: dict = response_data.get("errors", {}).get("data", {}).get("values", {}).get("0", {}).get("_errors", {})
-                if response_data.get("retry_after"):
-                    sleep(response_data["retry_after"])
-                    continue
-                if _errors.get("message"):
-                    raise InvalidFormBody(_errors.get("message"))
-            except RequestsJSONDecodeError:
-                pass
-            try:
-                interaction: Optional[Union[Message, bool]] = self.wait_for("MESSAGE_CREATE", check=check, timeout=timeout)  # type: ignore
-                return interaction # type: ignore
-            except Exception as e:
-                print(f"Error in run_command: {e}")
-                continue
-            
-        return None
+        return self._invoke((name,), retry_attempts, timeout, kwargs)
 
     def run_sub_command(self, name: str, sub_name: str, retry_attempts:int = 3, timeout: int = 10, **kwargs) -> Optional[Message]:
         """Runs a slash command.
@@ -168,76 +374,7 @@ class API:
         --------
         message: Optional[`Message`]
         """
-
-        nonce = self._create_nonce()
-        command_info = self._get_command_info(name) # type: ignore
-        retry_attempts = retry_attempts if retry_attempts > 0 else 1
-        type_ = 1
-        options = []
-
-        if command_info.get("options"):
-            for item in command_info["options"]:
-                if item["name"] == name:
-                    type_ = item["type"]
-                    break
-            options = self._OptionsBuilder(name, type_, **kwargs)
-
-        data = {
-            "type": 2,
-            "application_id": "270904126974590976",
-            "guild_id": str(self.guild_id), # type: ignore
-            "channel_id": self.channel_id, # type: ignore
-            "session_id": self.session_id, # type: ignore
-            "data": {
-                "version": command_info["version"],
-                "id": command_info["id"],
-                "name": name,
-                "type": command_info["type"],
-                "options": options,
-                "application_command": {
-                    "id": command_info["id"],
-                    "application_id": "270904126974590976",
-                    "version": command_info["version"],
-                    "default_permission": command_info["default_permission"],
-                    "default_member_permissions": command_info["default_member_permissions"],
-                    "type": command_info["type"],
-                    "name": name,
-                    "nsfw": command_info["nsfw"],
-                    "description": command_info["description"],
-                    "dm_permission": command_info["dm_permission"],
-                    "options": command_info["options"],
-                },
-                "attachments": [],
-            },
-            "nonce": nonce,
-        }
-        def check(message: Message):
-            return message.nonce == nonce
-        for i in range(retry_attempts):
-            response = post(  # type: ignore
-                    "https://discord.com/api/v9/interactions",
-                    json=data,
-                    headers={"Authorization": self.token, "Content-type": "application/json"} # type: ignore
-                )
-            
-            try:
-                response_data = response.json()
-                _errors: dict = response_data.get("errors", {}).get("data", {}).get("values", {}).get("0", {}).get("_errors", {})
-                if response_data.get("retry_after"):
-                    sleep(response_data["retry_after"])
-                    continue
-                if _errors.get("message"):
-                    raise InvalidFormBody(_errors.get("message"))
-            except RequestsJSONDecodeError:
-                pass
-            try:
-                message: Optional[Union[Message, bool]] = self.wait_for("MESSAGE_CREATE", check=check, timeout=timeout) # type: ignore
-                return message # type: ignore
-            except Exception as e:
-                print(f"Error in run_sub_command: {e}")
-                continue
-        
-        return None
+        return self._invoke((name, sub_name), retry_attempts, timeout, kwargs)
 
     def run_slash_group_command(self, name: str, sub_name: str, sub_group_name: str, retry_attempts: int = 3, timeout: int = 10, **kwargs) -> Optional[Message]:
         """Runs a slash group command.
@@ -257,93 +394,7 @@ class API:
         --------
         message: Optional[`Message`]
         """
-
-        nonce = self._create_nonce()
-        command_info = self._get_command_info(name) # type: ignore
-        retry_attempts = retry_attempts if retry_attempts > 0 else 1
-        sub_type = 1
-        sub_group_type = 1
-        options = []
-
-        if command_info.get("options"):
-            for item in command_info["options"]:
-                if item["name"] == sub_name:
-                    sub_type = item["type"]
-                for item_ in item["options"]:
-                    if item_["name"] == sub_group_name:
-                        sub_group_type = item_["type"]
-            options = self._RawOptionsBuilder(**kwargs)
-
-        data = {
-            "type": 2,
-            "application_id": "270904126974590976",
-            "guild_id": str(self.guild_id), # type: ignore
-            "channel_id": self.channel_id, # type: ignore
-            "session_id": self.session_id, # type: ignore
-            "data": {
-                "version": command_info["version"],
-                "id": command_info["id"],
-                "name": name,
-                "type": command_info["type"],
-                "options": [
-                    {
-                        "type": sub_type,
-                        "name": sub_name,
-                        "options": [
-                            {
-                                "type": sub_group_type,
-                                "name": sub_group_name,
-                                "options": options,
-                            }
-                        ],
-                    }
-                ],
-                "application_command": {
-                    "id": command_info["id"],
-                    "application_id": "270904126974590976",
-                    "version": command_info["version"],
-                    "default_permission": command_info["default_permission"],
-                    "default_member_permissions": command_info["default_member_permissions"],
-                    "type": command_info["type"],
-                    "name": name,
-                    "nsfw": command_info["nsfw"],
-                    "description": command_info["description"],
-                    "dm_permission": command_info["dm_permission"],
-                    "options": command_info["options"],
-                },
-                "attachments": [],
-            },
-            "nonce": nonce,
-        }
-        def check(message: Message):
-            return message.nonce == nonce
-
-        for i in range(retry_attempts):
-            response = post(  # type: ignore
-                    "https://discord.com/api/v9/interactions",
-                    json=data,
-                    headers={"Authorization": self.token, "Content-type": "application/json"} # type: ignore
-                )
-                
-            try:
-                response_data = response.json()
-                _errors: dict = response_data.get("errors", {}).get("data", {}).get("values", {}).get("0", {}).get("_errors", {})
-                if response_data.get("retry_after"):
-                    sleep(response_data["retry_after"])
-                    continue
-                if _errors.get("message"):
-                    raise InvalidFormBody(_errors.get("message"))
-            except RequestsJSONDecodeError:
-                pass
-            
-            try:
-                message: Optional[Union[Message, bool]] = self.wait_for("MESSAGE_CREATE", check=check, timeout=timeout) # type: ignore
-                return message # type: ignore
-            except Exception as e:
-                print(f"Error in run_slash_group_command: {e}")
-                continue
-        
-        return None
+        return self._invoke((name, sub_name, sub_group_name), retry_attempts, timeout, kwargs)
 
     def click(self, button: Button, retry_attempts: int = 10, timeout: int = 10) -> bool:
         """Clicks a button.
@@ -361,47 +412,7 @@ class API:
         success_state: bool
             Whether the button was clicked successfully or not.
         """
-        nonce = self._create_nonce()
-        retry_attempts = retry_attempts if retry_attempts > 0 else 1
-        data = {
-            "type": 3,
-            "nonce": nonce,
-            "guild_id": str(self.guild_id), # type: ignore
-            "channel_id": self.channel_id, # type: ignore
-            "message_flags": 0,
-            "message_id": button.message_id,
-            "application_id": "270904126974590976",
-            "session_id": self.session_id, # type: ignore
-            "data": {"component_type": 2, "custom_id": button.custom_id},
-        }
-        end = time() + timeout
-        for i in range(retry_attempts):
-            if time() > end:
-                return False
-            response = post(  # type: ignore
-                    "https://discord.com/api/v9/interactions",
-                    json=data,
-                    headers={"Authorization": self.token, "Content-type": "application/json"} # type: ignore
-                )
-                
-            try:
-                response_data = response.json()
-                _errors: dict = response_data.get("errors", {}).get("data", {})
-                try:
-                    _errors = _errors[0]["code"]
-                    if _errors:
-                        raise InvalidFormBody(_errors.get("message"))
-                except:
-                    pass
-            except RequestsJSONDecodeError:
-                pass
-            if response.status_code == 204:
-                break
-            retry_after = int(response.json().get('retry_after', 0))
-            end += retry_after
-            sleep(retry_after)
-        
-        return True if response.status_code == 204 else False # type: ignore
+        return self.send_components(button, retry_attempts=retry_attempts, timeout=timeout)[0]
 
     def select(self, dropdown: Dropdown, options: list, retry_attempts: int = 10, timeout: int = 10) -> bool:
         """Selects an option from a dropdown.
@@ -428,46 +439,4 @@ class API:
         success_state: bool
             Whether the option was chosen successfully or not.
         """
-        nonce = self._create_nonce()
-        data = {
-            "type": 3,
-            "nonce": nonce,
-            "guild_id": str(self.guild_id), # type: ignore
-            "channel_id": self.channel_id, # type: ignore
-            "message_flags": 0,
-            "message_id": dropdown.message_id,
-            "application_id": "270904126974590976",
-            "session_id": self.session_id, # type: ignore
-            "data": {
-                "component_type": 3,
-                "custom_id": dropdown.custom_id,
-                "type": 3,
-                "values": options,
-            },
-        }
-
-        end = time() + timeout
-        for i in range(retry_attempts):
-            if time() > end:
-                return False
-            response = post(  # type: ignore
-                    "https://discord.com/api/v9/interactions",
-                    json=data,
-                    headers={"Authorization": self.token, "Content-type": "application/json"} # type: ignore
-                )
-                
-            try:
-                response_data = response.json()
-                _errors: dict = response_data.get("errors", {}).get("data", {}).get("values", {}).get("0", {}).get("_errors", {})
-                if _errors.get("message"):
-                    raise InvalidFormBody(_errors.get("message"))
-            except RequestsJSONDecodeError:
-                pass
-
-            if response.status_code == 204:
-                break
-            retry_after = int(response.json().get('retry_after', 0))
-            end += retry_after
-            sleep(retry_after)
-        
-        return True if response.status_code == 204 else False # type: ignore
\ No newline at end of file
+        return self.send_components((dropdown, options), retry_attempts=retry_attempts, timeout=timeout)[0]
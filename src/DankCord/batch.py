@@ -0,0 +1,229 @@
+"""
+Parses recorded MESSAGE_CREATE/MESSAGE_UPDATE transcripts with `Parser`, spread over a process pool.
+
+A transcript is NDJSON, one gateway frame (`{"t": ..., "op": 0, "d": {...}}`) or bare message payload per line.
+Lines are read lazily and sent to the workers in chunks, each command message becomes one output line:
+a JSON array of `RECORD_FIELDS`. Cooldowns are counted from when their message was sent, not from when
+the transcript is parsed.
+
+    python -m DankCord.batch transcript.ndjson --output results.ndjson --workers 4
+"""
+import argparse, os, sys, time, orjson
+
+from collections import deque
+from datetime import datetime
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import BinaryIO, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .Objects import CommandResult, Parser
+
+PARSERS: Dict[str, Callable[[str], CommandResult]] = {
+    "fish": Parser.common1, # type: ignore
+    "hunt": Parser.common1, # type: ignore
+    "dig": Parser.common1, # type: ignore
+    "beg": Parser.beg, # type: ignore
+    "search": Parser.search, # type: ignore
+    "crime": Parser.crime, # type: ignore
+    "postmemes": Parser.postmemes, # type: ignore
+}
+# Commands whose result is edited into the message, their MESSAGE_CREATE is only the prompt.
+FOLLOW_UP = frozenset(("search", "crime", "postmemes"))
+RECORD_FIELDS = ("id", "command") + CommandResult.__slots__
+
+
+def sent_at(data: dict) -> Optional[datetime]:
+    """When a message was sent or last edited, from its ISO 8601 timestamps, `None` if it has none."""
+    timestamp = data.get("edited_timestamp") or data.get("timestamp")
+    try:
+        return datetime.fromisoformat(timestamp) if timestamp else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_message(data: dict, event: Optional[str] = None) -> Optional[Tuple[str, CommandResult]]:
+    """Parses a message payload like `Core` parses the response of a command.
+
+    Parameters
+    --------
+    data: dict
+        The message payload.
+    event: Optional[`str`]
+        `MESSAGE_CREATE` or `MESSAGE_UPDATE`, if known; the prompts sent by follow up commands are skipped.
+
+    Returns
+    --------
+    result: Optional[Tuple[`str`, `CommandResult`]]
+        The command name and its result, `None` if the message isn't a parsable command result.
+    """
+    name = (data.get("interaction") or {}).get("name")
+    parser = PARSERS.get(name) # type: ignore
+    embeds = data.get("embeds")
+    if parser is None or not embeds:
+        return None
+    description = embeds[0].get("description") or ""
+    if Parser.check_cooldown(description):
+        return name, Parser.cooldown(description, sent_at(data)) # type: ignore
+    if event == "MESSAGE_CREATE" and name in FOLLOW_UP:
+        return None
+    return name, parser(description) # type: ignore
+
+
+def parse_chunk(lines: List[bytes]) -> Tuple[bytes, int, int, int, float]:
+    """Parses a chunk of transcript lines, runs in a worker process.
+
+    Returns
+    --------
+    chunk: Tuple[`bytes`, `int`, `int`, `int`, `float`]
+        The output records, the worker's PID, the number of lines and records and how long it took.
+    """
+    start = time.perf_counter()
+    records = []
+    for line in lines:
+        # Most of a transcript isn't command results, those lines aren't even decoded.
+        if b'"interaction"' not in line:
+            continue
+        try:
+            payload = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            continue
+        event = None
+        if "op" in payload:
+            event, payload = payload.get("t"), payload.get("d")
+        if not isinstance(payload, dict):
+            continue
+        parsed = parse_message(payload, event)
+        if parsed is None:
+            continue
+        name, result = parsed
+        records.append(
+            orjson.dumps(
+                [payload.get("id"), name] + [getattr(result, field) for field in CommandResult.__slots__],
+                option=orjson.OPT_NON_STR_KEYS,
+            )
+        )
+    output = b"\n".join(records) + b"\n" if records else b""
+    return output, os.getpid(), len(lines), len(records), time.perf_counter() - start
+
+
+class BatchReport:
+    """
+    What a batch run went through, and how fast each worker parsed.
+    """
+
+    __slots__ = ("lines", "records", "elapsed", "workers")
+
+    def __init__(self) -> None:
+        self.lines = 0
+        self.records = 0
+        self.elapsed = 0.0
+        # PID: [lines, records, seconds spent parsing]
+        self.workers: Dict[int, List[float]] = {}
+
+    def add(self, pid: int, lines: int, records: int, elapsed: float) -> None:
+        self.lines += lines
+        self.records += records
+        totals = self.workers.setdefault(pid, [0, 0, 0.0])
+        totals[0] += lines
+        totals[1] += records
+        totals[2] += elapsed
+
+    def throughput(self) -> Dict[int, float]:
+        """The lines each worker parsed per second of parsing."""
+        return {pid: lines / elapsed if elapsed else 0.0 for pid, (lines, _, elapsed) in self.workers.items()}
+
+    def __repr__(self) -> str:
+        rate = self.lines / self.elapsed if self.elapsed else 0.0
+        return f"<BatchReport lines={self.lines} records={self.records} elapsed={self.elapsed:.3f} lines/s={rate:.0f}>"
+
+
+def read_lines(paths: Iterable[str]) -> Iterator[bytes]:
+    """Yields the non empty lines of every transcript, `-` reads the standard input."""
+    for path in paths:
+        f = sys.stdin.buffer if path == "-" else open(path, "rb")
+        try:
+            for line in f:
+                if line.strip():
+                    yield line
+        finally:
+            if f is not sys.stdin.buffer:
+                f.close()
+
+
+def chunked(lines: Iterable[bytes], chunk_size: int) -> Iterator[List[bytes]]:
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_transcripts(
+    paths: Iterable[str], output: BinaryIO, workers: Optional[int] = None, chunk_size: int = 2000
+) -> BatchReport:
+    """Parses transcripts over a process pool, writing the records to `output` in transcript order.
+
+    Only a couple of chunks per worker are in flight at once, so memory doesn't grow with the transcripts.
+
+    Parameters
+    --------
+    paths: Iterable[`str`]
+        The transcript files, `-` reads the standard input.
+    output: BinaryIO
+        Where the records are written.
+    workers: Optional[`int`]
+        The number of worker processes, the number of CPUs by default.
+    chunk_size: int = 2000
+        The number of lines sent to a worker at once.
+
+    Returns
+    --------
+    report: `BatchReport`
+    """
+    workers = workers or os.cpu_count() or 1
+    report = BatchReport()
+    start = time.perf_counter()
+
+    def collect(future: Future) -> None:
+        records, pid, lines, count, elapsed = future.result()
+        output.write(records)
+        report.add(pid, lines, count, elapsed)
+
+    with ProcessPoolExecutor(workers) as executor:
+        pending: Deque[Future] = deque()
+        for chunk in chunked(read_lines(paths), chunk_size):
+            pending.append(executor.submit(parse_chunk, chunk))
+            if len(pending) >= workers * 2:
+                collect(pending.popleft())
+        while pending:
+            collect(pending.popleft())
+
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("transcripts", nargs="+", help="NDJSON transcript files, `-` reads the standard input.")
+    parser.add_argument("--output", "-o", help="Where to write the records, the standard output by default.")
+    parser.add_argument("--workers", type=int, default=None, help="The number of worker processes.")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="The number of lines sent to a worker at once.")
+    args = parser.parse_args()
+
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        report = parse_transcripts(args.transcripts, output, args.workers, args.chunk_size)
+    finally:
+        if args.output:
+            output.close()
+
+    print(repr(report), file=sys.stderr)
+    for pid, rate in report.throughput().items():
+        lines, records, elapsed = report.workers[pid]
+        print(f"worker {pid}: {lines:.0f} lines, {records:.0f} records, {rate:.0f} lines/s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
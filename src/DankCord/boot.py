@@ -0,0 +1,55 @@
+from typing import Any, Optional, Tuple
+
+from .Objects import User
+from .storage import boot_cache_user
+
+
+class BootCacheMixin:
+    """
+    The boot cache bookkeeping shared by `Client` and `AsyncClient`, which only differ in how they fetch.
+
+    Fetched command data and user info go through `_save_commands` and `_save_info`, which keep them
+    and write them to the boot cache, if the client has one.
+    """
+
+    def _save_commands(self, commands: dict, channel_id: Optional[str] = None) -> None:
+        """Stores fetched command data and saves it to the boot cache."""
+        self._store_commands(commands)
+        if self.boot_cache is not None and str(channel_id or self.channel_id) == self.channel_id:
+            self.boot_cache.put("commands", self._boot_cache_key, commands)
+
+    def _store_commands(self, commands: dict) -> None:
+        """Keeps the command data in memory or dumps it into a file, based on user settings."""
+        if self.resource_intensivity == "MEM":
+            self.commands_data = commands
+            self.command_index.load(self.commands_data)
+        else:
+            self.command_store.replace(commands) # type: ignore
+
+    @property
+    def _boot_cache_key(self) -> tuple:
+        return (boot_cache_user(self.token), self.channel_id)
+
+    def _read_boot_cache(self) -> Tuple[Optional[Tuple[Any, bool]], Optional[Tuple[Any, bool]]]:
+        """Returns the cached command data and user info, each with whether it should be refreshed, or `None`."""
+        if self.boot_cache is None:
+            return None, None
+        return self.boot_cache.get("commands", self._boot_cache_key), self.boot_cache.get("user", (boot_cache_user(self.token),))
+
+    def _save_info(self, data: dict) -> None:
+        """Saves fetched user info and saves it to the boot cache."""
+        self.user = User(data)
+        if self.boot_cache is not None:
+            self.boot_cache.put("user", (boot_cache_user(self.token),), data)
+
+    def _sync_channel_index(self) -> None:
+        """Saves the channel index of a fresh READY to the boot cache, or restores it for a resumed session, which gets no READY."""
+        if self.boot_cache is None:
+            return
+        key = (boot_cache_user(self.token),)
+        if len(self.gateway.channels):
+            self.boot_cache.put("channels", key, self.gateway.channels.guilds)
+            return
+        cached = self.boot_cache.get("channels", key)
+        if cached is not None:
+            self.gateway.channels.guilds.update(cached[0])
@@ -0,0 +1,208 @@
+import orjson
+
+from typing import Dict, Optional, Tuple, Union
+
+from .exceptions import UnknownCommand
+
+# Stand-ins for the parts of an interaction payload that change on every call,
+# they are swapped for the real values when a template is rendered.
+_SESSION_ID = "\u0000session_id\u0000"
+_OPTIONS = "\u0000options\u0000"
+_NONCE = "\u0000nonce\u0000"
+_MARKERS = {orjson.dumps(marker): marker for marker in (_SESSION_ID, _OPTIONS, _NONCE)}
+
+# Option types used for keyword arguments the command schema doesn't describe.
+OPTION_TYPES = {str: 3, bool: 5, list: 2, int: 10, float: 10}
+
+# Application command option types that nest other options.
+SUB_COMMAND = 1
+SUB_COMMAND_GROUP = 2
+
+
+class CommandPath:
+    """
+    One invocable level of a slash command: the command itself, a sub command or a sub command of a group.
+
+    The options wrapping the leaf (`[{"type": 1, "name": ..., "options": ...}]`) are
+    serialized once, only the keyword arguments are encoded on each call.
+    """
+
+    def __init__(self, parents: Tuple[Tuple[int, str], ...], options: list) -> None:
+        self.schema: Dict[str, int] = {
+            option["name"]: option["type"] for option in options if option.get("type") not in (SUB_COMMAND, SUB_COMMAND_GROUP)
+        }
+        prefix, suffix = b"", b""
+        for type_, name in parents:
+            prefix += b'[{"type":' + orjson.dumps(type_) + b',"name":' + orjson.dumps(name) + b',"options":'
+            suffix = b"}]" + suffix
+        self._prefix, self._suffix = prefix, suffix
+
+    def encode(self, kwargs: dict) -> bytes:
+        """Encodes keyword arguments as the options of this path.
+
+        Parameters
+        --------
+        kwargs: dict
+            The option names and values.
+
+        Returns
+        --------
+        options: bytes
+        """
+        schema = self.schema
+        options = [
+            {"type": schema.get(key) or OPTION_TYPES[type(value)], "name": key, "value": value}
+            for key, value in kwargs.items()
+        ]
+        return self._prefix + orjson.dumps(options) + self._suffix
+
+
+class CommandTemplate:
+    """
+    The interaction payload of a slash command, serialized once with orjson.
+
+    Rendering only splices the session ID, the options and the nonce into the
+    prebuilt bytes, nothing is copied out of the command data on each call.
+    """
+
+    def __init__(self, command_info: dict, guild_id: Optional[Union[int, str]], channel_id: Union[int, str]) -> None:
+        self.name: str = command_info["name"]
+        self.paths: Dict[Tuple[str, ...], CommandPath] = {}
+        self._compile_paths((self.name,), (), command_info.get("options") or [])
+
+        application_command = {
+            "id": command_info["id"],
+            "application_id": "270904126974590976",
+            "version": command_info["version"],
+            "default_permission": command_info["default_permission"],
+            "default_member_permissions": command_info["default_member_permissions"],
+            "type": command_info.get("type", 1),
+            "name": self.name,
+            "nsfw": command_info["nsfw"],
+            "description": command_info["description"],
+            "dm_permission": command_info["dm_permission"],
+        }
+        if command_info.get("options"):
+            application_command["options"] = command_info["options"]
+
+        payload = {
+            "type": 2,
+            "application_id": "270904126974590976",
+            "guild_id": str(guild_id),
+            "channel_id": channel_id,
+            "session_id": _SESSION_ID,
+            "data": {
+                "version": command_info["version"],
+                "id": command_info["id"],
+                "name": self.name,
+                "type": command_info.get("type", 1),
+                "options": _OPTIONS,
+                "application_command": application_command,
+                "attachments": [],
+            },
+            "nonce": _NONCE,
+        }
+        self._segments, self._order = _split(orjson.dumps(payload))
+
+    def _compile_paths(self, path: Tuple[str, ...], parents: Tuple[Tuple[int, str], ...], options: list) -> None:
+        """Walks the option tree once, registering every sub command group and sub command as its own path."""
+        self.paths[path] = CommandPath(parents, options)
+        for option in options:
+            if option.get("type") in (SUB_COMMAND, SUB_COMMAND_GROUP):
+                self._compile_paths(
+                    path + (option["name"],), parents + ((option["type"], option["name"]),), option.get("options") or []
+                )
+
+    def render(self, nonce: str, session_id: Optional[str], options: bytes) -> bytes:
+        """Returns the serialized payload with the per-call values spliced in.
+
+        Parameters
+        --------
+        nonce: str
+            The interaction nonce.
+        session_id: Optional[str]
+            The gateway session ID.
+        options: bytes
+            The options, already encoded by `CommandPath.encode`.
+
+        Returns
+        --------
+        payload: bytes
+        """
+        values = {
+            _SESSION_ID: orjson.dumps(session_id),
+            _OPTIONS: options,
+            _NONCE: b'"' + nonce.encode() + b'"',
+        }
+        parts = [self._segments[0]]
+        for marker, segment in zip(self._order, self._segments[1:]):
+            parts.append(values[marker])
+            parts.append(segment)
+        return b"".join(parts)
+
+
+class CommandIndex:
+    """
+    Every invocable path of the command catalog, compiled once when the catalog is loaded.
+
+    A path is the command name, optionally followed by a sub command group and/or a
+    sub command name, looking one up is a single dictionary access whatever its depth.
+    """
+
+    def __init__(self, guild_id: Optional[Union[int, str]], channel_id: Union[int, str]) -> None:
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.paths: Dict[Tuple[str, ...], Tuple[CommandTemplate, CommandPath]] = {}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def compile(self, command_info: dict) -> CommandTemplate:
+        """Compiles a single command without adding it to the index."""
+        return CommandTemplate(command_info, self.guild_id, self.channel_id)
+
+    def load(self, commands: Dict[str, dict]) -> None:
+        """Replaces the index with the given command catalog.
+
+        Parameters
+        --------
+        commands: dict[`str`, `dict`]
+            The command data, keyed by command name.
+        """
+        paths = {}
+        for command_info in commands.values():
+            template = self.compile(command_info)
+            for path, node in template.paths.items():
+                paths[path] = (template, node)
+        self.paths = paths
+
+    def get(self, path: Tuple[str, ...]) -> Optional[Tuple[CommandTemplate, CommandPath]]:
+        """Returns the template and path node of `path`, if it is indexed."""
+        return self.paths.get(path)
+
+    @staticmethod
+    def resolve(template: CommandTemplate, path: Tuple[str, ...]) -> Tuple[CommandTemplate, CommandPath]:
+        """Returns `path` of an already compiled template.
+
+        Raises
+        --------
+        UnknownCommand
+            The command doesn't have that path.
+        """
+        if path not in template.paths:
+            raise UnknownCommand(f"Unknown command: {' '.join(path)}.")
+        return template, template.paths[path]
+
+
+def _split(raw: bytes):
+    """Splits serialized bytes around the markers, returns the segments and the order the markers appear in."""
+    segments, order = [raw], []
+    while True:
+        found = [(segments[-1].find(encoded), encoded) for encoded in _MARKERS]
+        found = [(index, encoded) for index, encoded in found if index != -1]
+        if not found:
+            return segments, order
+        index, encoded = min(found)
+        tail = segments.pop()
+        segments += [tail[:index], tail[index + len(encoded):]]
+        order.append(_MARKERS[encoded])
@@ -1,13 +1,16 @@
-import datetime, json, time
-import requests
+import datetime
 
 from typing import Optional, Literal, Union, Callable
 from pyloggor import pyloggor
+from requests import Session
 from random import randint
 
-from .Objects import Config, Message, Parser
+from .Objects import CommandResult, Config, Message, Parser
 from .gateway import Gateway
 from .api import API
+from .commands import CommandIndex
+from .ratelimit import RateLimiter
+from .storage import CommandStore
 
 class Core(API):
     def __init__(self,
@@ -15,20 +18,29 @@ class Core(API):
         config: Config,
         commands_data: dict,
         guild_id : Optional[int],
-        session_id : Optional[str],
         logger: pyloggor,
-        gateway: Gateway
+        gateway: Gateway,
+        session: Session,
+        command_index: Optional[CommandIndex] = None,
+        command_store: Optional[CommandStore] = None,
+        rate_limiter: Optional[RateLimiter] = None,
     ) -> None:
         self.token = config.token
         self.channel_id = config.channel_id
         self.dm_mode = config.dm_mode
         self.resource_intensivity = config.resource_intensivity
-        self.session_id = session_id
         self.commands_data = commands_data
         self.guild_id = guild_id
         self.logger = logger
         self.ws_cache = {}
         self.gateway = gateway
+        self.session = session
+        self.command_index = command_index if command_index is not None else CommandIndex(guild_id, self.channel_id)
+        if command_store is None and self.resource_intensivity == "DISK":
+            # The store is the client's, it's closed with the client and never opened twice.
+            raise ValueError("The DISK resource intensivity needs the command store of the client.")
+        self.command_store = command_store
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
 
     def _get_command_info(self, name: str) -> dict:
         """Retuns information about a given command.
@@ -45,13 +57,14 @@ class Core(API):
         if self.resource_intensivity == "MEM":
             return self.commands_data.get(name, {})
         else:
-            return json.load(open(f"{self.channel_id}_commands.json", "r+")).get(name, {})
+            return self.command_store.get(name) # type: ignore
 
     def wait_for(
         self,
-        event: Literal["MESSAGE_CREATE", "MESSAGE_UPDATE", "INTERACTION_CREATE", "INTERACTION_SUCCESS"],
+        event: Literal["MESSAGE_CREATE", "MESSAGE_UPDATE", "INTERACTION_CREATE", "INTERACTION_SUCCESS", "INTERACTION_FAILURE"],
         check: Optional[Callable[..., bool]] = None,
-        timeout: float = 10
+        timeout: float = 10,
+        since: Optional[float] = None,
     ) -> Optional[Union[Message, bool]]:
         """
         Waits for a WebSocket event to be dispatched.
@@ -63,7 +76,9 @@ class Core(API):
         is dispatched; if the event was not dispatched before the timeout duration is over,
         it returns `None`.
 
-        This function returns the **first event that meets the requirements**.
+        This function returns the **first event that meets the requirements** dispatched after it's called.
+        An event that may arrive before the call, like the reply to something just sent, can still be
+        matched by passing `since`.
 
         Example
         ---------
@@ -86,42 +101,16 @@ class Core(API):
             parameters of the event being waited for.
         timeout: Optional[`float`]
             The number of seconds to wait before timing out and returning `None`.
+        since: Optional[`float`]
+            A `time.monotonic()` reading taken before sending what the event answers, the last
+            cached event is returned if it arrived after it.
 
         Returns
         --------
         Optional[Union[Message, bool]]
             Returns the Message object, or a boolean.
         """
-        limit = time.time() + timeout
-        if check is None:
-            def _check(*args):
-                return True
-            check = _check
-
-        while time.time() < limit:
-            try:
-                cache = self.gateway.cache            
-                if event == "INTERACTION_CREATE":
-                    if check(cache.interaction_create[-1]):
-                        return True
-                if event =="INTERACTION_SUCCESS":
-                    if check(cache.interaction_success[-1]):
-                        return True
-
-                if event == "MESSAGE_CREATE":
-                    value = list(cache.message_create.values())[-1]
-                    _msg = Message(value)
-                    if check(_msg) is True:
-                        return _msg
-                if event == "MESSAGE_UPDATE":
-                    while len(cache.raw_message_updates) == 0:
-                        continue
-                    _msg = Message(cache.raw_message_updates[-1])
-                    if check(_msg) is True:
-                        return _msg
-            except:
-                pass
-        return None
+        return self.gateway.wait_for(event, check, timeout, since)
 
     # Raw commands
     def fish(self, retry_attempts:int = 3, timeout:int = 10):
@@ -273,10 +262,11 @@ class Core(API):
         cmd : Message = self.run_command("search", retry_attempts, timeout)
         if Parser.check_cooldown(cmd.embeds[0].description):
             return Parser.cooldown(cmd.embeds[0].description)
-        self.click(cmd.buttons[_location - 1])
         def check(message):
-            return message.channel_id == int(self.channel_id) and message.author.id == 270904126974590976 and "searched" in message.embeds[0].authorName
-        cmd = self.wait_for("MESSAGE_UPDATE", check=check)
+            return message.id == cmd.id and "searched" in message.embeds[0].authorName
+        cmd = self._update_from_components(check, cmd.buttons[_location - 1], timeout=timeout)
+        if cmd is None:
+            return CommandResult(False)
         return Parser.search(cmd.embeds[0].description)
         
 
@@ -312,10 +302,11 @@ class Core(API):
         cmd : Message = self.run_command("crime", retry_attempts, timeout)
         if Parser.check_cooldown(cmd.embeds[0].description):
             return Parser.cooldown(cmd.embeds[0].description)
-        self.click(cmd.buttons[_location - 1])
         def check(message):
-            return message.author.id == 270904126974590976 and "committed" in message.embeds[0].authorName
-        cmd = self.wait_for("MESSAGE_UPDATE", check=check)
+            return message.id == cmd.id and "committed" in message.embeds[0].authorName
+        cmd = self._update_from_components(check, cmd.buttons[_location - 1], timeout=timeout)
+        if cmd is None:
+            return CommandResult(False)
         return Parser.crime(cmd.embeds[0].description)
 
     def postmemes(self, retry_attempts: int = 3, timeout:int = 10, platform:Literal["discord", "reddit", "twitter", "facebook", "random"] = "random", type:Literal["fresh", "repost", "intellectual", "copypasta", "kind", "random"] = "random"):
@@ -361,9 +352,15 @@ class Core(API):
         if Parser.check_cooldown(cmd.embeds[0].description):
             return Parser.cooldown(cmd.embeds[0].description)
         def check(message):
-            return message.channel_id == int(self.channel_id) and message.author.id == 270904126974590976 and "Meme Posting Session" in message.embeds[0].authorName and "**You" in message.embeds[0].description or "No one" in message.embeds[0].description or "Do you even" in message.embeds[0].description or "Your meme" in message.embeds[0].description or "your meme" in message.embeds[0].description
-        self.select(cmd.dropdowns[0], [cmd.dropdowns[0].options[_platform].value])
-        self.select(cmd.dropdowns[1], [cmd.dropdowns[1].options[_type].value])
-        self.click(cmd.buttons[0])
-        cmd = self.wait_for("MESSAGE_UPDATE", check=check)
+            description = message.embeds[0].description
+            return message.id == cmd.id and ("**You" in description or "No one" in description or "Do you even" in description or "your meme" in description.lower())
+        cmd = self._update_from_components(
+            check,
+            (cmd.dropdowns[0], [cmd.dropdowns[0].options[_platform].value]),
+            (cmd.dropdowns[1], [cmd.dropdowns[1].options[_type].value]),
+            cmd.buttons[0],
+            timeout=timeout,
+        )
+        if cmd is None:
+            return CommandResult(False)
         return Parser.postmemes(cmd.embeds[0].description)
\ No newline at end of file
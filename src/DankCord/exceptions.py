@@ -23,4 +23,8 @@ class DataAccessFailure(DankCordException):
 
 
 class InvalidFormBody(DankCordException):
-    pass
\ No newline at end of file
+    pass
+
+
+class UnknownCommand(DankCordException):
+    pass
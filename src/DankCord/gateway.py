@@ -1,21 +1,418 @@
-import threading, time, orjson
+import random, re, threading, time, zlib, orjson
 
-from rich import print
-from typing import Optional
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
 from pyloggor import pyloggor
-from websocket import create_connection
+from websocket import ABNF, WebSocketConnectionClosedException, WebSocketException, create_connection
 
 from .exceptions import InvalidToken
-from .Objects import Cache, Config
+from .hooks import DECODE, DISPATCH, HOOKS, RECEIVE, WAIT_FOR, begin
+from .metrics import GATEWAY_EVENTS, WAIT_FOR_DURATION, track_gateway
+from .Objects import Cache, Config, Message
+from .storage import atomic_write
+
+
+GATEWAY_URL = "wss://gateway.discord.gg"
+ZLIB_SUFFIX = b"\x00\x00\xff\xff"
+# Close codes reconnecting can't get past: authentication failed, or the shard, API version or intents are invalid.
+FATAL_CLOSE_CODES = frozenset((4004, 4010, 4011, 4012, 4013, 4014))
+# Close codes after which the session can't be resumed, only a new one identified.
+NO_RESUME_CLOSE_CODES = frozenset((4007, 4009))
+# What inflating or decoding a frame raises when the stream is corrupt.
+DECODE_ERRORS = (zlib.error, orjson.JSONDecodeError, UnicodeDecodeError)
+
+
+def gateway_url(base: str, compress: bool = False) -> str:
+    """Returns the connection URL of a gateway host, asking for `zlib-stream` compression if `compress` is set."""
+    url = f"{base.rstrip('/')}/?v=9&encoding=json"
+    return f"{url}&compress=zlib-stream" if compress else url
+
+
+# The dispatch events `Core` and `API` can't work without, decoded whatever `Config.events` says.
+REQUIRED_EVENTS = ("MESSAGE_CREATE", "MESSAGE_UPDATE")
+
+
+def gateway_events(configured: Optional[Iterable[str]], default: tuple) -> tuple:
+    """Returns the dispatch events to decode: `default` if none are configured, otherwise the configured ones and `REQUIRED_EVENTS`."""
+    if not configured:
+        return default
+    return tuple(dict.fromkeys(REQUIRED_EVENTS + tuple(configured)))
+
+
+class ZlibInflator:
+    """
+    Inflates a `zlib-stream` gateway connection.
+
+    The whole connection is a single zlib stream, so one decompressor is kept for its
+    lifetime; frames are buffered until a payload ends with the zlib flush suffix.
+    """
+
+    def __init__(self) -> None:
+        self.compressed_bytes = 0
+        self.inflated_bytes = 0
+        self._buffer = bytearray()
+        self._inflator = zlib.decompressobj()
+
+    def reset(self) -> None:
+        """Starts a new stream, this must be called whenever a new connection is opened."""
+        self._buffer.clear()
+        self._inflator = zlib.decompressobj()
+
+    def feed(self, data: bytes) -> Optional[bytes]:
+        """Buffers a frame, returns the inflated payload once it is complete or `None` if more frames are needed."""
+        self.compressed_bytes += len(data)
+        self._buffer += data
+        if not self._buffer.endswith(ZLIB_SUFFIX):
+            return None
+        payload = self._inflator.decompress(self._buffer)
+        self._buffer.clear()
+        self.inflated_bytes += len(payload)
+        return payload
+
+
+class FrameDecoder:
+    """
+    Decodes gateway frames, skipping the dispatches of events that aren't listened to.
+
+    Discord writes `t`, `s` and `op` ahead of `d`, so the start of a frame is enough to tell
+    whether it's wanted. Skipped dispatches are returned as `{"op": 0, "t": ..., "s": ..., "d": None}`
+    so the sequence number is still tracked; frames that don't start as expected are fully decoded.
+    """
+
+    _DISPATCH = r'\{"t":"([A-Z0-9_]+)","s":([0-9]+),"op":0,'
+    _BYTES_DISPATCH = re.compile(_DISPATCH.encode())
+    _STR_DISPATCH = re.compile(_DISPATCH)
+
+    def __init__(self, events: Iterable[str]) -> None:
+        self.events = frozenset(events)
+        self.decoded = 0
+        self.skipped = 0
+        self.decode_time = 0.0
+
+    def decode(self, raw: Union[str, bytes]) -> dict:
+        """Decodes a frame, or returns a stub for a dispatch that isn't listened to."""
+        start = time.perf_counter()
+        match = (self._BYTES_DISPATCH if isinstance(raw, bytes) else self._STR_DISPATCH).match(raw)
+        if match:
+            name = match.group(1)
+            name = name.decode() if isinstance(name, bytes) else name
+            if name not in self.events:
+                self.skipped += 1
+                self.decode_time += time.perf_counter() - start
+                return {"op": 0, "t": name, "s": int(match.group(2)), "d": None}
+        event = orjson.loads(raw)
+        self.decoded += 1
+        self.decode_time += time.perf_counter() - start
+        return event
+
+
+class GatewayState:
+    """The states a gateway connection goes through."""
+
+    CONNECTING = "connecting"
+    IDENTIFYING = "identifying"
+    READY = "ready"
+    RESUMING = "resuming"
+    BACKOFF = "backoff"
+    # Given up: the token was rejected or the connection closed with a fatal code.
+    CLOSED = "closed"
+
+
+class Backoff:
+    """
+    Jittered exponential backoff.
+
+    The first attempt isn't delayed, the n-th retry waits a random duration
+    between 0 and `min(cap, base * 2 ** (n - 1))` seconds.
+    """
+
+    def __init__(self, base: float = 1.0, cap: float = 60.0) -> None:
+        self.base = base
+        self.cap = cap
+        self.attempts = 0
+
+    def delay(self) -> float:
+        """Returns how long to wait before the next attempt, and counts it."""
+        delay = random.uniform(0, min(self.cap, self.base * 2 ** (self.attempts - 1))) if self.attempts else 0.0
+        self.attempts += 1
+        return delay
+
+    def reset(self) -> None:
+        self.attempts = 0
+
+
+class SessionCheckpoint:
+    """
+    The gateway session saved to a JSON file, so a restarted client can resume it instead of identifying.
+
+    Every write is atomic, a crash never leaves a partial checkpoint behind. Gateways save it when
+    a session becomes ready, on every heartbeat and when they close, never while dispatching events:
+    a resume replays whatever was dispatched after the saved sequence.
+    """
+
+    FIELDS = ("session_id", "seq", "resume_gateway_url", "user_id", "guild_id", "channel_id")
+
+    def __init__(self, path: str, min_interval: float = 1.0) -> None:
+        self.path = path
+        self.min_interval = min_interval
+        self._written = 0.0
+        self._last: Optional[dict] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[dict]:
+        """Returns the saved session, or `None` if there isn't a readable one."""
+        try:
+            with open(self.path, "rb") as f:
+                state = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+        if not isinstance(state, dict) or any(field not in state for field in self.FIELDS):
+            return None
+        self._last = state
+        return state
+
+    def due(self) -> bool:
+        """Whether `min_interval` seconds passed since the last write."""
+        return time.monotonic() - self._written >= self.min_interval
+
+    def save(self, state: dict) -> bool:
+        """Atomically writes `state` if it changed since the last write, returns whether it was written."""
+        with self._lock:
+            if state == self._last:
+                return False
+            atomic_write(self.path, orjson.dumps(state))
+            self._written = time.monotonic()
+            self._last = state
+            return True
+
+
+class ChannelIndex:
+    """
+    Which guild each channel belongs to, built from the guilds of the READY event
+    and kept up to date with the GUILD_CREATE of guilds that are joined later.
+
+    Snowflakes are kept as the strings Discord sends, so neither building nor looking up the index converts IDs.
+    """
+
+    __slots__ = ("guilds",)
+
+    def __init__(self, guilds: Optional[Dict[str, str]] = None) -> None:
+        self.guilds: Dict[str, str] = guilds or {}
+
+    def __len__(self) -> int:
+        return len(self.guilds)
+
+    def load(self, guilds: list) -> None:
+        """Indexes the channels of guilds, taking each guild out of `guilds` so it's freed once it's read."""
+        index = self.guilds
+        while guilds:
+            guild = guilds.pop()
+            guild_id = guild["id"]
+            for channel in guild.get("channels", ()):
+                index[channel["id"]] = guild_id
+
+    def guild_of(self, channel_id) -> Optional[str]:
+        """Returns the ID of the guild a channel belongs to, or `None` if it isn't in a known guild."""
+        return self.guilds.get(str(channel_id))
 
 
 class GatewayInternal:
     def __init__(self) -> None:
         self.s = 0
         self.resume_gateway_url = ""
+        self.heartbeat_sent = 0.0
+        self.heartbeat_acked = 0.0
+        self.ack_pending = False
+        self.latencies: deque = deque(maxlen=5)
+
+    @property
+    def latency(self) -> float:
+        """The average round trip of the last few heartbeats, in seconds, `inf` before the first ACK."""
+        return sum(self.latencies) / len(self.latencies) if self.latencies else float("inf")
+
+    def heartbeat(self) -> bytes:
+        """Records a heartbeat being sent and returns its payload."""
+        self.heartbeat_sent = time.perf_counter()
+        self.ack_pending = True
+        return orjson.dumps({"op": 1, "d": self.s or None})
+
+    def ack(self) -> None:
+        """Records a heartbeat ACK."""
+        self.heartbeat_acked = time.perf_counter()
+        if self.ack_pending:
+            self.latencies.append(self.heartbeat_acked - self.heartbeat_sent)
+        self.ack_pending = False
+
+
+class EventWaiter:
+    """
+    A single pending `wait_for` call, resolved by the events listener.
+    """
+
+    def __init__(self, check: Callable[..., bool]) -> None:
+        self.check = check
+        self.result: Any = None
+        self._done = threading.Event()
+
+    def offer(self, value: Any) -> bool:
+        """Runs the check against a `Message` or a nonce and resolves the waiter if it passes.
+
+        Message events resolve with the `Message` itself, interaction events with `True`.
+        """
+        try:
+            if not self.check(value):
+                return False
+        except Exception:
+            return False
+        self.resolve(value if isinstance(value, Message) else True)
+        return True
+
+    def resolve(self, result: Any) -> None:
+        """Resolves the waiter with `result`, waking up the thread waiting on it."""
+        self.result = result
+        self._done.set()
+
+    def wait(self, timeout: Optional[float]) -> Any:
+        """Blocks until the waiter is resolved or `timeout` seconds pass, returns the result or `None`."""
+        self._done.wait(timeout)
+        return self.result
+
+
+class BaseGateway:
+    """
+    What `Gateway` and `AsyncGateway` share: the session, its checkpoint, READY and resume bookkeeping.
+
+    None of it touches the websocket, so it's the same whether the connection is blocking or asyncio.
+    """
+
+    EVENTS = ("MESSAGE_CREATE", "MESSAGE_UPDATE", "INTERACTION_CREATE", "INTERACTION_SUCCESS", "INTERACTION_FAILURE")
+    # How long each step of connecting, identifying or resuming may wait on the gateway.
+    HANDSHAKE_TIMEOUT = 30
+    # Failed resumes in a row after which a new session is identified instead.
+    MAX_RESUME_ATTEMPTS = 3
+
+    @property
+    def state(self) -> str:
+        """The `GatewayState` the connection is in."""
+        return self._state
+
+    @state.setter
+    def state(self, value: str) -> None:
+        self._state = value
+        if value == GatewayState.READY:
+            self._ready.set()
+        else:
+            self._ready.clear()
+
+    @property
+    def latency(self) -> float:
+        """The average heartbeat round trip of the last few heartbeats, in seconds."""
+        return self.internal.latency
+
+    def _session_state(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "seq": self.internal.s,
+            "resume_gateway_url": self.internal.resume_gateway_url,
+            "user_id": self.user_id,
+            "guild_id": self.guild_id,
+            "channel_id": self.channel_id,
+        }
+
+    def _checkpoint(self, force: bool = False) -> None:
+        """Saves the session checkpoint, at most once every `min_interval` seconds unless `force` is set."""
+        if self.checkpoint is not None and self.session_id and (force or self.checkpoint.due()):
+            self.checkpoint.save(self._session_state())
+
+    def _mark(self, phase: str) -> None:
+        """Records how long `phase` of the last connection took, since the previous phase ended."""
+        now = time.perf_counter()
+        self.timings[phase] = now - self._phase_start
+        self._phase_start = now
+
+    def _read_ready(self, ready: dict) -> None:
+        """Caches what the READY event says about the session, dropping the rest of the payload as soon as it's read.
+
+        Only the user, the session and the channel index are kept, the guilds are indexed one by one
+        and everything else READY carries (relationships, read states, private channels...) is freed right away.
+        """
+        self.internal.s = ready["s"]
+        data = ready.pop("d")
+        guilds = data.pop("guilds", None) or []
+        self.user_id = int(data["user"]["id"])
+        self.session_id = data["session_id"]
+        self.internal.resume_gateway_url = data["resume_gateway_url"]
+        data.clear()
+
+        if self.dm_mode:
+            return
+        self.logger.log(level="Debug", msg="Indexing guild channels.")
+        self.channels = ChannelIndex()
+        self.channels.load(guilds)
+        self.guild_id = self.channels.guild_of(self.channel_id) # type: ignore
+        if self.guild_id is not None:
+            self.logger.log(level="Debug", msg="Found guild ID.")
+
+    def _decoded_events(self) -> tuple:
+        """The events the frame decoder decodes: the listened to ones, and GUILD_CREATE to keep the channel index up to date."""
+        return self.events if self.dm_mode or "GUILD_CREATE" in self.events else self.events + ("GUILD_CREATE",)
+
+    def _guild_created(self, guild: dict) -> None:
+        """Indexes the channels of a guild from its GUILD_CREATE, looking for the configured channel if it wasn't found yet."""
+        self.channels.load([guild])
+        if self.guild_id is None:
+            self.guild_id = self.channels.guild_of(self.channel_id) # type: ignore
+            if self.guild_id is not None:
+                self.logger.log(level="Debug", msg="Found guild ID.")
+
+    def _can_resume(self) -> bool:
+        """Whether the session is worth resuming: the last close allows it and it hasn't failed to resume too often in a row."""
+        if not (self.session_id and self.internal.resume_gateway_url) or self.close_code in NO_RESUME_CLOSE_CODES:
+            return False
+        if self._resume_attempts >= self.MAX_RESUME_ATTEMPTS:
+            self.logger.log(
+                level="Warning", msg=f"Failed to resume {self._resume_attempts} times in a row, identifying a new session."
+            )
+            return False
+        return True
+
+    def _zombie(self) -> bool:
+        """Whether the last heartbeat of a ready connection went unacknowledged.
+
+        Handshakes and recoveries send their own heartbeat and wait for its ACK themselves,
+        so the heartbeat loop only judges the connection while it is ready.
+        """
+        return self.state == GatewayState.READY and self.internal.ack_pending
+
+    def _resumed(self) -> None:
+        """Logs a resume once RESUMED confirms it."""
+        if self._resuming_since is not None:
+            self.logger.log(
+                level="Info", msg=f"Resumed in {round(time.perf_counter() - self._resuming_since, 3)} seconds."
+            )
+            self._resuming_since = None
+
+    def _undecodable(self, error: Exception) -> None:
+        """Gives up on a connection that sent a frame which couldn't be inflated or decoded.
+
+        A corrupt zlib stream fails on every later frame too, so the inflator is reset and
+        `recv_handler` reports the connection as lost, which makes the listener recover it.
+        """
+        self.logger.log(level="Warning", msg=f"Failed to decode a gateway frame, reconnecting: {error!r}.")
+        if self.inflator is not None:
+            self.inflator.reset()
 
+    def _check_event(self, event: str) -> None:
+        if event not in self._waiters:
+            raise ValueError(f"{event} isn't decoded by this gateway, add it to Config.events to wait for it.")
 
-class Gateway:
+    @property
+    def confirms_components(self) -> bool:
+        """Whether component interactions can be confirmed, which needs the INTERACTION_SUCCESS event."""
+        return "INTERACTION_SUCCESS" in self.events
+
+
+class Gateway(BaseGateway):
     def __init__(self, config: Config, logger: pyloggor) -> None:
         logger.log(level="Debug", msg="Booting up gateway instance.")
         self.token = config.token
@@ -23,38 +420,203 @@ class Gateway:
 
         self.channel_id = config.channel_id
         self.dm_mode = config.dm_mode
+        self.compress = config.compress
+        self.events = gateway_events(config.events, self.EVENTS)
 
         self.session_id: Optional[str] = None
         self.user_id: Optional[int] = None
         self.guild_id: Optional[int] = None
+        self.channels: ChannelIndex = ChannelIndex()
 
         self.internal: GatewayInternal = GatewayInternal()
-        self.cache: Cache = Cache()
-        self.pause = False
+        self.cache: Cache = Cache(config.cache_max_size, config.cache_ttl)
+        self.inflator: Optional[ZlibInflator] = ZlibInflator() if self.compress else None
+        self.decoder: FrameDecoder = FrameDecoder(self._decoded_events())
+        self._running = threading.Event()
+        self._heartbeat_timer = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self.state: str = GatewayState.CONNECTING
+        self.backoff: Backoff = Backoff()
+        self.timings: Dict[str, float] = {}
+        self._phase_start = 0.0
+        self.checkpoint: Optional[SessionCheckpoint] = SessionCheckpoint(config.session_file) if config.session_file else None
+        # The code of the last close frame the gateway sent, `None` until the connection is closed by Discord.
+        self.close_code: Optional[int] = None
+        self._resume_attempts = 0
+        self._resuming_since: Optional[float] = None
+        self._closing = False
+
+        self._waiters: Dict[str, List[EventWaiter]] = {event: [] for event in self.events}
+        self._waiters_lock = threading.Lock()
+        self.pending_interactions: Dict[str, EventWaiter] = {}
+        self.pending_components: Dict[str, EventWaiter] = {}
+        track_gateway(self)
 
         self.__boot_ws()
 
+    @property
+    def pause(self) -> bool:
+        """Whether the heartbeat loop is paused, it sleeps without a timeout until it's resumed."""
+        return not self._running.is_set()
+
+    @pause.setter
+    def pause(self, value: bool) -> None:
+        if value:
+            self._running.clear()
+        else:
+            self._running.set()
+        self._heartbeat_timer.set()
+
+    def close(self) -> None:
+        """Saves the session checkpoint, stops the heartbeat loop and the events listener, and closes the websocket."""
+        if self.state == GatewayState.READY:
+            self._checkpoint(force=True)
+        self._closing = True
+        self.state = GatewayState.CLOSED
+        self._running.set()
+        self._heartbeat_timer.set()
+        self._close()
+
     def heartbeat(self):
         self.logger.log(level="Debug", msg="Booted up discord heartbeat loop.")
         self.pause = False
         while True:
-            if not self.pause:
-                time.sleep(self.heartbeat_interval)
-                self.ws.send(orjson.dumps({"op": 1, "d": None}))
+            self._running.wait()
+            if self._closing:
+                return
+            self._heartbeat_timer.clear()
+            if self._heartbeat_timer.wait(self.heartbeat_interval) or self.pause:
+                continue
+            if self._zombie():
+                self.logger.log(
+                    level="Warning",
+                    msg=f"No heartbeat ACK in {round(time.perf_counter() - self.internal.heartbeat_sent, 3)} seconds, resuming.",
+                )
+                self.internal.ack_pending = False
+                self.pause = True
+                self._close()
+                continue
+            try:
+                self.ws.send(self.internal.heartbeat())
+                self._checkpoint(force=True)
+            except Exception as e:
+                self.logger.log(level="Error", msg=f"heartbeat function in gateway.py: {e}.")
 
-    def recv_handler(self):
+    def recv_handler(self, selective: bool = False):
+        """Receives and decodes a frame, returns `None` if the connection is lost or its stream can't be decoded."""
+        span = None
         try:
-            event = self.ws.recv()
+            event = self._recv()
+            span = begin(RECEIVE) if HOOKS else None
+            if self.inflator is not None:
+                event = self.inflator.feed(event)
+                while event is None:
+                    event = self.inflator.feed(self._recv())
+            if span is not None:
+                span.end()
+                span = begin(DECODE)
+            if selective:
+                return self.decoder.decode(event)
             data = orjson.loads(event)
             return data
-        except:
-            return False
+        except (WebSocketException, OSError):
+            return None
+        except DECODE_ERRORS as e:
+            self._undecodable(e)
+            return None
+        finally:
+            if span is not None:
+                span.end()
+
+    def _recv(self) -> bytes:
+        """Receives a data frame, recording the close code if the gateway closed the connection instead."""
+        opcode, data = self.ws.recv_data()
+        if opcode == ABNF.OPCODE_CLOSE:
+            self.close_code = int.from_bytes(data[:2], "big") if len(data) >= 2 else None
+            raise WebSocketConnectionClosedException(f"The gateway closed the connection with code {self.close_code}.")
+        return data
+
+    def _connect(self, base: str):
+        """Opens a websocket connection to a gateway host, starting a new zlib stream if compression is enabled."""
+        self.close_code = None
+        if self.inflator is not None:
+            self.inflator.reset()
+        return create_connection(gateway_url(base, self.compress))
+
+    def _close(self) -> None:
+        """Closes the current websocket connection, ignoring a connection that is already dead."""
+        try:
+            self.ws.close()
+        except Exception:
+            pass
 
     def __boot_ws(self):
         start = time.perf_counter()
+        saved_session = self.checkpoint.load() if self.checkpoint is not None else None
+        if self._resume_checkpoint(saved_session):
+            resumed = self.session_id == saved_session["session_id"] # type: ignore
+            self.logger.log(
+                level="Info",
+                msg=f"{'Resumed the saved gateway session' if resumed else 'Connected to gateway'} in {round(time.perf_counter() - start, 3)} seconds.",
+            )
+            return
+        if not self._handshake(GATEWAY_URL) or not self._identify():
+            return False
+        end = time.perf_counter()
+
+        self._start_listener()
+        self.logger.log(level="Info", msg=f"Connected to gateway in {round(end - start, 3)} seconds.")
+
+    def _start_listener(self) -> None:
+        thread = threading.Thread(target=self._events_listener)
+        thread.daemon = True
+        thread.start()
+
+    def _resume_checkpoint(self, state: Optional[dict]) -> bool:
+        """Resumes a session saved in the checkpoint, if it was saved for this channel.
+
+        The events listener handles the outcome: RESUMED makes the gateway ready, an invalid
+        session makes it identify. Either way, this waits until the gateway is ready.
+
+        Returns
+        --------
+        resumed: bool
+            `False` if there was nothing to resume or the resume gateway couldn't be reached.
+        """
+        if not state or str(state["channel_id"]) != str(self.channel_id):
+            return False
+
+        self.logger.log(level="Debug", msg="Resuming the saved gateway session.")
+        self.session_id = state["session_id"]
+        self.internal.s = state["seq"]
+        self.internal.resume_gateway_url = state["resume_gateway_url"]
+        self.user_id = state["user_id"]
+        self.guild_id = state["guild_id"]
+        try:
+            resumed = self.reconnect_ws()
+        except Exception as e:
+            self.logger.log(level="Error", msg=f"_resume_checkpoint function in gateway.py: {e}.")
+            resumed = False
+        if not resumed:
+            self._close()
+            return False
+
+        self._start_listener()
+        if not self._ready.wait(self.HANDSHAKE_TIMEOUT):
+            self.logger.log(level="Warning", msg="The saved gateway session isn't ready yet.")
+        self._mark("ready")
+        return True
+
+    def _handshake(self, base: str) -> bool:
+        """Connects to a gateway host, waits for its hello and starts heartbeating."""
+        self.state = GatewayState.CONNECTING
+        self.internal.ack_pending = False
         self.logger.log(level="Debug", msg="Booting up websocket client.")
-        ws = create_connection("wss://gateway.discord.gg/?v=9&encoding=json")
-        self.ws = ws
+        self._phase_start = time.perf_counter()
+        self.ws = self._connect(base)
+        self._mark("connect")
+        self.ws.settimeout(self.HANDSHAKE_TIMEOUT)
 
         hello = self.recv_handler()
         if not hello:
@@ -63,17 +625,18 @@ class Gateway:
 
         self.heartbeat_interval = hello["d"]["heartbeat_interval"] / 1000
         self.logger.log(level="Debug", msg="Received gateway hello event.")
+        self._mark("hello")
 
-        self.ws.send(orjson.dumps({"op": 1, "d": None}))
+        self.ws.send(self.internal.heartbeat())
         heartbeat_init = self.recv_handler()
         if not heartbeat_init:
             self.logger.log(level="Critical", msg="Discord heartbeat loop failed to boot.")
             return False
 
         if heartbeat_init["op"] == 11:
-            pass
+            self.internal.ack()
         elif heartbeat_init["op"] == 1:
-            self.ws.send(orjson.dumps({"op": 1, "d": None}))
+            self.ws.send(self.internal.heartbeat())
             heartbeat_init_2 = self.recv_handler()
             if not heartbeat_init_2:
                 self.logger.log(level="Critical", msg="Discord heartbeat loop failed to boot.")
@@ -81,13 +644,22 @@ class Gateway:
             if heartbeat_init_2["op"] != 11:
                 self.logger.log(level="Critical", msg="Unhandled OP response while booting discord heartbeat loop.")
                 return False
+            self.internal.ack()
         else:
             self.logger.log(level="Critical", msg="Unhandled OP response while booting discord heartbeat loop.")
             return False
 
-        threading.Thread(target=self.heartbeat).start()
+        if self._heartbeat_thread is None or not self._heartbeat_thread.is_alive():
+            self._heartbeat_thread = threading.Thread(target=self.heartbeat)
+            self._heartbeat_thread.start()
+        else:
+            self.pause = False
+        return True
 
-        ws.send(
+    def _identify(self) -> bool:
+        """Identifies a new session and caches what the READY event says about it."""
+        self.state = GatewayState.IDENTIFYING
+        self.ws.send(
             orjson.dumps(
                 {
                     "op": 2,
@@ -102,8 +674,14 @@ class Gateway:
                 }
             )
         )
+        self._mark("identify")
 
         identify = self.recv_handler()
+        if identify is None:
+            if self.close_code == 4004:
+                raise InvalidToken("Invalid Discord account token used.") # type: ignore
+            self.logger.log(level="Critical", msg="Lost the gateway connection while identifying.")
+            return False
         if not identify:
             raise InvalidToken("Invalid Discord account token used.") # type: ignore
 
@@ -115,89 +693,283 @@ class Gateway:
             )
             return False
 
-        self.internal.s = identify["s"]
-
-        end = time.perf_counter()
-
-        if not self.dm_mode:
-            self.logger.log(level="Debug", msg="Caching guild ID")
-            for guild in identify["d"]["guilds"]:
-                for channel in guild.get("channels", []):
-                    if int(channel["id"]) == int(self.channel_id):
-                        self.logger.log(level="Debug", msg="Found guild ID.")
-                        self.guild_id = guild["id"]
-                        break
-
-        self.user_id = int(identify["d"]["user"]["id"])
-        self.session_id = identify["d"]["session_id"]
-        self.internal.resume_gateway_url = identify["d"]["resume_gateway_url"]
-
-        thread = threading.Thread(target=self._events_listener)
-        thread.daemon = True
-        thread.start()
-        self.logger.log(level="Info", msg=f"Connected to gateway in {round(end - start, 3)} seconds.")
-
-    def reconnect_ws(self):
+        self._read_ready(identify)
+        self.ws.settimeout(None)
+        self.state = GatewayState.READY
+        self.backoff.reset()
+        self._resume_attempts = 0
+        self._checkpoint(force=True)
+        self._mark("ready")
+        return True
+
+    def reconnect_ws(self) -> bool:
+        """Connects to the resume gateway and resumes the session, the RESUMED event moves it back to ready."""
         self.logger.log(level="Info", msg="Reconnecting websocket client.")
-        ws = create_connection(self.internal.resume_gateway_url)
-        self.ws = ws
+        if not self._handshake(self.internal.resume_gateway_url):
+            return False
+        self.state = GatewayState.RESUMING
         self.ws.send(
             orjson.dumps({"op": 6, "d": {"token": self.token, "session_id": self.session_id, "seq": self.internal.s}})
         )
+        self._mark("identify")
+        self.ws.settimeout(None)
+        return True
+
+    def _recover(self, resume: bool = True) -> bool:
+        """Reconnects until the session is resumed, or a new one is identified when it can't be.
+
+        Every attempt after the first waits for the next backoff delay, the delays only
+        reset once the gateway is ready again, so a connection that keeps dropping backs off too.
+        A session is resumed at most `MAX_RESUME_ATTEMPTS` times in a row before a new one is identified,
+        and a fatal close code ends the recovery right away.
+
+        Returns
+        --------
+        recovered: bool
+            `False` if the gateway gave up: the token was rejected or the connection closed with a fatal code.
+        """
+        self.pause = True
+        self.state = GatewayState.CONNECTING
+        self._close()
+        start = time.perf_counter()
+        attempts = 0
+        while True:
+            if self.close_code in FATAL_CLOSE_CODES:
+                self.logger.log(level="Critical", msg=f"The gateway closed the connection with code {self.close_code}, giving up.")
+                self.state = GatewayState.CLOSED
+                return False
+            resume = resume and self._can_resume()
 
-        thread = threading.Thread(target=self._events_listener)
-        thread.daemon = True
-        thread.start()
-        self.pause = False
+            delay = self.backoff.delay()
+            if delay:
+                self.state = GatewayState.BACKOFF
+                self.logger.log(level="Info", msg=f"Reconnecting in {round(delay, 3)} seconds.")
+                time.sleep(delay)
+
+            attempts += 1
+            try:
+                if resume:
+                    self._resume_attempts += 1
+                    recovered = self.reconnect_ws()
+                else:
+                    recovered = self._handshake(GATEWAY_URL) and self._identify()
+            except InvalidToken:
+                self.logger.log(level="Critical", msg="Discord rejected the token while reconnecting, giving up.")
+                self.state = GatewayState.CLOSED
+                return False
+            except Exception as e:
+                self.logger.log(level="Error", msg=f"_recover function in gateway.py: {e}.")
+                recovered = False
+
+            if recovered and resume:
+                # Only sent, the events listener logs the resume once RESUMED arrives.
+                self.logger.log(level="Debug", msg=f"Sent a resume after {attempts} attempt(s).")
+                self._resuming_since = start
+                return True
+            if recovered:
+                self._resuming_since = None
+                self.logger.log(
+                    level="Info",
+                    msg=f"Re-identified after {attempts} attempt(s) in {round(time.perf_counter() - start, 3)} seconds.",
+                )
+                return True
+            self._close()
+
+    def wait_for(
+        self, event: str, check: Optional[Callable[..., bool]] = None, timeout: Optional[float] = 10, since: Optional[float] = None
+    ) -> Any:
+        """Blocks until the events listener dispatches an `event` that passes `check`.
+
+        Only events dispatched after the call are matched, unless `since` lets a recently cached one through.
+
+        Parameters
+        --------
+        event: str
+            The event name.
+        check: Optional[Callable[..., `bool`]]
+            A predicate that receives a `Message` for message events, or a nonce for interaction events.
+        timeout: Optional[`float`]
+            The number of seconds to wait before giving up.
+        since: Optional[`float`]
+            A `time.monotonic()` reading, usually taken right before sending what the event answers.
+            The last cached event is returned right away if it arrived after it, otherwise only
+            events dispatched after the call are matched.
+
+        Returns
+        --------
+        Optional[Union[`Message`, `bool`]]
+        """
+        self._check_event(event)
+        start = time.perf_counter()
+        span = begin(WAIT_FOR, event) if HOOKS else None
+        waiter = EventWaiter(check or (lambda *args: True))
+        try:
+            with self._waiters_lock:
+                latest = self.cache.latest(event, since) if since is not None else None
+                if latest is not None and waiter.offer(Message(latest) if isinstance(latest, dict) else latest):
+                    return waiter.result
+                self._waiters[event].append(waiter)
+            return waiter.wait(timeout)
+        finally:
+            self.forget(event, waiter)
+            WAIT_FOR_DURATION.observe(time.perf_counter() - start, event)
+            if span is not None:
+                span.end()
+
+    def expect(self, event: str, check: Optional[Callable[..., bool]] = None) -> EventWaiter:
+        """Registers a waiter for the next `event` that passes `check`, without blocking.
+
+        Unlike `wait_for`, the waiter is registered before whatever triggers the event is sent,
+        so the event can't be missed. It must be paired with `forget`.
+
+        Returns
+        --------
+        waiter: `EventWaiter`
+        """
+        self._check_event(event)
+        waiter = EventWaiter(check or (lambda *args: True))
+        with self._waiters_lock:
+            self._waiters[event].append(waiter)
+        return waiter
+
+    def forget(self, event: str, waiter: EventWaiter) -> None:
+        """Removes a waiter of `event`, if it is still waiting."""
+        with self._waiters_lock:
+            if waiter in self._waiters[event]:
+                self._waiters[event].remove(waiter)
+
+    def expect_interaction(self, nonce: str) -> EventWaiter:
+        """Registers `nonce` so the MESSAGE_CREATE carrying it is handed straight to the returned waiter.
+
+        This must be called before the interaction is sent, and paired with `forget_interaction`.
+
+        Parameters
+        --------
+        nonce: str
+            The nonce of the interaction about to be sent.
+
+        Returns
+        --------
+        waiter: `EventWaiter`
+        """
+        waiter = EventWaiter(lambda *args: True)
+        with self._waiters_lock:
+            self.pending_interactions[nonce] = waiter
+        return waiter
+
+    def forget_interaction(self, nonce: str) -> None:
+        """Removes `nonce` from the pending interactions, if it is still there."""
+        with self._waiters_lock:
+            self.pending_interactions.pop(nonce, None)
+
+    def expect_component(self, nonce: str) -> EventWaiter:
+        """Registers `nonce` so the INTERACTION_SUCCESS or INTERACTION_FAILURE carrying it resolves the returned waiter.
+
+        The waiter resolves with `True` on success and `False` on failure. This must be called
+        before the component interaction is sent, and paired with `forget_component`.
+
+        Parameters
+        --------
+        nonce: str
+            The nonce of the component interaction about to be sent.
+
+        Returns
+        --------
+        waiter: `EventWaiter`
+        """
+        waiter = EventWaiter(lambda *args: True)
+        with self._waiters_lock:
+            self.pending_components[nonce] = waiter
+        return waiter
+
+    def forget_component(self, nonce: str) -> None:
+        """Removes `nonce` from the pending components, if it is still there."""
+        with self._waiters_lock:
+            self.pending_components.pop(nonce, None)
+
+    def _dispatch(self, event: str, data: Any) -> None:
+        """Resolves every waiter of `event` whose check passes. Must be called with the waiters lock held."""
+        waiters = self._waiters[event]
+        if not waiters:
+            return
+        value = Message(data) if isinstance(data, dict) else data
+        self._waiters[event] = [waiter for waiter in waiters if not waiter.offer(value)]
 
     def _events_listener(self):
         self.logger.log(level="Debug", msg="Events listener is now listening.")
         while True:
-            event = self.recv_handler()
+            event = self.recv_handler(selective=True)
+            if event is None:
+                if self._closing:
+                    return
+                self.logger.log(level="Warning", msg=f"Lost the gateway connection (close code {self.close_code}).")
+                if not self._recover():
+                    return
+                continue
             if not event:
                 continue
             
+            span = begin(DISPATCH, event.get("t")) if HOOKS else None
             try:
                 if event["op"] == 0:
                     self.internal.s = event["s"]
+                    GATEWAY_EVENTS.inc(event["t"])
+                    if event["t"] in ("READY", "RESUMED"):
+                        self.state = GatewayState.READY
+                        self.backoff.reset()
+                        self._resume_attempts = 0
+                        if event["t"] == "RESUMED":
+                            self._resumed()
+                        self._checkpoint(force=True)
 
                 elif event["op"] == 7 or (event["op"] == 9 and event["d"]):
-                    self.reconnect_ws()
-                    return
+                    if not self._recover():
+                        return
+                    continue
                 elif event["op"] == 1:
-                    self.ws.send(orjson.dumps({"op": 1, "d": None}))
+                    self.ws.send(self.internal.heartbeat())
+                    continue
+                elif event["op"] == 11:
+                    self.internal.ack()
+                    continue
+                elif event["op"] == 10:
+                    self.heartbeat_interval = event["d"]["heartbeat_interval"] / 1000
                     continue
                 elif event["op"] == 9 and not event["d"]:
+                    # The session can't be resumed, Discord asks for a 1 to 5 seconds wait before identifying again.
                     self.pause = True
-                    self.__boot_ws()
-                    return
+                    self.state = GatewayState.BACKOFF
+                    time.sleep(random.uniform(1, 5))
+                    if not self._recover(resume=False):
+                        return
+                    continue
 
                 if not event["d"]:
                     continue
                 if event["t"] == "MESSAGE_ACK":
                     continue
+                if event["t"] == "GUILD_CREATE" and not self.dm_mode:
+                    self._guild_created(event["d"])
 
-                if event["t"] not in ("MESSAGE_CREATE", "MESSAGE_UPDATE", "INTERACTION_CREATE", "INTERACTION_SUCCESS"):
+                if event["t"] not in self.events:
                     continue
                 
-                if event["t"] == "INTERACTION_CREATE":
-                    self.cache.interaction_create.append(event["d"]["nonce"])
-                elif event["t"] == "INTERACTION_SUCCESS":
-                    self.cache.interaction_success.append(event["d"]["nonce"])
-                elif event["t"] == "MESSAGE_CREATE":
-                    try:
-                        self.cache.message_create[event["d"]["nonce"]] = event["d"]
-                        self.cache.nonce_message_map[event["d"]["nonce"]] = event["d"]["id"]
-                    except:
-                        pass
-                elif event["t"] == "MESSAGE_UPDATE":
-                    if event["d"]["id"] not in self.cache.message_updates:
-                        self.cache.message_updates[event["d"]["id"]] = []
-                    self.cache.message_updates[event["d"]["id"]].append(event["d"])
-                    self.cache.raw_message_updates.append(event["d"])
-                else:
-                    print("----------------- DEBUG START -----------------")
-                    print(event)
-                    print("----------------- DEBUG END -----------------")
+                with self._waiters_lock:
+                    self.cache.store(event["t"], event["d"])
+                    if event["t"] == "MESSAGE_CREATE":
+                        pending = self.pending_interactions.pop(event["d"].get("nonce"), None)
+                        if pending:
+                            pending.resolve(Message(event["d"]))
+                    elif event["t"] in ("INTERACTION_SUCCESS", "INTERACTION_FAILURE"):
+                        pending = self.pending_components.pop(event["d"].get("nonce"), None)
+                        if pending:
+                            pending.resolve(event["t"] == "INTERACTION_SUCCESS")
+                    if event["t"].startswith("INTERACTION_"):
+                        self._dispatch(event["t"], event["d"]["nonce"])
+                    else:
+                        self._dispatch(event["t"], event["d"])
             except Exception as e:
-                self.logger.log(level="Error", msg=f"_events_listener function in gateway.py: {e}.")
\ No newline at end of file
+                self.logger.log(level="Error", msg=f"_events_listener function in gateway.py: {e}.")
+            finally:
+                if span is not None:
+                    span.end()
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+Profiling hooks, told when a stage of the hot paths begins and how long it took.
+
+    class Tracer(Hook):
+        def end(self, stage, info, elapsed):
+            print(stage, info, elapsed)
+
+    add_hook(Tracer())
+
+Every stage checks `HOOKS` before doing anything, so with no hooks registered a stage only costs
+that check. Hooks are called on the thread (or event loop) the stage runs on, and must be quick.
+"""
+import functools, threading
+
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+
+# A frame read from the websocket, inflated if the gateway is compressed. It starts once the frame arrived,
+# waiting for it isn't included.
+RECEIVE = "gateway.receive"
+# A frame decoded from JSON.
+DECODE = "gateway.decode"
+# A dispatch handled by the events listener, info is the event name.
+DISPATCH = "gateway.dispatch"
+# A `wait_for` call, from the moment it starts waiting until it returns. Info is the event name.
+WAIT_FOR = "wait_for"
+# A `Message` built from its payload.
+MESSAGE = "message"
+# A REST request, info is its route like `POST /interactions`.
+REST = "rest"
+# `Parser` calls are stages named after the parser, like `parser.search`.
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Hook:
+    """
+    Receives the stages, override `begin`, `end` or both.
+
+    Exceptions raised by a hook are ignored, so a broken tracer can't break the gateway.
+    """
+
+    def begin(self, stage: str, info: Any) -> None:
+        pass
+
+    def end(self, stage: str, info: Any, elapsed: float) -> None:
+        pass
+
+
+# The registered hooks. It's replaced in place and never rebound, modules import it by name.
+HOOKS: List[Hook] = []
+_lock = threading.Lock()
+
+
+def add_hook(hook: Hook) -> Hook:
+    """Registers a hook, it receives every stage that begins from now on."""
+    with _lock:
+        HOOKS[:] = HOOKS + [hook]
+    return hook
+
+
+def remove_hook(hook: Hook) -> None:
+    """Unregisters a hook, stages that already began still end on it."""
+    with _lock:
+        HOOKS[:] = [registered for registered in HOOKS if registered is not hook]
+
+
+class Span:
+    """
+    A stage in progress, `end` must be called once it's over.
+
+    Start one with `begin(stage, info) if HOOKS else None`, so nothing is built when there are no hooks.
+    """
+
+    __slots__ = ("stage", "info", "hooks", "start")
+
+    def __init__(self, stage: str, info: Any = None) -> None:
+        self.stage = stage
+        self.info = info
+        # The stage ends on the hooks it began on, even if hooks are added or removed meanwhile.
+        self.hooks = tuple(HOOKS)
+        for hook in self.hooks:
+            try:
+                hook.begin(stage, info)
+            except Exception:
+                pass
+        self.start = perf_counter()
+
+    def end(self) -> float:
+        """Reports the stage's duration to its hooks and returns it."""
+        elapsed = perf_counter() - self.start
+        for hook in self.hooks:
+            try:
+                hook.end(self.stage, self.info, elapsed)
+            except Exception:
+                pass
+        return elapsed
+
+
+begin = Span
+
+
+def profiled(stage: str) -> Callable[[F], F]:
+    """Makes every call of the decorated function a stage, for functions without a single hot call site like the parsers.
+
+    With no hooks registered the wrapper only checks `HOOKS` before calling the function.
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not HOOKS:
+                return func(*args, **kwargs)
+            span = Span(stage)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                span.end()
+
+        return wrapper # type: ignore
+
+    return decorator
+
+
+class StageTimer(Hook):
+    """
+    Adds up how often each stage ran and how long it took, to find where time goes.
+
+        timer = add_hook(StageTimer())
+        bot.core.search()
+        print(timer.report())
+    """
+
+    def __init__(self) -> None:
+        # Stage: [count, total seconds, longest seconds]
+        self.stages: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def end(self, stage: str, info: Any, elapsed: float) -> None:
+        with self._lock:
+            totals = self.stages.get(stage)
+            if totals is None:
+                totals = self.stages[stage] = [0, 0.0, 0.0]
+            totals[0] += 1
+            totals[1] += elapsed
+            if elapsed > totals[2]:
+                totals[2] = elapsed
+
+    def report(self) -> Dict[str, Tuple[int, float, float]]:
+        """Returns the count, total and longest duration of every stage, the most time consuming first."""
+        with self._lock:
+            stages = [(stage, (int(count), total, longest)) for stage, (count, total, longest) in self.stages.items()]
+        return dict(sorted(stages, key=lambda item: item[1][1], reverse=True))
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages.clear()
@@ -0,0 +1,298 @@
+import bisect, math, threading, weakref
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from pyloggor import pyloggor
+
+from .storage import atomic_write
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """
+    A metric family, one value (or histogram) per combination of label values.
+    """
+
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, values: Tuple[str, ...]) -> Tuple[str, ...]:
+        if len(values) != len(self.labels):
+            raise ValueError(f"{self.name} takes the labels {', '.join(self.labels) or 'nothing'}.")
+        return values
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {_escape(self.documentation)}\n# TYPE {self.name} {self.TYPE}\n"
+        return header + "".join(f"{sample}\n" for sample in self.samples())
+
+
+class Counter(Metric):
+    """A value that only goes up, like the number of requests sent."""
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Adds `amount` to the counter of the given label values."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_labels(self.labels, key)} {_number(value)}" for key, value in values]
+
+
+class Gauge(Metric):
+    """A value that goes up and down, like a cache size."""
+
+    TYPE = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_labels(self.labels, key)} {_number(value)}" for key, value in values]
+
+
+class Histogram(Metric):
+    """Observed durations counted into buckets, like command round trips."""
+
+    TYPE = "histogram"
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(
+        self, name: str, documentation: str, labels: Iterable[str] = (), buckets: Iterable[float] = BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Label values: [count of each bucket, not cumulative..., sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * len(self.buckets) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def count(self, *labels: str) -> int:
+        counts = self._values.get(labels)
+        return int(sum(counts[:-1])) if counts else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts)) for key, counts in self._values.items()]
+        samples = []
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket = _labels(self.labels, key, 'le="' + _number(bound) + '"')
+                samples.append(f"{self.name}_bucket{bucket} {int(cumulative)}")
+            samples.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(counts[-1])}")
+            samples.append(f"{self.name}_count{_labels(self.labels, key)} {int(cumulative)}")
+        return samples
+
+
+class Registry:
+    """
+    The metrics of a process, rendered in the Prometheus text format.
+
+    Collectors are called right before rendering, they set the gauges that are cheaper to
+    read on demand than to keep up to date, like cache sizes.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+        self.collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"A metric named {metric.name} is already registered.")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        with self._lock:
+            self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text format."""
+        with self._lock:
+            collectors = list(self.collectors)
+            metrics = list(self.metrics.values())
+        for collector in collectors:
+            collector()
+        return "".join(metric.render() for metric in metrics)
+
+
+REGISTRY = Registry()
+
+GATEWAY_EVENTS: Counter = REGISTRY.register(Counter(
+    "dankcord_gateway_events_total", "Gateway dispatches received, by event type.", ("event",)
+)) # type: ignore
+REST_REQUESTS: Counter = REGISTRY.register(Counter(
+    "dankcord_rest_requests_total", "REST requests sent, by route and response status.", ("route", "status")
+)) # type: ignore
+RETRIES: Counter = REGISTRY.register(Counter(
+    "dankcord_retries_total", "Requests sent again after a failed attempt, by route.", ("route",)
+)) # type: ignore
+RATE_LIMITED: Counter = REGISTRY.register(Counter(
+    "dankcord_rate_limited_total", "429 responses, by route and whether the limit was global.", ("route", "scope")
+)) # type: ignore
+COMMAND_LATENCY: Histogram = REGISTRY.register(Histogram(
+    "dankcord_command_latency_seconds", "Time from posting a slash command to its MESSAGE_CREATE.", ("command",)
+)) # type: ignore
+WAIT_FOR_DURATION: Histogram = REGISTRY.register(Histogram(
+    "dankcord_wait_for_seconds", "Time spent in wait_for, by event type.", ("event",)
+)) # type: ignore
+CACHE_SIZE: Gauge = REGISTRY.register(Gauge(
+    "dankcord_cache_entries", "Entries held by each gateway cache structure.", ("structure",)
+)) # type: ignore
+GATEWAY_LATENCY: Gauge = REGISTRY.register(Gauge(
+    "dankcord_gateway_latency_seconds", "Average heartbeat round trip of the gateway."
+)) # type: ignore
+
+_gateways: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def track_gateway(gateway) -> None:
+    """Reports the cache sizes and latency of a gateway, `Gateway` and `AsyncGateway` call it themselves.
+
+    Only a weak reference is kept, a closed client isn't kept alive by its metrics.
+    """
+    _gateways.add(gateway)
+
+
+def _collect_gateways() -> None:
+    gateways = list(_gateways)
+    if not gateways:
+        return
+    for structure in gateways[0].cache.STRUCTURES:
+        # `len` would prune the caches from this thread, while their gateway writes to them.
+        CACHE_SIZE.set(sum(getattr(gateway.cache, structure).size() for gateway in gateways), structure)
+    latencies = [gateway.latency for gateway in gateways if gateway.latency != math.inf]
+    if latencies:
+        GATEWAY_LATENCY.set(sum(latencies) / len(latencies))
+
+
+REGISTRY.add_collector(_collect_gateways)
+
+
+def write_metrics(path: str, registry: Registry = REGISTRY) -> None:
+    """Atomically writes the metrics to `path`, for a textfile collector to pick up."""
+    atomic_write(path, registry.render().encode())
+
+
+class MetricsWriter:
+    """
+    Writes the metrics to a file every `interval` seconds, on a daemon thread.
+
+    A failed write is logged to `logger`, if there is one, and tried again at the next interval.
+    """
+
+    def __init__(self, path: str, interval: float = 15, registry: Registry = REGISTRY, logger: Optional[pyloggor] = None) -> None:
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self.logger = logger
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="DankCord-metrics", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                write_metrics(self.path, self.registry)
+            except Exception as e:
+                if self.logger is not None:
+                    self.logger.log(level="Error", msg=f"Failed to write the metrics to {self.path}: {e!r}.")
+
+    def stop(self) -> None:
+        """Stops writing, after writing the metrics one last time."""
+        self._stopped.set()
+        write_metrics(self.path, self.registry)
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serves the metrics over HTTP on a daemon thread, every path answers with them.
+
+    Parameters
+    --------
+    port: int
+        The port to listen on, `0` picks a free one.
+    host: str = "127.0.0.1"
+        The address to listen on, only local scrapers can reach the default.
+
+    Returns
+    --------
+    server: `ThreadingHTTPServer`
+        Call `shutdown` on it to stop serving.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="DankCord-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,155 @@
+import threading, time
+
+from collections import deque
+from typing import Any, Deque, Dict, Mapping, Optional
+
+from .metrics import RATE_LIMITED
+
+# The route every interaction (slash commands, clicks and selections) is posted to.
+INTERACTIONS = "POST /interactions"
+# The routes of the boot requests.
+COMMANDS_ROUTE = "GET /channels/{channel_id}/application-commands/search"
+USER_ROUTE = "GET /users/@me"
+
+
+class Bucket:
+    """
+    A Discord rate limit bucket, as described by the `X-RateLimit-*` headers of its last response.
+    """
+
+    __slots__ = ("limit", "remaining", "reset_at")
+
+    def __init__(self) -> None:
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        # `time.monotonic()` at which `remaining` goes back to `limit`.
+        self.reset_at = 0.0
+
+
+class RateLimiter:
+    """
+    Holds requests back until Discord would accept them, instead of sending them into a 429.
+
+    Routes are mapped to the bucket Discord reports in `X-RateLimit-Bucket`, routes sharing a bucket
+    share its limit. A request reserves one of the bucket's remaining requests, and when there are none
+    left it waits until `X-RateLimit-Reset-After` says the bucket resets. On top of the buckets, at most
+    `global_limit` requests are sent per second, and a global 429 holds back every request until it's over.
+
+    It's shared between threads, and between a `Client` and its `Core`. Waiting is left to the caller:
+    `reserve` only returns how long to wait, so the asyncio client uses the same limiter.
+    """
+
+    def __init__(self, global_limit: int = 50) -> None:
+        self.global_limit = global_limit
+        self._routes: Dict[str, str] = {}
+        self._buckets: Dict[str, Bucket] = {}
+        self._global_until = 0.0
+        self._sent: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def _bucket(self, route: str) -> Bucket:
+        key = self._routes.get(route, route)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = Bucket()
+        return bucket
+
+    def reserve(self, route: str) -> float:
+        """Reserves a request on `route` if it can be sent now.
+
+        Returns
+        --------
+        delay: float
+            `0` if the request was reserved and can be sent, otherwise the seconds to wait before calling `reserve` again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._global_until:
+                return self._global_until - now
+
+            sent = self._sent
+            while sent and now - sent[0] >= 1:
+                sent.popleft()
+            if len(sent) >= self.global_limit:
+                return 1 - (now - sent[0])
+
+            bucket = self._bucket(route)
+            if bucket.remaining is not None and now >= bucket.reset_at:
+                bucket.remaining = bucket.limit
+            if bucket.remaining is not None:
+                if bucket.remaining <= 0:
+                    return bucket.reset_at - now
+                bucket.remaining -= 1
+            sent.append(now)
+            return 0.0
+
+    def update(self, route: str, status: int, headers: Mapping[str, str], body: Any = None) -> float:
+        """Updates the bucket of `route` from the response to a request on it.
+
+        Parameters
+        --------
+        route: str
+            The route the request was sent to, like `INTERACTIONS`.
+        status: int
+            The response status.
+        headers: Mapping[`str`, `str`]
+            The response headers, looked up case insensitively like `requests` and `aiohttp` do.
+        body: Any
+            The decoded JSON body, read for the `retry_after` and `global` fields of a 429.
+
+        Returns
+        --------
+        retry_after: float
+            How long the request should be held back before it's retried, `0` unless it was rate limited.
+        """
+        body = body if isinstance(body, dict) else {}
+        retry_after = 0.0
+        if status == 429:
+            retry_after = float(body.get("retry_after") or headers.get("Retry-After") or 1)
+
+        with self._lock:
+            now = time.monotonic()
+            if status == 429 and (body.get("global") or headers.get("X-RateLimit-Global")):
+                RATE_LIMITED.inc(route, "global")
+                self._global_until = max(self._global_until, now + retry_after)
+                return retry_after
+
+            key = headers.get("X-RateLimit-Bucket")
+            if key is not None and self._routes.get(route) != key:
+                previous = self._routes.get(route)
+                self._routes[route] = key
+                self._buckets.setdefault(key, self._buckets.pop(route, None) or Bucket())
+                # A bucket no route maps to anymore is never looked up again.
+                if previous is not None and previous not in self._routes.values():
+                    self._buckets.pop(previous, None)
+            bucket = self._bucket(route)
+
+            limit = headers.get("X-RateLimit-Limit")
+            remaining = headers.get("X-RateLimit-Remaining")
+            reset_after = headers.get("X-RateLimit-Reset-After")
+            if limit is not None:
+                bucket.limit = int(limit)
+            if remaining is not None and reset_after is not None:
+                remaining = int(remaining)
+                # Requests reserved after this one was sent aren't counted by Discord yet.
+                if bucket.remaining is not None and now < bucket.reset_at:
+                    remaining = min(remaining, bucket.remaining)
+                bucket.remaining = remaining
+                bucket.reset_at = now + float(reset_after)
+            if status == 429:
+                RATE_LIMITED.inc(route, "bucket")
+                bucket.remaining = 0
+                bucket.reset_at = max(bucket.reset_at, now + retry_after)
+                if bucket.limit is None:
+                    bucket.limit = 1
+        return retry_after
+
+    def wait(self, route: str) -> float:
+        """Blocks until a request on `route` is reserved, returns how many seconds it waited."""
+        waited = 0.0
+        delay = self.reserve(route)
+        while delay > 0:
+            time.sleep(delay)
+            waited += delay
+            delay = self.reserve(route)
+        return waited
@@ -0,0 +1,172 @@
+import heapq, itertools, threading, time
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pyloggor import pyloggor
+
+from .core import Core
+from .exceptions import DankCordException, UnknownCommand
+from .Objects import CommandResult
+
+# Callback(command name, result), the result is `None` if the command failed.
+ResultCallback = Callable[[str, Optional[CommandResult]], Any]
+
+
+class ScheduledCommand:
+    """
+    A command registered in a `CommandScheduler`, and when it can run next.
+    """
+
+    __slots__ = ("name", "interval", "kwargs", "callback", "deadline", "runs")
+
+    def __init__(self, name: str, interval: float, kwargs: dict, callback: Optional[ResultCallback]) -> None:
+        self.name = name
+        self.interval = interval
+        self.kwargs = kwargs
+        self.callback = callback
+        self.deadline = 0.0
+        self.runs = 0
+
+
+class CommandScheduler:
+    """
+    Runs `Core` commands as soon as they're off cooldown, on a single timer thread.
+
+    Every registered command has a deadline in a heap, the timer thread sleeps until the
+    earliest one, runs that command and schedules it again: a cooldown result puts the deadline
+    at the end of the cooldown Dank Memer reported, any other result `interval` seconds later.
+    Commands run one after another on the timer thread, so they never race each other in the channel.
+
+        scheduler = CommandScheduler(bot.core, logger)
+        scheduler.register("fish", interval=40)
+        scheduler.register("search", interval=30, location_index="random")
+        scheduler.start()
+    """
+
+    COMMANDS = ("fish", "hunt", "dig", "beg", "search", "crime", "postmemes")
+
+    def __init__(self, core: Core, logger: pyloggor, retry_after: float = 5.0) -> None:
+        self.core = core
+        self.logger = logger
+        self.retry_after = retry_after
+        self.commands: Dict[str, ScheduledCommand] = {}
+
+        self._heap: List[Tuple[float, int, ScheduledCommand]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def register(self, name: str, interval: float = 0.0, callback: Optional[ResultCallback] = None, **kwargs) -> None:
+        """Schedules a command to run now and again whenever it's available.
+
+        Registering a command again replaces it.
+
+        Parameters
+        --------
+        name: str
+            The `Core` command, one of `COMMANDS`.
+        interval: float = 0.0
+            Seconds to wait after a run that didn't hit a cooldown, like the command's known cooldown.
+        callback: Optional[Callable[[`str`, Optional[`CommandResult`]], `Any`]]
+            Called on the timer thread with the name and result of every run.
+        kwargs: **kwargs
+            Passed to the command.
+
+        Raises
+        --------
+        UnknownCommand
+            The command can't be scheduled.
+        """
+        if name not in self.COMMANDS:
+            raise UnknownCommand(f"{name} can't be scheduled, schedulable commands are {', '.join(self.COMMANDS)}.")
+        with self._condition:
+            command = ScheduledCommand(name, interval, kwargs, callback)
+            self.commands[name] = command
+            self._push(command, time.monotonic())
+
+    def unregister(self, name: str) -> None:
+        """Stops scheduling a command, a run in progress still finishes."""
+        with self._condition:
+            self.commands.pop(name, None)
+            self._condition.notify()
+
+    def ready_in(self, name: str) -> Optional[float]:
+        """Seconds until a registered command can run again, `None` if it isn't registered."""
+        command = self.commands.get(name)
+        if command is None:
+            return None
+        return max(0.0, command.deadline - time.monotonic())
+
+    def start(self) -> None:
+        """Starts the timer thread."""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="DankCord-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops the timer thread once the command it is running, if any, finishes."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _push(self, command: ScheduledCommand, deadline: float) -> None:
+        """Schedules `command` at `deadline`. Must be called with the condition held."""
+        command.deadline = deadline
+        heapq.heappush(self._heap, (deadline, next(self._counter), command))
+        self._condition.notify()
+
+    def _next(self) -> Optional[ScheduledCommand]:
+        """Waits for the earliest due command, `None` once stopped.
+
+        Entries of commands that were unregistered or registered again are stale and dropped here.
+        """
+        with self._condition:
+            while self._running:
+                while self._heap and self.commands.get(self._heap[0][2].name) is not self._heap[0][2]:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                delay = self._heap[0][0] - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                return heapq.heappop(self._heap)[2]
+        return None
+
+    def _run(self) -> None:
+        self.logger.log(level="Debug", msg="Command scheduler is now running.")
+        while True:
+            command = self._next()
+            if command is None:
+                return
+
+            result: Optional[CommandResult] = None
+            try:
+                result = getattr(self.core, command.name)(**command.kwargs)
+            except (Exception, DankCordException) as e:
+                self.logger.log(level="Warning", msg=f"Scheduled {command.name} failed: {e!r}.")
+            command.runs += 1
+
+            now = time.monotonic()
+            if result is None:
+                deadline = now + self.retry_after
+            elif result.cooldown is not None:
+                deadline = now + max(0.0, result.cooldown)
+                self.logger.log(level="Debug", msg=f"{command.name} is on cooldown for {result.cooldown} seconds.")
+            else:
+                deadline = now + command.interval
+            with self._condition:
+                if self.commands.get(command.name) is command:
+                    self._push(command, deadline)
+
+            if command.callback is not None:
+                try:
+                    command.callback(command.name, result)
+                except Exception as e:
+                    self.logger.log(level="Error", msg=f"Scheduler callback of {command.name} failed: {e!r}.")
@@ -0,0 +1,116 @@
+import hashlib, os, sqlite3, tempfile, threading, time, orjson
+
+from typing import Any, Dict, Optional, Tuple
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """Writes `data` to a temporary file next to `path` then swaps it in, readers never see a partial file."""
+    fd, temporary = tempfile.mkstemp(prefix=".dankcord-", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
+
+
+def boot_cache_user(token: str) -> str:
+    """Identifies the account of a token in boot cache keys, without writing the token to disk.
+
+    It's known before the gateway connects, unlike the user ID, so the cache can be read while connecting.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+class BootCache:
+    """
+    Command catalogs and user profiles saved by previous boots, one JSON file per entry.
+
+    An entry younger than `refresh_after` seconds is used as is, an older one is still
+    used but should be refreshed in the background, one older than `max_age` seconds is ignored.
+    """
+
+    def __init__(self, directory: str, refresh_after: float = 600, max_age: float = 86400) -> None:
+        self.directory = directory
+        self.refresh_after = refresh_after
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, kind: str, key: Tuple[Any, ...]) -> str:
+        return os.path.join(self.directory, f"{kind}-{'-'.join(str(part) for part in key)}.json")
+
+    def get(self, kind: str, key: Tuple[Any, ...]) -> Optional[Tuple[Any, bool]]:
+        """Returns a cached entry and whether it should be refreshed, or `None` if there isn't a usable one.
+
+        Parameters
+        --------
+        kind: str
+            The kind of data, like `commands` or `user`.
+        key: tuple
+            What the data belongs to, like the user, guild and channel IDs.
+
+        Returns
+        --------
+        entry: Optional[Tuple[`Any`, `bool`]]
+        """
+        try:
+            with open(self._path(kind, key), "rb") as f:
+                entry = orjson.loads(f.read())
+            age = time.time() - entry["saved_at"]
+        except (OSError, orjson.JSONDecodeError, KeyError, TypeError):
+            return None
+        if age >= self.max_age:
+            return None
+        return entry["data"], age >= self.refresh_after
+
+    def put(self, kind: str, key: Tuple[Any, ...], data: Any) -> None:
+        """Saves an entry, see `get`."""
+        atomic_write(self._path(kind, key), orjson.dumps({"saved_at": time.time(), "data": data}))
+
+
+class CommandStore:
+    """
+    The command data of a channel in a SQLite database, used by the DISK resource intensivity.
+
+    Each command is a compact orjson record under its name, so looking one up reads and
+    decodes only that record. The connection is shared between threads behind a lock.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS commands (name TEXT PRIMARY KEY, data BLOB NOT NULL)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM commands").fetchone()[0]
+
+    def get(self, name: str) -> dict:
+        """Returns the data of a command, or an empty dict if it isn't stored."""
+        with self._lock:
+            row = self._connection.execute("SELECT data FROM commands WHERE name = ?", (name,)).fetchone()
+        return orjson.loads(row[0]) if row else {}
+
+    def replace(self, commands: Dict[str, dict]) -> None:
+        """Replaces every stored command with `commands`, keyed by command name, in a single transaction."""
+        records = [(name, orjson.dumps(command_data)) for name, command_data in commands.items()]
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM commands")
+            self._connection.executemany("INSERT INTO commands (name, data) VALUES (?, ?)", records)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def command_store_path(channel_id) -> str:
+    """The path of the DISK resource intensivity command store of a channel."""
+    return f"{channel_id}_commands.db"
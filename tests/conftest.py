@@ -0,0 +1,274 @@
+import asyncio, itertools, os, queue, sys, time
+import aiohttp, orjson, pytest
+
+from websocket import ABNF, WebSocketConnectionClosedException, WebSocketTimeoutException
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+DANK_MEMER_ID = "270904126974590976"
+COMMAND = {
+    "id": "1011560371078832204",
+    "version": "1011560371267579941",
+    "default_permission": True,
+    "default_member_permissions": None,
+    "type": 1,
+    "nsfw": False,
+    "description": "Search for coins",
+    "dm_permission": True,
+}
+
+
+class Logger:
+    """Stands in for `pyloggor`, keeping what was logged."""
+
+    def __init__(self) -> None:
+        self.records = []
+
+    def log(self, level: str, msg: str, **kwargs) -> None:
+        self.records.append((level, msg))
+
+    def messages(self, level: str) -> list:
+        return [msg for logged, msg in self.records if logged == level]
+
+
+class FakeWebSocket:
+    """Stands in for `aiohttp.ClientWebSocketResponse`, `FakeDiscord` plays the gateway side."""
+
+    def __init__(self, discord: "FakeDiscord") -> None:
+        self.discord = discord
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+        self.close_code = None
+
+    def push(self, frame: dict) -> None:
+        self.inbox.put_nowait(aiohttp.WSMessage(aiohttp.WSMsgType.BINARY, orjson.dumps(frame), None))
+
+    def drop(self, code: int = 1000) -> None:
+        """Closes the connection from Discord's side, like a dropped socket."""
+        self.inbox.put_nowait(aiohttp.WSMessage(aiohttp.WSMsgType.CLOSE, code, ""))
+
+    async def receive(self, timeout=None):
+        if self.closed and self.inbox.empty():
+            return aiohttp.WSMessage(aiohttp.WSMsgType.CLOSED, None, None)
+        message = await asyncio.wait_for(self.inbox.get(), timeout)
+        if message.type == aiohttp.WSMsgType.CLOSE:
+            self.closed, self.close_code = True, message.data
+        return message
+
+    async def send_bytes(self, data: bytes) -> None:
+        if self.closed:
+            raise ConnectionResetError("Cannot write to closing transport")
+        self.discord.receive(self, orjson.loads(data))
+
+    async def close(self) -> None:
+        if not self.closed:
+            self.closed, self.close_code = True, 1000
+            self.inbox.put_nowait(aiohttp.WSMessage(aiohttp.WSMsgType.CLOSED, None, None))
+
+
+class FakeResponse:
+    def __init__(self, status: int, body=None) -> None:
+        self.status = status
+        self.headers = {}
+        self._body = body
+
+    async def json(self, content_type=None):
+        if self._body is None:
+            raise ValueError("No JSON body.")
+        return self._body
+
+    async def __aenter__(self) -> "FakeResponse":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+
+class FakeDiscord:
+    """
+    Stands in for the `aiohttp.ClientSession` of an `AsyncClient`, playing both the gateway and the REST API.
+
+    Heartbeats are acknowledged unless `acks_heartbeats` is unset. Slash commands are answered with a MESSAGE_CREATE carrying their nonce, components with an
+    INTERACTION_SUCCESS, or an INTERACTION_FAILURE if their custom ID is in `failing`.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.sockets = []
+        self.gateway_payloads = []
+        self.interactions = []
+        self.failing = set()
+        self.heartbeat_interval = 45000
+        self.acks_heartbeats = True
+        self.seq = itertools.count(1)
+        self.message_ids = itertools.count(1000)
+        self.closed = False
+
+    @property
+    def ws(self) -> FakeWebSocket:
+        return self.sockets[-1]
+
+    async def ws_connect(self, url: str, **kwargs) -> FakeWebSocket:
+        ws = FakeWebSocket(self)
+        self.sockets.append(ws)
+        ws.push({"t": None, "s": None, "op": 10, "d": {"heartbeat_interval": self.heartbeat_interval}})
+        return ws
+
+    def receive(self, ws: FakeWebSocket, payload: dict) -> None:
+        self.gateway_payloads.append(payload)
+        if payload["op"] == 1 and self.acks_heartbeats:
+            ws.push({"t": None, "s": None, "op": 11, "d": None})
+        elif payload["op"] == 2:
+            self.dispatch("READY", {
+                "user": {"id": "42"},
+                "session_id": "session",
+                "resume_gateway_url": "wss://resume.discord.gg",
+                "guilds": [{"id": "7", "channels": [{"id": "9"}]}],
+            })
+        elif payload["op"] == 6:
+            self.dispatch("RESUMED", {})
+
+    def dispatch(self, event: str, data: dict) -> None:
+        self.ws.push({"t": event, "s": next(self.seq), "op": 0, "d": data})
+
+    def get(self, url: str, **kwargs) -> FakeResponse:
+        if url.endswith("/users/@me"):
+            return FakeResponse(200, {"id": "42", "username": "farmer", "discriminator": "0001"})
+        return FakeResponse(200, {"application_commands": [dict(COMMAND, name="search")]})
+
+    def post(self, url: str, data: bytes, **kwargs) -> FakeResponse:
+        payload = orjson.loads(data)
+        self.interactions.append(payload)
+        asyncio.get_running_loop().call_soon(self._answer, payload)
+        return FakeResponse(204)
+
+    def _answer(self, payload: dict) -> None:
+        if payload["type"] == 2:
+            self.dispatch("MESSAGE_CREATE", {
+                "id": str(next(self.message_ids)),
+                "nonce": payload["nonce"],
+                "channel_id": payload["channel_id"],
+                "author": {"id": DANK_MEMER_ID},
+                "embeds": [{"description": "Where do you want to search?"}],
+            })
+        else:
+            event = "INTERACTION_FAILURE" if payload["data"]["custom_id"] in self.failing else "INTERACTION_SUCCESS"
+            self.dispatch(event, {"id": "1", "nonce": payload["nonce"]})
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeSocket:
+    """Stands in for the `websocket.WebSocket` of a `Gateway`, `FakeGateway` plays the gateway side."""
+
+    def __init__(self, gateway: "FakeGateway") -> None:
+        self.gateway = gateway
+        self.inbox: queue.Queue = queue.Queue()
+        self.timeout = None
+        self.connected = True
+
+    def push(self, frame: dict) -> None:
+        self.inbox.put((ABNF.OPCODE_TEXT, orjson.dumps(frame)))
+
+    def drop(self, code: int = 1000) -> None:
+        self.inbox.put((ABNF.OPCODE_CLOSE, code.to_bytes(2, "big")))
+
+    def settimeout(self, timeout) -> None:
+        self.timeout = timeout
+
+    def recv_data(self):
+        try:
+            item = self.inbox.get(timeout=self.timeout)
+        except queue.Empty:
+            raise WebSocketTimeoutException("Connection timed out")
+        if item is None:
+            raise WebSocketConnectionClosedException("Connection is already closed.")
+        return item
+
+    def send(self, data: bytes) -> None:
+        if not self.connected:
+            raise WebSocketConnectionClosedException("Connection is already closed.")
+        self.gateway.receive(self, orjson.loads(data))
+
+    def close(self) -> None:
+        self.connected = False
+        self.inbox.put(None)
+
+
+class FakeGateway:
+    """
+    Stands in for Discord's gateway behind `websocket.create_connection`, for the blocking `Gateway`.
+
+    Resumes are answered with RESUMED, or with an invalid session (op 9) while `refuse_resumes` is set.
+    """
+
+    def __init__(self) -> None:
+        self.sockets = []
+        self.payloads = []
+        self.refuse_resumes = False
+        self.seq = itertools.count(1)
+
+    @property
+    def ws(self) -> FakeSocket:
+        return self.sockets[-1]
+
+    def connect(self, url: str, **kwargs) -> FakeSocket:
+        ws = FakeSocket(self)
+        self.sockets.append(ws)
+        ws.push({"t": None, "s": None, "op": 10, "d": {"heartbeat_interval": 45000}})
+        return ws
+
+    def receive(self, ws: FakeSocket, payload: dict) -> None:
+        self.payloads.append(payload)
+        if payload["op"] == 1:
+            ws.push({"t": None, "s": None, "op": 11, "d": None})
+        elif payload["op"] == 2:
+            self.dispatch("READY", {
+                "user": {"id": "42"},
+                "session_id": f"session-{len(self.sockets)}",
+                "resume_gateway_url": "wss://resume.discord.gg",
+                "guilds": [{"id": "7", "channels": [{"id": "9"}]}],
+            })
+        elif payload["op"] == 6:
+            if self.refuse_resumes:
+                ws.push({"t": None, "s": None, "op": 9, "d": False})
+            else:
+                self.dispatch("RESUMED", {})
+
+    def dispatch(self, event: str, data: dict) -> None:
+        self.ws.push({"t": event, "s": next(self.seq), "op": 0, "d": data})
+
+
+def wait_until(predicate, timeout: float = 2) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out.")
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def logger() -> Logger:
+    return Logger()
+
+
+@pytest.fixture
+def discord(monkeypatch) -> FakeDiscord:
+    """Makes `AsyncClient` talk to a `FakeDiscord` instead of Discord."""
+    import DankCord.aio.client
+
+    discord = FakeDiscord()
+    monkeypatch.setattr(DankCord.aio.client.aiohttp, "ClientSession", lambda *args, **kwargs: discord)
+    monkeypatch.setattr(DankCord.aio.client.aiohttp, "TCPConnector", lambda *args, **kwargs: None)
+    return discord
+
+
+@pytest.fixture
+def fake_gateway(monkeypatch) -> FakeGateway:
+    """Makes `Gateway` connect to a `FakeGateway`, without the 1 to 5 seconds wait after an invalid session."""
+    import DankCord.gateway
+
+    gateway = FakeGateway()
+    monkeypatch.setattr(DankCord.gateway, "create_connection", gateway.connect)
+    monkeypatch.setattr(DankCord.gateway.random, "uniform", lambda low, high: 0.0)
+    return gateway
@@ -0,0 +1,222 @@
+import asyncio, time
+import aiohttp, pytest
+
+from DankCord import Config
+from DankCord.aio import AsyncClient, AsyncGateway
+from DankCord.exceptions import InvalidToken
+from DankCord.gateway import GatewayState, SessionCheckpoint
+from DankCord.Objects import Button
+
+from conftest import FakeDiscord
+
+
+async def wait_until(predicate, timeout: float = 2) -> None:
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("Timed out.")
+
+
+def test_connect_identifies_and_reads_ready(logger):
+    async def main():
+        discord = FakeDiscord()
+        gateway = AsyncGateway(Config("token", 9), logger, discord)
+        assert await gateway.connect()
+        try:
+            assert gateway.state == GatewayState.READY
+            assert gateway.session_id == "session"
+            assert gateway.user_id == 42
+            assert gateway.guild_id == "7"
+            assert [payload["op"] for payload in discord.gateway_payloads] == [1, 2]
+            assert discord.gateway_payloads[1]["d"]["token"] == "token"
+        finally:
+            await gateway.close()
+
+    asyncio.run(main())
+
+
+def test_resumes_after_a_dropped_socket(logger):
+    async def main():
+        discord = FakeDiscord()
+        gateway = AsyncGateway(Config("token", 9), logger, discord)
+        assert await gateway.connect()
+        try:
+            discord.ws.drop(1006)
+            await wait_until(lambda: len(discord.sockets) == 2 and gateway.state == GatewayState.READY)
+
+            resume = discord.gateway_payloads[-1]
+            assert resume["op"] == 6
+            assert resume["d"] == {"token": "token", "session_id": "session", "seq": 1}
+            assert gateway.session_id == "session"
+            assert any(msg.startswith("Resumed in") for msg in logger.messages("Info"))
+        finally:
+            await gateway.close()
+
+    asyncio.run(main())
+
+
+def test_fatal_close_code_stops_reconnecting(logger):
+    async def main():
+        discord = FakeDiscord()
+        gateway = AsyncGateway(Config("token", 9), logger, discord)
+        assert await gateway.connect()
+        try:
+            discord.ws.drop(4004)
+            await wait_until(lambda: gateway.state == GatewayState.CLOSED)
+            assert len(discord.sockets) == 1
+        finally:
+            await gateway.close()
+
+    asyncio.run(main())
+
+
+def test_reconnects_after_an_undecodable_frame(logger):
+    async def main():
+        discord = FakeDiscord()
+        gateway = AsyncGateway(Config("token", 9), logger, discord)
+        assert await gateway.connect()
+        try:
+            discord.ws.inbox.put_nowait(aiohttp.WSMessage(aiohttp.WSMsgType.BINARY, b"\x78\x9c garbage", None))
+            await wait_until(lambda: len(discord.sockets) == 2 and gateway.state == GatewayState.READY)
+
+            assert discord.gateway_payloads[-1]["op"] == 6
+            assert any(msg.startswith("Failed to decode a gateway frame") for msg in logger.messages("Warning"))
+        finally:
+            await gateway.close()
+
+    asyncio.run(main())
+
+
+def test_zombie_check_waits_for_the_connection_to_be_ready(logger):
+    async def main():
+        discord = FakeDiscord()
+        discord.heartbeat_interval = 10
+        gateway = AsyncGateway(Config("token", 9), logger, discord)
+        assert await gateway.connect()
+        try:
+            discord.acks_heartbeats = False
+            gateway.state = GatewayState.RESUMING
+            await asyncio.sleep(0.1)
+            assert len(discord.sockets) == 1
+            assert not logger.messages("Warning")
+
+            gateway.state = GatewayState.READY
+            await wait_until(lambda: len(discord.sockets) == 2)
+            assert any(msg.startswith("No heartbeat ACK") for msg in logger.messages("Warning"))
+        finally:
+            await gateway.close()
+
+    asyncio.run(main())
+
+
+def test_checkpoint_is_saved_when_ready_and_on_close(logger, tmp_path):
+    async def main():
+        discord = FakeDiscord()
+        gateway = AsyncGateway(Config("token", 9, session_file=str(tmp_path / "session.json")), logger, discord)
+        checkpoint = SessionCheckpoint(str(tmp_path / "session.json"))
+        assert await gateway.connect()
+        try:
+            await wait_until(lambda: (checkpoint.load() or {}).get("seq") == 1)
+            discord.dispatch("MESSAGE_CREATE", {"id": "1", "channel_id": "9", "author": {"id": "1"}})
+            await wait_until(lambda: gateway.internal.s == 2)
+            # Dispatches don't write the checkpoint, the next heartbeat or closing does.
+            assert checkpoint.load()["seq"] == 1
+        finally:
+            await gateway.close()
+        assert checkpoint.load()["seq"] == 2
+
+    asyncio.run(main())
+
+
+def test_wait_for_only_matches_events_after_the_call(logger):
+    async def main():
+        discord = FakeDiscord()
+        gateway = AsyncGateway(Config("token", 9), logger, discord)
+        assert await gateway.connect()
+        try:
+            sent = time.monotonic()
+            discord.dispatch("INTERACTION_SUCCESS", {"id": "1", "nonce": "old"})
+            await wait_until(lambda: gateway.cache.latest("INTERACTION_SUCCESS") == "old")
+
+            assert await gateway.wait_for("INTERACTION_SUCCESS", timeout=0.05) is None
+            assert await gateway.wait_for("INTERACTION_SUCCESS", lambda nonce: nonce == "old", 0.05, since=sent) is True
+            assert await gateway.wait_for("INTERACTION_SUCCESS", timeout=0.05, since=time.monotonic()) is None
+
+            waiting = asyncio.ensure_future(gateway.wait_for("INTERACTION_SUCCESS", lambda nonce: nonce == "new", 2))
+            await asyncio.sleep(0)
+            discord.dispatch("INTERACTION_SUCCESS", {"id": "1", "nonce": "new"})
+            assert await waiting is True
+        finally:
+            await gateway.close()
+
+    asyncio.run(main())
+
+
+def test_run_command_returns_the_message_carrying_its_nonce(logger, discord):
+    async def main():
+        async with AsyncClient(Config("token", 9), logger) as bot:
+            # Another interaction's message must not be taken for this one.
+            discord.dispatch("MESSAGE_CREATE", {"id": "1", "nonce": "0", "channel_id": "9", "author": {"id": "1"}})
+            message = await bot.run_command("search", timeout=2)
+
+            interaction = discord.interactions[-1]
+            assert message is not None
+            assert message.nonce == interaction["nonce"]
+            assert interaction["session_id"] == "session"
+            assert interaction["data"]["name"] == "search"
+            assert bot.gateway.pending_interactions == {}
+
+    asyncio.run(main())
+
+
+def test_send_components_confirms_each_component(logger, discord):
+    async def main():
+        async with AsyncClient(Config("token", 9), logger) as bot:
+            buttons = [Button({"custom_id": custom_id}, "1000") for custom_id in ("platform", "kind", "post")]
+            discord.failing.add("kind")
+            assert await bot.send_components(*buttons, timeout=2) == [True, False, True]
+            assert [interaction["data"]["custom_id"] for interaction in discord.interactions] == ["platform", "kind", "post"]
+            assert bot.gateway.pending_components == {}
+
+    asyncio.run(main())
+
+
+def test_send_components_stops_at_the_first_rejected_component(logger, discord):
+    async def main():
+        async with AsyncClient(Config("token", 9), logger) as bot:
+            posted = []
+
+            async def rejected(data, retry_attempts, timeout):
+                posted.append(data)
+                return False
+
+            bot._post_component = rejected
+            buttons = [Button({"custom_id": custom_id}, "1000") for custom_id in ("platform", "kind")]
+            assert await bot.send_components(*buttons, timeout=2) == [False, False]
+            assert len(posted) == 1
+            assert bot.gateway.pending_components == {}
+
+    asyncio.run(main())
+
+
+def test_close_before_start(logger):
+    asyncio.run(AsyncClient(Config("token", 9), logger).close())
+
+
+def test_failed_start_closes_what_it_opened(logger, discord, monkeypatch):
+    async def identify_rejected(self):
+        raise InvalidToken("Invalid Discord account token used.")
+
+    monkeypatch.setattr(AsyncGateway, "_identify", identify_rejected)
+
+    async def main():
+        bot = AsyncClient(Config("token", 9), logger)
+        with pytest.raises(InvalidToken):
+            await bot.start()
+        await asyncio.sleep(0)
+        assert discord.closed
+        assert discord.ws.closed
+        assert bot.gateway._heartbeat_task.cancelled()
+
+    asyncio.run(main())
@@ -0,0 +1,28 @@
+from DankCord.batch import parse_message
+
+COOLDOWN = (
+    "**Slow it down, cowboy**\nYou can run this command again <t:1676226125:R>.\n"
+    "The default cooldown is `40 seconds`, but donors only need to wait `25 seconds`!"
+)
+
+
+def message(**fields) -> dict:
+    return dict({"id": "1", "interaction": {"name": "search"}, "embeds": [{"description": COOLDOWN}]}, **fields)
+
+
+def test_cooldown_is_counted_from_when_the_message_was_sent():
+    name, result = parse_message(message(timestamp="2023-02-12T18:21:25.000000+00:00"), "MESSAGE_CREATE")
+    assert name == "search"
+    assert result.success is False
+    assert result.cooldown == 40
+
+
+def test_cooldown_of_an_edited_message_is_counted_from_the_edit():
+    data = message(timestamp="2023-02-12T18:21:00+00:00", edited_timestamp="2023-02-12T18:21:55+00:00")
+    assert parse_message(data, "MESSAGE_UPDATE")[1].cooldown == 10
+
+
+def test_follow_up_prompts_are_skipped():
+    data = {"id": "1", "interaction": {"name": "search"}, "embeds": [{"description": "Where do you want to search?"}]}
+    assert parse_message(data, "MESSAGE_CREATE") is None
+    assert parse_message({"id": "1", "embeds": [{"description": COOLDOWN}]}) is None
@@ -0,0 +1,66 @@
+import orjson, pytest
+
+from DankCord.commands import CommandIndex, CommandTemplate
+from DankCord.exceptions import UnknownCommand
+
+from conftest import COMMAND
+
+HIGHLOW = dict(COMMAND, name="highlow")
+SETTINGS = dict(
+    COMMAND,
+    name="settings",
+    options=[
+        {"type": 2, "name": "notifications", "options": [
+            {"type": 1, "name": "toggle", "options": [{"type": 5, "name": "enabled"}]},
+        ]},
+        {"type": 1, "name": "view", "options": [{"type": 3, "name": "page"}]},
+    ],
+)
+
+
+def test_render_splices_the_call_values():
+    template = CommandTemplate(HIGHLOW, 7, "9")
+    payload = orjson.loads(template.render("123", "session", b"[]"))
+    assert payload["nonce"] == "123"
+    assert payload["session_id"] == "session"
+    assert payload["guild_id"] == "7"
+    assert payload["channel_id"] == "9"
+    assert payload["data"]["name"] == "highlow"
+    assert payload["data"]["options"] == []
+
+
+def test_render_leaves_the_template_reusable():
+    template = CommandTemplate(HIGHLOW, 7, "9")
+    template.render("1", "a", b"[]")
+    assert orjson.loads(template.render("2", None, b"[]"))["nonce"] == "2"
+    assert orjson.loads(template.render("2", None, b"[]"))["session_id"] is None
+
+
+def test_sub_command_options_are_nested_and_typed():
+    index = CommandIndex(7, "9")
+    index.load({"settings": SETTINGS})
+    assert len(index) == 4
+
+    template, node = index.get(("settings", "notifications", "toggle"))
+    assert node.schema == {"enabled": 5}
+    options = orjson.loads(template.render("1", "s", node.encode({"enabled": True})))["data"]["options"]
+    assert options == [{
+        "type": 2, "name": "notifications",
+        "options": [{"type": 1, "name": "toggle", "options": [{"type": 5, "name": "enabled", "value": True}]}],
+    }]
+
+
+def test_options_outside_the_schema_are_typed_from_their_value():
+    node = CommandTemplate(HIGHLOW, 7, "9").paths[("highlow",)]
+    assert orjson.loads(node.encode({"amount": 5, "note": "hi"})) == [
+        {"type": 10, "name": "amount", "value": 5},
+        {"type": 3, "name": "note", "value": "hi"},
+    ]
+
+
+def test_unknown_path():
+    index = CommandIndex(7, "9")
+    index.load({"settings": SETTINGS})
+    assert index.get(("settings", "missing")) is None
+    with pytest.raises(UnknownCommand):
+        CommandIndex.resolve(index.compile(SETTINGS), ("settings", "missing"))
@@ -0,0 +1,148 @@
+import orjson
+
+from DankCord import Config
+from DankCord.gateway import ChannelIndex, FrameDecoder, Gateway, GatewayState, SessionCheckpoint, gateway_events
+
+from conftest import DANK_MEMER_ID, wait_until
+
+
+def frame(event: str, seq: int, data) -> bytes:
+    return orjson.dumps({"t": event, "s": seq, "op": 0, "d": data})
+
+
+def test_unwanted_dispatches_are_skipped_but_keep_their_sequence():
+    decoder = FrameDecoder(["MESSAGE_CREATE"])
+    assert decoder.decode(frame("PRESENCE_UPDATE", 12, {"large": "x" * 100})) == {"op": 0, "t": "PRESENCE_UPDATE", "s": 12, "d": None}
+    assert decoder.skipped == 1
+    assert decoder.decoded == 0
+
+
+def test_wanted_dispatches_are_decoded():
+    decoder = FrameDecoder(["MESSAGE_CREATE"])
+    assert decoder.decode(frame("MESSAGE_CREATE", 3, {"id": "1"}))["d"] == {"id": "1"}
+    assert decoder.decoded == 1
+
+
+def test_text_frames_and_other_opcodes_are_decoded():
+    decoder = FrameDecoder(["MESSAGE_CREATE"])
+    assert decoder.decode(frame("GUILD_CREATE", 4, {}).decode())["d"] is None
+    assert decoder.decode(b'{"t":null,"s":null,"op":11,"d":null}')["op"] == 11
+    # Frames not laid out like Discord's are fully decoded, whatever their event.
+    assert decoder.decode(b'{"op":0,"t":"GUILD_CREATE","s":5,"d":{"id":"1"}}')["d"] == {"id": "1"}
+
+
+def test_commands_always_decode_their_events():
+    assert set(gateway_events(["INTERACTION_SUCCESS"], ())) == {"INTERACTION_SUCCESS", "MESSAGE_CREATE", "MESSAGE_UPDATE"}
+
+
+def reply(nonce: str, message_id: str) -> dict:
+    return {"id": message_id, "nonce": nonce, "channel_id": "9", "author": {"id": DANK_MEMER_ID}, "embeds": []}
+
+
+def test_interaction_reply_is_routed_by_nonce_before_it_is_waited_for(fake_gateway, logger):
+    gateway = Gateway(Config("token", 9), logger)
+    try:
+        waiter = gateway.expect_interaction("123")
+        other = gateway.expect_interaction("456")
+        fake_gateway.dispatch("MESSAGE_CREATE", reply("999", "1"))
+        fake_gateway.dispatch("MESSAGE_CREATE", reply("123", "2"))
+        # The reply arrives before `_invoke` gets to wait on it.
+        wait_until(lambda: "123" not in gateway.pending_interactions)
+
+        message = waiter.wait(0)
+        assert message is not None and message.nonce == "123"
+        assert other.wait(0) is None
+        assert "456" in gateway.pending_interactions
+        gateway.forget_interaction("456")
+        assert gateway.pending_interactions == {}
+    finally:
+        gateway.close()
+
+
+def test_forgotten_nonce_is_not_resolved(fake_gateway, logger):
+    gateway = Gateway(Config("token", 9), logger)
+    try:
+        waiter = gateway.expect_interaction("123")
+        gateway.forget_interaction("123")
+        fake_gateway.dispatch("MESSAGE_CREATE", reply("123", "2"))
+        fake_gateway.dispatch("MESSAGE_CREATE", reply("marker", "3"))
+        wait_until(lambda: (gateway.cache.latest("MESSAGE_CREATE", 0) or {}).get("nonce") == "marker")
+        assert waiter.wait(0) is None
+    finally:
+        gateway.close()
+
+
+def test_dropped_connection_is_resumed(fake_gateway, logger):
+    gateway = Gateway(Config("token", 9), logger)
+    try:
+        fake_gateway.ws.drop(1006)
+        wait_until(lambda: len(fake_gateway.sockets) == 2 and gateway.state == GatewayState.READY)
+
+        assert fake_gateway.payloads[-1]["op"] == 6
+        assert fake_gateway.payloads[-1]["d"]["session_id"] == "session-1"
+        assert gateway.session_id == "session-1"
+    finally:
+        gateway.close()
+
+
+def saved_session(path) -> SessionCheckpoint:
+    checkpoint = SessionCheckpoint(str(path))
+    checkpoint.save({
+        "session_id": "saved",
+        "seq": 41,
+        "resume_gateway_url": "wss://resume.discord.gg",
+        "user_id": 42,
+        "guild_id": "7",
+        "channel_id": 9,
+    })
+    return checkpoint
+
+
+def test_saved_session_is_resumed(fake_gateway, logger, tmp_path):
+    saved_session(tmp_path / "session.json")
+    gateway = Gateway(Config("token", 9, session_file=str(tmp_path / "session.json")), logger)
+    try:
+        assert gateway.state == GatewayState.READY
+        assert [payload["op"] for payload in fake_gateway.payloads] == [1, 6]
+        assert fake_gateway.payloads[-1]["d"] == {"token": "token", "session_id": "saved", "seq": 41}
+        assert gateway.session_id == "saved"
+    finally:
+        gateway.close()
+
+
+def test_refused_resume_falls_back_to_identify(fake_gateway, logger, tmp_path):
+    fake_gateway.refuse_resumes = True
+    saved_session(tmp_path / "session.json")
+    gateway = Gateway(Config("token", 9, session_file=str(tmp_path / "session.json")), logger)
+    try:
+        wait_until(lambda: gateway.state == GatewayState.READY)
+
+        assert [payload["op"] for payload in fake_gateway.payloads if payload["op"] != 1] == [6, 2]
+        assert gateway.session_id == "session-2"
+        wait_until(lambda: SessionCheckpoint(str(tmp_path / "session.json")).load()["session_id"] == "session-2")
+    finally:
+        gateway.close()
+
+
+def test_channel_index_maps_channels_to_their_guild():
+    guilds = [{"id": "7", "channels": [{"id": "9"}, {"id": "10"}]}, {"id": "8"}]
+    index = ChannelIndex()
+    index.load(guilds)
+    assert guilds == []
+    assert index.guild_of(10) == "7"
+    assert index.guild_of("9") == "7"
+    assert index.guild_of(11) is None
+    assert len(index) == 2
+
+
+def test_channel_index_is_built_from_ready_and_guild_create(fake_gateway, logger):
+    gateway = Gateway(Config("token", 11), logger)
+    try:
+        assert gateway.channels.guild_of(9) == "7"
+        assert gateway.guild_id is None
+
+        fake_gateway.dispatch("GUILD_CREATE", {"id": "8", "channels": [{"id": "11"}]})
+        wait_until(lambda: gateway.guild_id == "8")
+        assert gateway.channels.guild_of(9) == "7"
+    finally:
+        gateway.close()
@@ -0,0 +1,89 @@
+import pytest
+
+from DankCord.hooks import HOOKS, Hook, StageTimer, add_hook, begin, profiled, remove_hook
+
+
+class Recorder(Hook):
+    def __init__(self) -> None:
+        self.calls = []
+
+    def begin(self, stage, info) -> None:
+        self.calls.append(("begin", stage, info))
+
+    def end(self, stage, info, elapsed) -> None:
+        self.calls.append(("end", stage, info))
+
+
+class Broken(Hook):
+    def begin(self, stage, info) -> None:
+        raise RuntimeError("broken hook")
+
+    def end(self, stage, info, elapsed) -> None:
+        raise RuntimeError("broken hook")
+
+
+@pytest.fixture
+def recorder():
+    hook = add_hook(Recorder())
+    yield hook
+    remove_hook(hook)
+
+
+def test_span_end_calls_the_hooks_it_began_on(recorder):
+    span = begin("gateway.dispatch", "MESSAGE_CREATE")
+    late = add_hook(Recorder())
+    try:
+        assert span.end() >= 0
+    finally:
+        remove_hook(late)
+    assert recorder.calls == [("begin", "gateway.dispatch", "MESSAGE_CREATE"), ("end", "gateway.dispatch", "MESSAGE_CREATE")]
+    assert late.calls == []
+
+
+def test_broken_hooks_are_ignored(recorder):
+    broken = add_hook(Broken())
+    try:
+        begin("rest", "POST /interactions").end()
+    finally:
+        remove_hook(broken)
+    assert [call[0] for call in recorder.calls] == ["begin", "end"]
+
+
+def test_profiled_forwards_arguments_and_reports_the_stage(recorder):
+    @profiled("parser.test")
+    def parse(value, *, scale=1):
+        return value * scale
+
+    assert parse(2, scale=3) == 6
+    assert recorder.calls == [("begin", "parser.test", None), ("end", "parser.test", None)]
+    assert parse.__name__ == "parse"
+
+
+def test_profiled_ends_the_stage_when_the_function_raises(recorder):
+    @profiled("parser.test")
+    def parse(value):
+        raise ValueError(value)
+
+    with pytest.raises(ValueError):
+        parse("x")
+    assert recorder.calls[-1] == ("end", "parser.test", None)
+
+
+def test_profiled_without_hooks_only_calls_the_function():
+    assert not HOOKS
+
+    @profiled("parser.test")
+    def parse(value, *, scale=1):
+        return value * scale
+
+    assert parse(2, scale=3) == 6
+
+
+def test_stage_timer_adds_up_stages():
+    timer = StageTimer()
+    timer.end("rest", None, 0.5)
+    timer.end("rest", None, 0.25)
+    timer.end("message", None, 0.1)
+    assert timer.report() == {"rest": (2, 0.75, 0.5), "message": (1, 0.1, 0.1)}
+    timer.reset()
+    assert timer.report() == {}
@@ -0,0 +1,25 @@
+from DankCord.metrics import Counter, MetricsWriter, Registry
+
+from conftest import wait_until
+
+
+def test_metrics_writer_keeps_writing_after_a_failure(logger, tmp_path):
+    registry = Registry()
+    counter = registry.register(Counter("dankcord_test_total", "A test counter."))
+    failures = []
+
+    def flaky() -> None:
+        if not failures:
+            failures.append(True)
+            raise RuntimeError("OrderedDict mutated during iteration")
+
+    registry.add_collector(flaky)
+    writer = MetricsWriter(str(tmp_path / "dankcord.prom"), interval=0.01, registry=registry, logger=logger)
+    try:
+        wait_until(lambda: (tmp_path / "dankcord.prom").exists())
+        counter.inc()
+    finally:
+        writer.stop()
+
+    assert "dankcord_test_total 1" in (tmp_path / "dankcord.prom").read_text()
+    assert any("Failed to write the metrics" in msg for msg in logger.messages("Error"))
@@ -0,0 +1,68 @@
+import pytest
+
+from DankCord import Objects
+from DankCord.Objects import BoundedCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(Objects, "monotonic", lambda: now[0])
+    return now
+
+
+def test_evicts_the_least_recently_written_entry(clock):
+    cache = BoundedCache(max_size=2, ttl=60)
+    cache["a"], cache["b"] = 1, 2
+    cache["a"] = 3
+    cache["c"] = 4
+    assert list(cache) == ["a", "c"]
+    assert cache.evictions == 1
+
+
+def test_expired_entries_are_never_read(clock):
+    cache = BoundedCache(max_size=10, ttl=60)
+    cache["a"] = 1
+    clock[0] += 61
+    assert "a" not in cache
+    assert cache.get("a") is None
+    with pytest.raises(KeyError):
+        cache["a"]
+    assert cache.latest() is None
+    assert len(cache) == 0
+
+
+def test_latest_is_the_last_written_value(clock):
+    cache = BoundedCache(max_size=10, ttl=60)
+    assert cache.latest() is None
+    cache["a"], cache["b"] = 1, 2
+    cache["a"] = 3
+    assert cache.latest() == 3
+
+
+def test_writes_prune_expired_entries(clock):
+    cache = BoundedCache(max_size=10, ttl=60)
+    cache["a"] = 1
+    clock[0] += 30
+    cache["b"] = 2
+    clock[0] += 31
+    cache["c"] = 3
+    assert list(cache._data) == ["b", "c"]
+
+
+def test_latest_ignores_values_written_before_since(clock):
+    cache = BoundedCache(max_size=10, ttl=60)
+    cache["a"] = 1
+    clock[0] += 5
+    assert cache.latest(since=clock[0] - 1) is None
+    assert cache.latest(since=clock[0] - 10) == 1
+
+
+def test_size_does_not_prune(clock):
+    cache = BoundedCache(max_size=10, ttl=60)
+    cache["a"] = 1
+    clock[0] += 61
+    assert cache.size() == 1
+    assert cache.evictions == 0
+    assert len(cache) == 0
+    assert cache.evictions == 1
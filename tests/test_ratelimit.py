@@ -0,0 +1,110 @@
+import pytest
+
+from DankCord import ratelimit
+from DankCord.metrics import RATE_LIMITED
+from DankCord.ratelimit import INTERACTIONS, RateLimiter
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(ratelimit.time, "sleep", clock.sleep)
+    return clock
+
+
+def headers(remaining: int, reset_after: float = 2.0, bucket: str = "abc") -> dict:
+    return {
+        "X-RateLimit-Bucket": bucket,
+        "X-RateLimit-Limit": "5",
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset-After": str(reset_after),
+    }
+
+
+def test_unknown_route_is_not_held_back(clock):
+    limiter = RateLimiter()
+    assert limiter.reserve(INTERACTIONS) == 0
+
+
+def test_exhausted_bucket_waits_for_its_reset(clock):
+    limiter = RateLimiter()
+    assert limiter.reserve(INTERACTIONS) == 0
+    limiter.update(INTERACTIONS, 204, headers(remaining=0, reset_after=2.0))
+    assert limiter.reserve(INTERACTIONS) == pytest.approx(2.0)
+
+    clock.now += 2.0
+    assert limiter.reserve(INTERACTIONS) == 0
+
+
+def test_requests_reserved_in_flight_are_counted(clock):
+    limiter = RateLimiter()
+    limiter.update(INTERACTIONS, 204, headers(remaining=2))
+    assert limiter.reserve(INTERACTIONS) == 0
+    assert limiter.reserve(INTERACTIONS) == 0
+    # A response to an older request still says 2 remaining, the two reserved since aren't counted by Discord yet.
+    limiter.update(INTERACTIONS, 204, headers(remaining=2))
+    assert limiter.reserve(INTERACTIONS) > 0
+
+
+def test_routes_sharing_a_bucket_share_its_limit(clock):
+    limiter = RateLimiter()
+    limiter.update("GET /a", 200, headers(remaining=0, bucket="shared"))
+    limiter.update("GET /b", 200, headers(remaining=0, bucket="shared"))
+    assert limiter.reserve("GET /a") > 0
+    assert limiter.reserve("GET /b") > 0
+
+
+def test_bucket_left_behind_by_its_routes_is_dropped(clock):
+    limiter = RateLimiter()
+    limiter.update(INTERACTIONS, 204, headers(3, bucket="old"))
+    limiter.update("GET /users/@me", 200, headers(3, bucket="old"))
+    limiter.update(INTERACTIONS, 204, headers(3, bucket="new"))
+    # Another route still maps to the old bucket.
+    assert set(limiter._buckets) == {"old", "new"}
+
+    limiter.update("GET /users/@me", 200, headers(3, bucket="newer"))
+    assert set(limiter._buckets) == {"new", "newer"}
+    for i in range(100):
+        limiter.update(INTERACTIONS, 204, headers(3, bucket=str(i)))
+    assert set(limiter._buckets) == {"99", "newer"}
+
+
+def test_429_holds_the_route_back_for_retry_after(clock):
+    limiter = RateLimiter()
+    before = RATE_LIMITED.get(INTERACTIONS, "bucket")
+    assert limiter.update(INTERACTIONS, 429, {}, {"retry_after": 3.5}) == 3.5
+    assert limiter.reserve(INTERACTIONS) == pytest.approx(3.5)
+    assert RATE_LIMITED.get(INTERACTIONS, "bucket") == before + 1
+
+
+def test_global_429_holds_every_route_back(clock):
+    limiter = RateLimiter()
+    limiter.update(INTERACTIONS, 429, {}, {"retry_after": 1.5, "global": True})
+    assert limiter.reserve("GET /users/@me") == pytest.approx(1.5)
+
+
+def test_global_limit_per_second(clock):
+    limiter = RateLimiter(global_limit=3)
+    assert [limiter.reserve(f"GET /{i}") for i in range(3)] == [0, 0, 0]
+    assert limiter.reserve("GET /3") == pytest.approx(1.0)
+    clock.now += 1.0
+    assert limiter.reserve("GET /3") == 0
+
+
+def test_wait_returns_the_time_waited(clock):
+    limiter = RateLimiter()
+    limiter.update(INTERACTIONS, 204, headers(remaining=0, reset_after=2.0))
+    assert limiter.wait(INTERACTIONS) == pytest.approx(2.0)
+    assert limiter.wait(INTERACTIONS) == 0
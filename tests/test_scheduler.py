@@ -0,0 +1,91 @@
+import time
+import pytest
+
+from DankCord.exceptions import UnknownCommand
+from DankCord.Objects import CommandResult
+from DankCord.scheduler import CommandScheduler
+
+from conftest import wait_until
+
+
+class FakeCore:
+    """Stands in for `Core`, answering with the queued results and recording when each command ran."""
+
+    def __init__(self, *results) -> None:
+        self.results = list(results)
+        self.runs = []
+
+    def fish(self, **kwargs):
+        self.runs.append((time.monotonic(), kwargs))
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.fixture
+def scheduler(logger):
+    schedulers = []
+
+    def make(core, **kwargs) -> CommandScheduler:
+        scheduler = CommandScheduler(core, logger, **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.stop(1)
+
+
+def test_command_waits_for_the_reported_cooldown(scheduler):
+    core = FakeCore(CommandResult(False, cooldown=0.2), CommandResult(True))
+    bot = scheduler(core)
+    bot.register("fish", interval=60, bait="worm")
+    bot.start()
+
+    wait_until(lambda: len(core.runs) == 2)
+    (first, kwargs), (second, _) = core.runs
+    assert second - first >= 0.2
+    assert kwargs == {"bait": "worm"}
+    # A run that didn't hit a cooldown waits `interval`.
+    assert 59 < bot.ready_in("fish") <= 60
+
+
+def test_failed_command_is_retried_after_retry_after(scheduler, logger):
+    core = FakeCore(RuntimeError("no reply"))
+    bot = scheduler(core)
+    assert bot.retry_after == 5.0
+    bot.register("fish")
+    bot.start()
+
+    wait_until(lambda: bot.commands["fish"].runs == 1)
+    assert 4.5 < bot.ready_in("fish") <= 5
+    assert len(core.runs) == 1
+    assert any("Scheduled fish failed" in msg for msg in logger.messages("Warning"))
+
+
+def test_short_retry_after_runs_the_command_again(scheduler):
+    core = FakeCore(RuntimeError("no reply"), CommandResult(True))
+    bot = scheduler(core, retry_after=0.05)
+    results = []
+    bot.register("fish", interval=60, callback=lambda name, result: results.append(result))
+    bot.start()
+
+    wait_until(lambda: len(results) == 2)
+    assert results[0] is None
+    assert results[1].success is True
+
+
+def test_stop_joins_the_timer_thread(scheduler):
+    bot = scheduler(FakeCore(CommandResult(True)))
+    bot.register("fish", interval=60)
+    bot.start()
+    wait_until(lambda: bot.commands["fish"].runs == 1)
+
+    bot.stop(1)
+    assert not bot._thread.is_alive()
+
+
+def test_only_known_commands_can_be_scheduled(scheduler):
+    with pytest.raises(UnknownCommand):
+        scheduler(FakeCore(CommandResult(True))).register("rob")
@@ -0,0 +1,120 @@
+import os
+import pytest
+
+import DankCord.storage
+from DankCord import Config
+from DankCord.aio.core import AsyncCore
+from DankCord.core import Core
+from DankCord.storage import BootCache, CommandStore, atomic_write, boot_cache_user
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(DankCord.storage.time, "time", clock)
+    return clock
+
+
+def test_boot_cache_entries_are_refreshed_then_expire(tmp_path, clock):
+    cache = BootCache(str(tmp_path / "boot"), refresh_after=10, max_age=60)
+    key = (boot_cache_user("token"), "9")
+    assert cache.get("commands", key) is None
+
+    cache.put("commands", key, {"search": {"id": "1"}})
+    assert cache.get("commands", key) == ({"search": {"id": "1"}}, False)
+    clock.now += 10
+    assert cache.get("commands", key) == ({"search": {"id": "1"}}, True)
+    clock.now += 50
+    assert cache.get("commands", key) is None
+    # Entries of other channels or kinds are kept apart.
+    assert cache.get("user", key) is None
+
+
+def test_boot_cache_ignores_unreadable_entries(tmp_path, clock):
+    cache = BootCache(str(tmp_path))
+    (tmp_path / "user-1.json").write_bytes(b"{not json")
+    (tmp_path / "user-2.json").write_bytes(b"[]")
+    assert cache.get("user", (1,)) is None
+    assert cache.get("user", (2,)) is None
+
+
+def test_boot_cache_keys_never_contain_the_token(tmp_path, clock):
+    token = "MTAxMTU2MDM3MTA3ODgzMjIwNA.secret"
+    cache = BootCache(str(tmp_path))
+    cache.put("user", (boot_cache_user(token),), {"id": "42"})
+
+    assert boot_cache_user(token) == boot_cache_user(token) != boot_cache_user("other")
+    assert len(boot_cache_user(token)) == 16
+    for path in tmp_path.iterdir():
+        assert token not in path.name
+        assert token.encode() not in path.read_bytes()
+
+
+def test_atomic_write_replaces_the_file_and_leaves_no_temporary_file(tmp_path):
+    path = tmp_path / "session.json"
+    atomic_write(str(path), b"old")
+    atomic_write(str(path), b"new")
+    assert path.read_bytes() == b"new"
+    assert os.listdir(tmp_path) == ["session.json"]
+
+
+def test_failed_atomic_write_keeps_the_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "session.json"
+    atomic_write(str(path), b"old")
+
+    def crash(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(DankCord.storage.os, "fsync", crash)
+    with pytest.raises(OSError):
+        atomic_write(str(path), b"new")
+    assert path.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["session.json"]
+
+
+def test_command_store_replaces_every_command(tmp_path):
+    store = CommandStore(str(tmp_path / "9_commands.db"))
+    try:
+        store.replace({"search": {"id": "1", "name": "search"}, "beg": {"id": "2", "name": "beg"}})
+        assert len(store) == 2
+        assert store.get("search") == {"id": "1", "name": "search"}
+
+        store.replace({"crime": {"id": "3", "name": "crime"}})
+        assert len(store) == 1
+        assert store.get("search") == {}
+        assert store.get("crime") == {"id": "3", "name": "crime"}
+    finally:
+        store.close()
+
+
+def test_command_store_survives_reopening(tmp_path):
+    store = CommandStore(str(tmp_path / "9_commands.db"))
+    store.replace({"search": {"id": "1"}})
+    store.close()
+
+    store = CommandStore(str(tmp_path / "9_commands.db"))
+    try:
+        assert store.get("search") == {"id": "1"}
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("core", [Core, AsyncCore])
+def test_disk_core_needs_the_command_store_of_the_client(core, logger, tmp_path):
+    config = Config("token", 9, resource_intensivity="DISK")
+    with pytest.raises(ValueError):
+        core(config, {}, None, logger, None, None)
+
+    store = CommandStore(str(tmp_path / "9_commands.db"))
+    try:
+        assert core(config, {}, None, logger, None, None, command_store=store).command_store is store
+    finally:
+        store.close()